@@ -0,0 +1,162 @@
+"""
+Benchmarks de la librería sobre datos sintéticos servidos en local.
+
+Genera un mes de viajes sintéticos para cada tamaño pedido, lo publica con un servidor
+HTTP local que sustituye al de la EMT y mide el tiempo y el pico de memoria de cada etapa:
+descarga del índice y del ZIP, lectura, limpieza y cada una de las consultas de BiciMad.
+
+Uso:
+    python -m benchmarks.run                         # 100k, 1M y 10M filas
+    python -m benchmarks.run --rows 100000 --repeat 5 --json resultados.json
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from bicimad.UrlEMT import UrlEMT
+from bicimad.bicimad import BiciMad
+from bicimad.transport import get_transport
+from benchmarks.server import LocalEMT
+from benchmarks.synthetic import write_month_zip, zip_name
+
+MONTH, YEAR = 1, 2023
+SIZES = [100_000, 1_000_000, 10_000_000]
+QUERIES = [
+    "resume", "most_popular_stations", "usage_from_most_popular_station", "day_time",
+    "weekday_time", "total_usage_day", "total_usage_by_station_day",
+]
+
+
+@dataclass
+class Result:
+    """Medida de una etapa para un tamaño de datos."""
+    rows: int
+    stage: str
+    seconds: float
+    peak_mb: Optional[float]
+
+
+def measure(run: Callable, setup: Optional[Callable] = None, repeat: int = 1, memory: bool = True):
+    """
+    Mide una función: el mejor tiempo de `repeat` ejecuciones y, en una ejecución adicional,
+    el pico de memoria reservada durante ella (con tracemalloc, que ralentiza la ejecución y
+    por eso no se usa al medir el tiempo).
+
+    Args:
+        run (Callable): Función a medir. Recibe el resultado de `setup`, si se indica.
+        setup (Callable, optional): Preparación de cada ejecución, que no se mide.
+        repeat (int): Número de ejecuciones cronometradas.
+        memory (bool): Si False, no se mide la memoria.
+
+    Returns:
+        Tuple[object, float, Optional[float]]: Resultado de la última ejecución, segundos y MB de pico.
+    """
+    def once():
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        value = run(*args)
+        return value, time.perf_counter() - start
+
+    best = float("inf")
+    for _ in range(repeat):
+        value, seconds = once()
+        best = min(best, seconds)
+
+    peak = None
+    if memory:
+        args = () if setup is None else (setup(),)
+        tracemalloc.start()
+        try:
+            value = run(*args)
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return value, best, peak
+
+
+def bench_size(rows: int, data_dir: Path, repeat: int = 1, memory: bool = True) -> List[Result]:
+    """
+    Ejecuta todas las etapas para un mes sintético de `rows` viajes. El ZIP se genera en
+    `data_dir` la primera vez y se reutiliza en ejecuciones posteriores.
+
+    Returns:
+        List[Result]: Una medida por etapa.
+    """
+    root = data_dir / str(rows)
+    files = root / UrlEMT.GENERAL
+    files.mkdir(parents=True, exist_ok=True)
+    if not (files / zip_name(MONTH, YEAR)).exists():
+        write_month_zip(files, rows, MONTH, YEAR)
+
+    results = []
+
+    def record(stage, run, setup=None):
+        value, seconds, peak = measure(run, setup, repeat, memory)
+        results.append(Result(rows, stage, seconds, peak))
+        return value
+
+    month, year = MONTH, YEAR % 100
+    with LocalEMT(root) as server:
+        html = get_transport().get(server.index_url).text
+        record("get_links", lambda: UrlEMT.get_links(html))
+        record("select_valid_urls", UrlEMT.select_valid_urls)
+        record("get_csv", lambda: UrlEMT().get_csv(month, year).close())
+        record("get_csv[stream]", lambda: UrlEMT().get_csv(month, year, stream=True).close())
+        data = record("get_data", lambda: BiciMad.get_data(month, year))
+        record("get_data[stream]", lambda: BiciMad.get_data(month, year, stream=True))
+        record("get_data[compact]", lambda: BiciMad.get_data(month, year, compact=True))
+        record("aggregate", lambda: BiciMad.aggregate(month, year))
+
+    bici = record("clean", lambda b: (b.clean(), b)[1], setup=lambda: BiciMad.from_data(data.copy(), month, year))
+    for query in QUERIES:
+        record(query, lambda _, q=query: getattr(bici, q)(), setup=bici.invalidate)
+    return results
+
+
+def report(results: List[Result]) -> str:
+    """Devuelve las medidas como tabla de texto: una fila por etapa y una columna por tamaño."""
+    frame = pd.DataFrame([asdict(r) for r in results])
+    seconds = frame.pivot(index="stage", columns="rows", values="seconds").reindex(frame["stage"].unique())
+    table = seconds.map(lambda s: f"{s:9.4f}s")
+    if frame["peak_mb"].notna().any():
+        peak = frame.pivot(index="stage", columns="rows", values="peak_mb").reindex(frame["stage"].unique())
+        table = table + peak.map(lambda m: f" {m:9.1f} MB")
+    return table.to_string()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES, help="Tamaños del mes sintético.")
+    parser.add_argument("--repeat", type=int, default=1, help="Ejecuciones cronometradas por etapa.")
+    parser.add_argument("--data-dir", type=Path, help="Directorio en el que generar y reutilizar los ZIP.")
+    parser.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria.")
+    parser.add_argument("--json", type=Path, help="Fichero en el que guardar las medidas.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or Path(tmp)
+        results = []
+        for rows in args.rows:
+            results += bench_size(rows, data_dir, args.repeat, not args.no_memory)
+
+    print(report(results))
+    if args.json:
+        args.json.write_text(json.dumps({
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "results": [asdict(r) for r in results],
+        }, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Servidor HTTP local que sustituye al portal de la EMT durante los benchmarks."""
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Union
+
+from bicimad.UrlEMT import UrlEMT
+from bicimad.catalog import MonthCatalog
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalEMT:
+    """Servidor de la EMT simulado en localhost.
+
+    Publica los ZIP de un directorio bajo la misma ruta que el portal real (`UrlEMT.GENERAL`),
+    con una página índice que enlaza a todos ellos. Usado como gestor de contexto, apunta
+    `UrlEMT` al servidor local y restaura la configuración original al salir."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Args:
+            directory (str | Path): Directorio raíz del servidor. Los ZIP deben estar en
+                `directory / UrlEMT.GENERAL`.
+        """
+        self.directory = Path(directory)
+        self.files = self.directory / UrlEMT.GENERAL
+        self.files.mkdir(parents=True, exist_ok=True)
+        handler = functools.partial(_QuietHandler, directory=str(self.directory))
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._saved = None
+
+    @property
+    def url(self) -> str:
+        """URL base del servidor, equivalente a `UrlEMT.EMT`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def index_url(self) -> str:
+        """URL de la página índice con los enlaces a los ZIP."""
+        return self.url + UrlEMT.GENERAL
+
+    def write_index(self):
+        """Regenera la página índice a partir de los ZIP presentes en el directorio."""
+        links = "\n".join(f'<li><a href="{p.name}">{p.name}</a></li>' for p in sorted(self.files.glob("*.zip")))
+        (self.files / "index.html").write_text(f"<html><body><ul>\n{links}\n</ul></body></html>\n", encoding="utf-8")
+
+    def __enter__(self) -> "LocalEMT":
+        self.write_index()
+        self._thread.start()
+        self._saved = (UrlEMT.EMT, UrlEMT._shared_catalog)
+        UrlEMT.EMT = self.url
+        # Catálogo sin persistir, para no mezclarlo con el del portal real.
+        UrlEMT._shared_catalog = MonthCatalog(UrlEMT.select_valid_urls)
+        return self
+
+    def __exit__(self, *exc):
+        UrlEMT.EMT, UrlEMT._shared_catalog = self._saved
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,132 @@
+"""Generador de ficheros de viajes sintéticos con el esquema de los ZIP mensuales de la EMT."""
+import calendar
+import zipfile
+from pathlib import Path
+from typing import Iterator, Union
+
+import numpy as np
+import pandas as pd
+
+HEADER = [
+    "date", "idBike", "fleet", "trip_minutes", "geolocation_unlock", "address_unlock",
+    "unlock_date", "locktype", "unlocktype", "geolocation_lock", "address_lock", "lock_date",
+    "station_unlock", "dock_unlock", "unlock_station_name", "station_lock", "dock_lock",
+    "lock_station_name",
+]
+"""Columnas de los CSV de la EMT, en el orden en que aparecen en los ficheros."""
+
+N_STATIONS = 600
+N_BIKES = 7000
+NO_STATION_RATE = 0.03
+"""Fracción de viajes sin estación (bicicletas aparcadas fuera de una base)."""
+
+CHUNK_ROWS = 250_000
+
+
+def zip_name(month: int, year: int) -> str:
+    """Nombre del ZIP de un mes con el formato de la EMT (por ejemplo, trips_23_01_January-csv.zip)."""
+    return f"trips_{year % 100:02d}_{month:02d}_{calendar.month_name[month]}-csv.zip"
+
+
+def _stations(rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(1, N_STATIONS + 1)
+    lat = np.round(40.4168 + rng.normal(0, 0.025, N_STATIONS), 6)
+    lon = np.round(-3.7038 + rng.normal(0, 0.03, N_STATIONS), 6)
+    return pd.DataFrame({
+        "id": ids.astype(str),
+        "name": [f"{i} - Estación {i}" for i in ids],
+        "address": [f"Calle Sintética nº {i}" for i in ids],
+        "geolocation": [f"{{'type': 'Point', 'coordinates': [{x}, {y}]}}" for x, y in zip(lon, lat)],
+        # Unas pocas estaciones concentran buena parte de los viajes, como en los datos reales.
+        "weight": rng.pareto(1.5, N_STATIONS) + 1,
+    })
+
+
+def generate_trips(rows: int, month: int = 1, year: int = 2023, seed: int = 0,
+                   chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """
+    Genera el texto CSV (separado por ';') de un mes de viajes sintéticos, por bloques.
+
+    Args:
+        rows (int): Número total de viajes.
+        month (int): Mes de los viajes.
+        year (int): Año de los viajes, con cuatro cifras.
+        seed (int): Semilla; la misma semilla produce exactamente el mismo fichero.
+        chunk_rows (int): Filas de cada bloque.
+
+    Yields:
+        str: Fragmentos consecutivos del CSV; el primero incluye la cabecera.
+    """
+    rng = np.random.default_rng(seed)
+    stations = _stations(rng)
+    weights = (stations["weight"] / stations["weight"].sum()).to_numpy()
+    start = pd.Timestamp(year=year, month=month, day=1)
+    n_days = calendar.monthrange(year, month)[1]
+    days = pd.date_range(start, periods=n_days).strftime("%Y-%m-%d").to_numpy()
+
+    # Perfil horario con las puntas de la mañana y de la tarde.
+    hour_weights = np.array([1, 1, 1, 1, 1, 2, 4, 8, 10, 7, 6, 6, 7, 7, 7, 7, 8, 10, 11, 9, 7, 5, 3, 2], float)
+    hour_weights /= hour_weights.sum()
+
+    header = True
+    for first in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - first)
+        origin = rng.choice(N_STATIONS, n, p=weights)
+        dest = rng.choice(N_STATIONS, n, p=weights)
+        day = rng.integers(0, n_days, n)
+        offset = day * 86400 + rng.choice(24, n, p=hour_weights) * 3600 + rng.integers(0, 3600, n)
+        minutes = np.round(rng.gamma(2.0, 7.0, n), 2)
+        unlock = start + pd.to_timedelta(offset, unit="s")
+        lock = unlock + pd.to_timedelta(np.round(minutes * 60), unit="s")
+        no_station = rng.random(n) < NO_STATION_RATE
+
+        origin_id = stations["id"].to_numpy()[origin]
+        origin_id[no_station] = ""
+        frame = pd.DataFrame({
+            "date": days[day],
+            "idBike": rng.integers(1, N_BIKES + 1, n),
+            "fleet": np.where(rng.random(n) < 0.97, 1, 2),
+            "trip_minutes": minutes,
+            "geolocation_unlock": stations["geolocation"].to_numpy()[origin],
+            "address_unlock": stations["address"].to_numpy()[origin],
+            "unlock_date": unlock,
+            "locktype": "STATION",
+            "unlocktype": "STATION",
+            "geolocation_lock": stations["geolocation"].to_numpy()[dest],
+            "address_lock": stations["address"].to_numpy()[dest],
+            "lock_date": lock,
+            "station_unlock": origin_id,
+            "dock_unlock": rng.integers(1, 25, n),
+            "unlock_station_name": stations["name"].to_numpy()[origin],
+            "station_lock": stations["id"].to_numpy()[dest],
+            "dock_lock": rng.integers(1, 25, n),
+            "lock_station_name": stations["name"].to_numpy()[dest],
+        }, columns=HEADER)
+        yield frame.to_csv(sep=";", index=False, header=header, date_format="%Y-%m-%dT%H:%M:%S")
+        header = False
+
+
+def write_month_zip(directory: Union[str, Path], rows: int, month: int = 1, year: int = 2023,
+                    seed: int = 0) -> Path:
+    """
+    Escribe en `directory` el ZIP de un mes de viajes sintéticos, con el mismo nombre y
+    estructura (un único CSV comprimido) que los de la EMT. El CSV se comprime por bloques,
+    sin llegar a tenerlo entero en memoria.
+
+    Args:
+        directory (str | Path): Directorio de destino.
+        rows (int): Número de viajes.
+        month (int): Mes de los viajes.
+        year (int): Año de los viajes, con cuatro cifras.
+        seed (int): Semilla del generador.
+
+    Returns:
+        Path: Ruta del ZIP escrito.
+    """
+    path = Path(directory) / zip_name(month, year)
+    csv_name = f"trips_{year % 100:02d}_{month:02d}_{calendar.month_name[month]}.csv"
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        with z.open(csv_name, "w", force_zip64=True) as f:
+            for text in generate_trips(rows, month, year, seed):
+                f.write(text.encode("utf-8"))
+    return path
@@ -1,28 +1,36 @@
 import io
 import zipfile
 
-import matplotlib.pyplot as plt
 import pandas as pd
 import requests
 
+from .download import spool_response
+from .sources import as_source
+from .transport import get_transport
+
 
 class BiciEMT:
 
-    def __init__(self, url: str):
-        self._contenido = self.csv_from_zip(url).read()
-        self.df = self.get_data(io.StringIO(self._contenido))
+    def __init__(self, source):
+        # source: URL, ruta de un ZIP o CSV local, directorio espejo, búfer en memoria o DataSource.
+        # El CSV llega al parser en binario, sin copiarlo antes a una cadena.
+        self.df = self.get_data(as_source(source).open())
 
     @staticmethod
-    def csv_from_zip(url: str):
+    def csv_from_zip(url: str, stream: bool = False):
         try:
 
-            response = requests.get(url)
+            response = get_transport().get(url, stream=stream)
             response.raise_for_status()  # Lanza HTTPError si no es 2xx
+            if stream:
+                # Volcar el ZIP por bloques a un fichero temporal en vez de a memoria
+                zip_bytes, _ = spool_response(response)
         except requests.RequestException as e:
             raise ConnectionError(f"Error al conectar con el servidor de la EMT: {e}")
 
-        # Leer el contenido del ZIP en memoria
-        zip_bytes = io.BytesIO(response.content)
+        if not stream:
+            # Leer el contenido del ZIP en memoria
+            zip_bytes = io.BytesIO(response.content)
 
         with zipfile.ZipFile(zip_bytes) as z:
             # Buscar archivos CSV dentro del ZIP
@@ -61,6 +69,8 @@ class BiciEMT:
         return self.df['trip_minutes'].groupby(self.df.index).sum() / 60
 
     def graficar_uso_diario(self):
+        import matplotlib.pyplot as plt
+
         horas = self.day_time()
         plt.figure(figsize=(12, 6))
         horas.plot(kind='bar')
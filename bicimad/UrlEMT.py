@@ -1,10 +1,19 @@
 import io
+import os
 import re
+import tempfile
 import zipfile
-from typing import TextIO, Set
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Set, TextIO, Tuple, Union
 
 import requests
 
+from . import instrument
+from .cache import ZipCache, remote_identity
+from .catalog import MonthCatalog
+from .download import ProgressCallback, SPOOL_MAX_SIZE
+from .transport import get_transport
+
 
 class UrlEMT:
     """Clase que gestiona la obtención de enlaces válidos de uso de bicicletas eléctricas
@@ -13,16 +22,58 @@ class UrlEMT:
     Esta clase permite:
     - Obtener todos los enlaces válidos a archivos CSV comprimidos con datos de viajes.
     - Filtrar por mes y año.
-    - Descargar y extraer el archivo CSV correspondiente a una fecha específica."""
+    - Descargar y extraer el archivo CSV correspondiente a una fecha específica.
+    - Reutilizar los ZIP ya descargados mediante una caché local en disco (ZipCache).
+
+    Todas las instancias comparten un mismo catálogo de meses (MonthCatalog), de modo que el
+    índice de la EMT solo se descarga una vez por proceso (o por TTL)."""
 
     EMT = "https://antares.sip.ucm.es/"
     GENERAL = "luis/bicimad/"
+    _shared_catalog: Optional[MonthCatalog] = None
 
-    def __init__(self):
+    def __init__(self, cache: Optional[ZipCache] = None):
         """
-        Inicializa la clase obteniendo el conjunto de enlaces válidos.
+        Inicializa la clase usando el catálogo compartido de enlaces válidos.
+
+        Args:
+            cache (ZipCache, optional): Caché en disco para los ZIP descargados. Si es None,
+                cada llamada a get_csv descarga el fichero completo. Si está en modo offline, el
+                catálogo compartido se usa sin refrescarlo (ver MonthCatalog.as_offline).
         """
-        self._valid_urls = self.select_valid_urls()
+        self._cache = cache
+        self._catalog = self.catalog()
+        if cache is not None and cache.offline:
+            self._catalog = self._catalog.as_offline()
+        self.bytes_downloaded = 0
+
+    @classmethod
+    def catalog(cls) -> MonthCatalog:
+        """
+        Devuelve el catálogo de meses compartido por todas las instancias, creándolo la primera
+        vez. El catálogo se persiste en la ruta de la variable de entorno BICIMAD_CATALOG o, en
+        su defecto, en ~/.cache/bicimad/catalog.json.
+
+        Returns:
+            MonthCatalog: Catálogo compartido.
+        """
+        if cls._shared_catalog is None:
+            path = os.environ.get("BICIMAD_CATALOG", Path.home() / ".cache" / "bicimad" / "catalog.json")
+            cls._shared_catalog = MonthCatalog(cls.select_valid_urls, path=path)
+        return cls._shared_catalog
+
+    @property
+    def _valid_urls(self) -> Set[str]:
+        return self._catalog.urls()
+
+    def available_months(self) -> List[Tuple[int, int]]:
+        """
+        Devuelve los meses publicados por la EMT, ordenados cronológicamente.
+
+        Returns:
+            List[Tuple[int, int]]: Tuplas (año, mes) con el año en dos cifras.
+        """
+        return self._catalog.months()
 
     @staticmethod
     def get_links(html: str) -> Set[str]:
@@ -54,12 +105,14 @@ class UrlEMT:
         """
         url = UrlEMT.EMT + UrlEMT.GENERAL
         try:
-            response = requests.get(url)
-            if response.status_code != 200:
-                raise ConnectionError("Fallo en la petición al servidor de la EMT")
-            html = response.text
-            links = UrlEMT.get_links(html)
-            return {url + link.lstrip('/') for link in links}
+            with instrument.stage('select_valid_urls') as etapa:
+                response = get_transport().get(url)
+                if response.status_code != 200:
+                    raise ConnectionError("Fallo en la petición al servidor de la EMT")
+                html = response.text
+                etapa.bytes = len(response.content)
+                links = UrlEMT.get_links(html)
+                return {url + link.lstrip('/') for link in links}
         except requests.RequestException as e:
             raise ConnectionError(f"Error al conectar con la EMT: {e}")
 
@@ -72,32 +125,56 @@ class UrlEMT:
 
         Args:
             month (int): Mes del archivo (entre 1 y 12).
-            year (int): Año del archivo (entre 21 y 23).
+            year (int): Año del archivo, en dos cifras (ver available_months).
 
         Returns:
             str: La URL completa del archivo CSV.
 
         Raises:
-            ValueError: Si el mes o el año están fuera del rango permitido, o si no existe un enlace para esa fecha.
+            ValueError: Si el mes está fuera de rango, o si no existe un enlace para esa fecha.
         """
-        if not (1 <= month <= 12) or not (21 <= year <= 23):
+        if not (1 <= month <= 12):
             raise ValueError("Mes o año fuera de rango válido")
 
-        prefix = f"trips_{year:02d}_{month:02d}"
-        for url in self._valid_urls:
-            if prefix in url:
-                return url
-        raise ValueError("No existe un enlace válido para ese mes y año")
+        url = self._catalog.url(month, year)
+        if url is None:
+            raise ValueError("No existe un enlace válido para ese mes y año")
+        return url
+
+    def source_id(self, month: int, year: int) -> str:
+        """
+        Devuelve una identidad del ZIP del mes y año indicados, útil para invalidar datos derivados
+        de él, sin descargarlo: su ETag (o su fecha de modificación y tamaño), que se consulta con
+        una petición HEAD o, en modo offline, se toma de la caché.
+
+        Args:
+            month (int): Mes del archivo.
+            year (int): Año del archivo.
+
+        Returns:
+            str: Identidad del fichero de origen.
+        """
+        url = self.get_url(month, year)
+        if self._cache is None:
+            return remote_identity(url)
+        return self._cache.identity(url)
 
-    def get_csv(self, month: int, year: int) -> TextIO:
+    def get_csv(self, month: int, year: int, stream: bool = False,
+                progress: Optional[ProgressCallback] = None) -> TextIO:
         """
         Método de instancia que acepta los argumentos de tipo entero month y year y devuelve un fichero
         en formato CSV correspondiente al mes month y año year. El tipo del objeto devuelto es TextIO.
         La función lanza una excepción de tipo ConnectionError en caso de que falle la petición al servidor de la EMT.
 
+        En modo streaming el ZIP se descarga por bloques a un fichero temporal (en memoria solo
+        mientras es pequeño) y el CSV se descomprime al leerlo, de modo que el consumo de memoria
+        no crece con el tamaño del fichero. Los bytes descargados quedan en `bytes_downloaded`.
+
         Args:
             month (int): Mes del archivo.
             year (int): Año del archivo.
+            stream (bool): Si True, descarga el ZIP por bloques en lugar de cargarlo entero en memoria.
+            progress (ProgressCallback, optional): Función que recibe (bytes descargados, total esperado).
 
         Returns:
             TextIO: Un objeto de texto con el contenido CSV.
@@ -106,15 +183,66 @@ class UrlEMT:
             ConnectionError: Si falla la descarga del archivo ZIP.
             ValueError: Si el archivo ZIP no contiene un CSV.
         """
+        with instrument.stage('get_csv') as etapa:
+            zip_file = self.get_zip(month, year, stream, progress)
+            etapa.bytes = self.bytes_downloaded
+        return self.csv_from_zip(zip_file)
+
+    def get_zip(self, month: int, year: int, stream: bool = False,
+                progress: Optional[ProgressCallback] = None) -> Union[Path, BinaryIO]:
+        """
+        Obtiene el ZIP del mes indicado sin abrirlo: la ruta en la caché, si la hay, o su contenido
+        descargado. Los bytes descargados quedan en `bytes_downloaded`.
+
+        Args:
+            month (int): Mes del archivo.
+            year (int): Año del archivo.
+            stream (bool): Si True, descarga el ZIP por bloques a un fichero temporal.
+            progress (ProgressCallback, optional): Función que recibe (bytes descargados, total esperado).
+
+        Returns:
+            Path | BinaryIO: Ruta del ZIP en la caché o fichero binario posicionado al principio.
+
+        Raises:
+            ConnectionError: Si falla la descarga del archivo ZIP.
+        """
         url = self.get_url(month, year)
+        if self._cache is not None:
+            path = self._cache.fetch(url, progress=progress)
+            self.bytes_downloaded = self._cache.last_download_bytes
+            return path
         try:
-            response = requests.get(url)
+            if stream:
+                zip_file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+                get_transport().download(url, zip_file, progress=progress)
+                self.bytes_downloaded = zip_file.tell()
+                zip_file.seek(0)
+                return zip_file
+            response = get_transport().get(url)
             response.raise_for_status()
         except requests.RequestException as e:
             raise ConnectionError(f"Error al descargar el CSV: {e}")
 
-        zip_bytes = io.BytesIO(response.content)
-        with zipfile.ZipFile(zip_bytes) as z:
+        self.bytes_downloaded = len(response.content)
+        if progress is not None:
+            progress(self.bytes_downloaded, self.bytes_downloaded)
+        return io.BytesIO(response.content)
+
+    @staticmethod
+    def csv_from_zip(zip_file: Union[str, BinaryIO]) -> TextIO:
+        """
+        Abre el primer fichero CSV contenido en un ZIP y lo devuelve como TextIO.
+
+        Args:
+            zip_file (str | BinaryIO): Ruta del ZIP o fichero binario con su contenido.
+
+        Returns:
+            TextIO: Un objeto de texto con el contenido CSV.
+
+        Raises:
+            ValueError: Si el archivo ZIP no contiene un CSV.
+        """
+        with zipfile.ZipFile(zip_file) as z:
             csv_files = [f for f in z.namelist() if f.lower().endswith('.csv')]
             if not csv_files:
                 raise ValueError("El ZIP no contiene archivos CSV")
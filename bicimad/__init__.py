@@ -1,3 +0,0 @@
-import truststore
-
-truststore.inject_into_ssl()
@@ -0,0 +1,244 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DIAS = ["L", "M", "X", "J", "V", "S", "D"]
+
+
+def _concat_sum(a: Optional[pd.Series], b: pd.Series) -> pd.Series:
+    """Suma dos series por índice conservando el tipo entero de los conteos."""
+    if a is None:
+        return b
+    return pd.concat([a, b]).groupby(level=list(range(b.index.nlevels))).sum()
+
+
+def _empty_by_day(dtype: str, name: str) -> pd.Series:
+    """Serie vacía indexada por día, para los acumuladores que no han visto ningún viaje."""
+    return pd.Series(dtype=dtype, index=pd.DatetimeIndex([], name='fecha'), name=name)
+
+
+class MonthAccumulator:
+    """Acumulador combinable de los agregados que devuelven las consultas de BiciMad.
+
+    Recibe los datos por bloques (por ejemplo, los trozos de `pd.read_csv(chunksize=...)`) con
+    el mismo formato que devuelve `BiciMad.get_data`, y mantiene solo agregados pequeños: totales,
+    sumas y conteos por día, conteos por dirección de desbloqueo y por (día, estación). Dos
+    acumuladores se pueden combinar con `merge`, lo que permite procesar meses o años sin
+    cargar todas las filas a la vez.
+
+    Los resultados coinciden con los de un objeto BiciMad después de `clean()`, salvo el
+    redondeo de las sumas de minutos, que se hacen en otro orden."""
+
+    def __init__(self, month: Optional[int] = None, year: Optional[int] = None):
+        """
+        Inicializa un acumulador vacío.
+
+        Args:
+            month (int, optional): Mes de los datos, para `resume`.
+            year (int, optional): Año de los datos, para `resume`.
+        """
+        self.month = month
+        self.year = year
+        self.total_uses = 0
+        self.total_minutes = 0.0
+        self._address_counts: Dict[str, int] = {}
+        self._day_minutes: Optional[pd.Series] = None
+        self._day_counts: Optional[pd.Series] = None
+        self._station_day: Optional[pd.Series] = None
+        self._station_missing = False
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Incorpora un bloque de filas. La columna station_unlock debe haberse leído como texto
+        (dtype=str) para poder reproducir al final las etiquetas que produce `clean()`.
+
+        Args:
+            chunk (pd.DataFrame): Bloque con índice unlock_date y las columnas de BiciMad.COLUMNS.
+        """
+        chunk = chunk.dropna(how='all')
+        days = chunk.index.normalize()
+        minutes = chunk['trip_minutes'].astype('float64')
+
+        self.total_uses += len(chunk)
+        self.total_minutes += minutes.sum()
+
+        for address, count in chunk['address_unlock'].value_counts(sort=False).items():
+            self._address_counts[address] = self._address_counts.get(address, 0) + count
+
+        self._day_minutes = _concat_sum(self._day_minutes, minutes.groupby(days).sum())
+        self._day_counts = _concat_sum(self._day_counts, chunk.groupby(days).size())
+
+        stations = chunk['station_unlock']
+        self._station_missing |= bool(stations.isna().any())
+        by_station = pd.Series(1, index=chunk.index).groupby([days, stations.fillna('')]).size()
+        self._station_day = _concat_sum(self._station_day, by_station)
+
+    def merge(self, other: "MonthAccumulator") -> "MonthAccumulator":
+        """
+        Combina en este acumulador los agregados de otro.
+
+        Args:
+            other (MonthAccumulator): Acumulador a combinar.
+
+        Returns:
+            MonthAccumulator: Este mismo acumulador.
+        """
+        if (self.month, self.year) != (other.month, other.year):
+            self.month = self.year = None
+        self.total_uses += other.total_uses
+        self.total_minutes += other.total_minutes
+        for address, count in other._address_counts.items():
+            self._address_counts[address] = self._address_counts.get(address, 0) + count
+        for name in ('_day_minutes', '_day_counts', '_station_day'):
+            theirs = getattr(other, name)
+            if theirs is not None:
+                setattr(self, name, _concat_sum(getattr(self, name), theirs))
+        self._station_missing |= other._station_missing
+        return self
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        """
+        Devuelve los agregados como tablas planas, aptas para guardarse en disco (ver
+        `bicimad.ingest.AggregateStore`) y para reconstruir el acumulador con `from_frames`.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Tablas 'totals' (una fila), 'days' (minutos y usos por día),
+            'stations' (usos por día y estación) y 'addresses' (usos por dirección de desbloqueo).
+        """
+        empty = pd.Series(dtype='int64', index=pd.DatetimeIndex([]))
+        day_minutes = self._day_minutes if self._day_minutes is not None else empty.astype('float64')
+        day_counts = self._day_counts if self._day_counts is not None else empty
+        days = pd.DataFrame({'minutes': day_minutes, 'count': day_counts}).rename_axis('fecha').reset_index()
+
+        if self._station_day is not None:
+            stations = self._station_day.rename('count').rename_axis(['fecha', 'station_unlock']).reset_index()
+        else:
+            stations = pd.DataFrame({'fecha': pd.DatetimeIndex([]), 'station_unlock': pd.Series(dtype=object),
+                                     'count': pd.Series(dtype='int64')})
+        addresses = pd.DataFrame({'address_unlock': pd.Series(list(self._address_counts), dtype=object),
+                                  'count': pd.Series(list(self._address_counts.values()), dtype='int64')})
+        totals = pd.DataFrame({'total_uses': [self.total_uses], 'total_minutes': [self.total_minutes],
+                               'station_missing': [self._station_missing]})
+        return {'totals': totals, 'days': days, 'stations': stations, 'addresses': addresses}
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], month: Optional[int] = None,
+                    year: Optional[int] = None) -> "MonthAccumulator":
+        """
+        Reconstruye un acumulador a partir de las tablas de `to_frames`. Si las tablas son la
+        concatenación de las de varios acumuladores, el resultado equivale a combinarlos con `merge`
+        en ese orden, pero con una sola agregación por tabla.
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): Tablas devueltas por `to_frames`, o su concatenación.
+            month (int, optional): Mes de los datos, para `resume`.
+            year (int, optional): Año de los datos, para `resume`.
+
+        Returns:
+            MonthAccumulator: Acumulador con esos agregados.
+        """
+        acc = cls(month, year)
+        totals = frames['totals']
+        acc.total_uses = int(totals['total_uses'].sum())
+        acc.total_minutes = float(totals['total_minutes'].sum())
+        acc._station_missing = bool(totals['station_missing'].any())
+
+        addresses = frames['addresses'].groupby('address_unlock', sort=False)['count'].sum()
+        acc._address_counts = {address: int(count) for address, count in addresses.items()}
+
+        days = frames['days']
+        if len(days):
+            days = days.groupby('fecha')[['minutes', 'count']].sum()
+            acc._day_minutes = days['minutes'].astype('float64')
+            acc._day_counts = days['count'].astype('int64')
+
+        stations = frames['stations']
+        if len(stations):
+            acc._station_day = stations.groupby(['fecha', 'station_unlock'])['count'].sum().astype('int64')
+        return acc
+
+    def _counts(self) -> pd.Series:
+        counts = pd.Series(self._address_counts, dtype='int64')
+        order = np.argsort(-counts.to_numpy(), kind='stable')
+        counts = counts.iloc[order]
+        counts.index.name = 'address_unlock'
+        counts.name = 'count'
+        return counts
+
+    def resume(self) -> pd.Series:
+        """Equivalente a BiciMad.resume."""
+        counts = self._counts()
+        max_count = counts.iloc[0]
+        return pd.Series({
+            'year': self.year,
+            'month': self.month,
+            'total_uses': self.total_uses,
+            'total_time': self.total_minutes / 60,
+            'most_popular_station': set(counts[counts == max_count].index),
+            'uses_from_most_popular': max_count
+        })
+
+    def most_popular_stations(self) -> set:
+        """Equivalente a BiciMad.most_popular_stations."""
+        return set(self._counts().head(3).index)
+
+    def usage_from_most_popular_station(self) -> pd.Series:
+        """Equivalente a BiciMad.usage_from_most_popular_station."""
+        return self._counts().head(3)
+
+    def day_time(self) -> pd.Series:
+        """Equivalente a BiciMad.day_time."""
+        if self._day_minutes is None:
+            return _empty_by_day('float64', 'trip_minutes')
+        horas = self._day_minutes.sort_index() / 60
+        horas.index.name = 'fecha'
+        horas.name = 'trip_minutes'
+        return horas
+
+    def weekday_time(self) -> pd.Series:
+        """Equivalente a BiciMad.weekday_time."""
+        horas = self.day_time()
+        weekday = pd.Index([DIAS[d] for d in horas.index.weekday], name='fecha')
+        return horas.groupby(weekday).sum().reindex(DIAS, fill_value=0)
+
+    def total_usage_day(self) -> pd.Series:
+        """Equivalente a BiciMad.total_usage_day."""
+        if self._day_counts is None:
+            return _empty_by_day('int64', 'total_usos')
+        usos = self._day_counts.sort_index()
+        usos.index.name = 'fecha'
+        usos.name = 'total_usos'
+        return usos
+
+    def total_usage_by_station_day(self) -> pd.Series:
+        """Equivalente a BiciMad.total_usage_by_station_day."""
+        usos = self._station_day
+        if usos is None:
+            index = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)],
+                                              names=['fecha', 'station_unlock'])
+            return pd.Series(dtype='int64', index=index, name='total_usos')
+        days = usos.index.get_level_values(0)
+        labels = self._station_labels(usos.index.get_level_values(1))
+        usos = pd.Series(usos.to_numpy(), index=pd.MultiIndex.from_arrays([days, labels]))
+        usos = usos[usos.index.get_level_values(1).notna()]
+        usos = usos.groupby(level=[0, 1]).sum()
+        usos.index.names = ['fecha', 'station_unlock']
+        usos.name = 'total_usos'
+        return usos
+
+    def _station_labels(self, texts: pd.Index) -> pd.Index:
+        """
+        Reproduce sobre los textos originales de station_unlock la inferencia de tipos de
+        `pd.read_csv` sobre la columna completa y la posterior conversión `astype(str)` de `clean()`.
+        """
+        uniques = pd.unique(np.asarray(texts, dtype=object))
+        raw = pd.Series([np.nan if t == '' else t for t in uniques], dtype=object)
+        if self._station_missing:
+            raw = pd.concat([raw, pd.Series([np.nan], dtype=object)], ignore_index=True)
+        try:
+            parsed = pd.to_numeric(raw)
+        except (ValueError, TypeError):
+            parsed = raw
+        labels = parsed.astype(str).iloc[:len(uniques)]
+        return pd.Index(texts).map(dict(zip(uniques, labels)))
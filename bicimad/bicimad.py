@@ -1,72 +1,511 @@
-import matplotlib.pyplot as plt
+import functools
+import io
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
+from . import instrument, parallel
 from .UrlEMT import UrlEMT
+from .aggregate import MonthAccumulator
+from .cache import ZipCache
+from .chains import TripChains
+from .cube import UsageCube
+from .geo import StationGrid, parse_geolocation
+from .labels import id_labels
+from .occupancy import StationOccupancy
+from .od import ODMatrix
+from .sketch import MonthSketch
+from .sources import RemoteSource, as_source, open_csv_member
+from .store import ColumnarStore
+from .windows import TripTimeline
+
+
+ID_COLUMNS = ['fleet', 'idBike', 'station_lock', 'station_unlock']
+"""Columnas de identificadores que `clean` convierte a texto."""
+
+
+def _query(method):
+    """
+    Decorador de las consultas de BiciMad: en modo perezoso carga antes las columnas que la
+    consulta necesita (ver `BiciMad.QUERY_COLUMNS`) y mide cada llamada como una etapa con su
+    nombre (ver `bicimad.instrument`).
+    """
+    columns = None
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        nonlocal columns
+        if self._lazy:
+            if columns is None:
+                columns = BiciMad.QUERY_COLUMNS.get(method.__name__, ())
+            self._require(columns)
+        with instrument.stage(method.__name__, self._metrics):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _empty_rows(csv_file: BinaryIO, columns: Iterable[str]) -> np.ndarray:
+    """
+    Marca las filas de un CSV de la EMT que no tienen ningún valor en `columns`, es decir, las
+    que `dropna(how='all')` eliminaría si se hubieran leído esas columnas. Recorre las líneas en
+    binario sin decodificarlas ni convertir ningún campo, por lo que es mucho más barato que leer
+    las columnas.
+    """
+    lines = iter(csv_file.readline, b'')
+    header = next(lines).decode('utf-8-sig').rstrip('\r\n').split(';')
+    positions = [header.index(c) for c in columns]
+    empty = []
+    for line in lines:
+        line = line.rstrip(b'\r\n')
+        if not line:
+            continue  # read_csv también se salta las líneas en blanco
+        if b';;' in line:
+            fields = line.split(b';')
+            empty.append(all(not fields[i].strip() for i in positions if i < len(fields)))
+        else:
+            empty.append(False)
+    return np.array(empty, dtype=bool)
+
+
+def _value_counts(column: pd.Series) -> pd.Series:
+    """
+    Equivalente a `value_counts()` que, para columnas categóricas, cuenta directamente sobre los
+    códigos y conserva el mismo orden que sobre textos (empates en orden de aparición).
+    """
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        return column.value_counts()
+    codes = column.cat.codes.to_numpy()
+    codes = codes[codes >= 0]
+    seen = pd.unique(codes)
+    counts = np.bincount(codes, minlength=len(column.cat.categories))[seen]
+    order = np.argsort(-counts, kind='stable')
+    index = pd.Index(column.cat.categories[seen[order]], name=column.name)
+    return pd.Series(counts[order], index=index, name='count')
 
 
 class BiciMad:
     """
     Clase que representa los datos de uso del sistema BiciMAD durante un mes concreto.
+
+    Los agregados que comparten las consultas (usos por estación, sumas y conteos por día y
+    por día de la semana) se calculan una sola vez y se reutilizan hasta que `clean` o la
+    sustitución de los datos los invalidan.
     """
 
-    def __init__(self, month: int, year: int):
+    COLUMNS = [
+        'idBike', 'fleet', 'trip_minutes', 'geolocation_unlock', 'address_unlock', 'unlock_date',
+        'locktype', 'unlocktype', 'geolocation_lock', 'address_lock', 'lock_date',
+        'station_unlock', 'unlock_station_name', 'station_lock', 'lock_station_name'
+    ]
+
+    COMPACT_DTYPES = {
+        'idBike': 'Int32', 'fleet': 'Int8', 'station_unlock': 'Int16', 'station_lock': 'Int16',
+        'trip_minutes': 'float32',
+        'address_unlock': 'category', 'address_lock': 'category',
+        'unlock_station_name': 'category', 'lock_station_name': 'category',
+        'locktype': 'category', 'unlocktype': 'category',
+        'geolocation_unlock': 'category', 'geolocation_lock': 'category',
+    }
+    """Plan de tipos compacto: categóricas para textos repetidos, enteros estrechos para
+    identificadores y float32 para la duración. Las geolocalizaciones se leen como categóricas
+    y se sustituyen por columnas numéricas lat_/lon_ (unlock y lock)."""
+
+    QUERY_COLUMNS = {
+        'resume': ['trip_minutes', 'address_unlock'],
+        'most_popular_stations': ['address_unlock'],
+        'usage_from_most_popular_station': ['address_unlock'],
+        'day_time': ['trip_minutes'],
+        'weekday_time': ['trip_minutes'],
+        'total_usage_day': [],
+        'total_usage_by_station_day': ['station_unlock'],
+        'cube': ['trip_minutes', 'station_unlock'],
+        'hourly_usage': ['trip_minutes', 'station_unlock'],
+        'peak_hour': ['trip_minutes', 'station_unlock'],
+        'od_matrix': ['trip_minutes', 'station_unlock', 'station_lock'],
+        'timeline': ['trip_minutes', 'station_unlock'],
+        'window_usage': ['trip_minutes', 'station_unlock'],
+        'rolling_usage': ['trip_minutes', 'station_unlock'],
+        'peak_windows': ['trip_minutes', 'station_unlock'],
+        'trip_chains': ['idBike', 'trip_minutes', 'station_unlock', 'station_lock', 'lock_date'],
+        'rebalancing': ['idBike', 'trip_minutes', 'station_unlock', 'station_lock', 'lock_date'],
+        'occupancy': ['station_unlock', 'station_lock', 'lock_date'],
+    }
+    """Columnas (además del índice) que lee cada consulta en modo perezoso. `station_grid`
+    depende del lado pedido y las resuelve por su cuenta."""
+
+    def __init__(self, month: int, year: int, cache: Optional[ZipCache] = None,
+                 store: Optional[ColumnarStore] = None, compact: bool = False, lazy: bool = False,
+                 source=None, parse_workers: Optional[int] = 0):
         """
         Constructor de clase.
 
-        Inicializa el objeto con el mes y el año indicados. Lanza una excepción si los valores están fuera de rango.
+        Inicializa el objeto con el mes y el año indicados. Lanza una excepción si el mes está fuera de rango
+        o si la fuente no tiene ese mes (en el portal de la EMT, si no aparece en su catálogo).
         Obtiene automáticamente el DataFrame de datos llamando al método estático `get_data`.
 
         Parámetros:
         - month (int): Mes entre 1 y 12.
-        - year (int): Año entre 21 y 23 (representando 2021 a 2023).
+        - year (int): Año en dos cifras; los disponibles los da el catálogo (ver `UrlEMT.available_months`).
+        - cache (ZipCache, opcional): Caché en disco de los ZIP mensuales.
+        - store (ColumnarStore, opcional): Almacén columnar del que cargar el mes ya limpio, si está.
+        - compact (bool): Si True, los datos se leen con el plan de tipos compacto (COMPACT_DTYPES).
+        - lazy (bool): Si True, el constructor solo comprueba que el mes está publicado. Los datos
+          se descargan en el primer acceso y cada consulta lee únicamente las columnas que necesita
+          (ver QUERY_COLUMNS); el resto se añaden más adelante si otra consulta las pide. Acceder a
+          `data` carga todas las columnas.
+        - source (DataSource, opcional): Origen de los datos del mes en lugar del portal de la EMT:
+          una fuente de `bicimad.sources` o cualquier valor que acepte `as_source` (ruta de un ZIP,
+          CSV o directorio espejo, URL o búfer en memoria).
+        - parse_workers (int, opcional): Procesos con los que leer el CSV del mes (ver `read_csv`).
+          Por defecto se lee en el propio proceso; con None, un proceso por núcleo.
         """
-        if not (1 <= month <= 12 and 21 <= year <= 23):
-            raise ValueError("Mes o año fuera de rango permitido.")
+        if not (1 <= month <= 12):
+            raise ValueError("Mes fuera de rango permitido.")
         self._month = month
         self._year = year
-        self._data = self.get_data(month, year)
+        self._cache = cache
+        self._store = store
+        self._source = as_source(source) if source is not None else RemoteSource(cache)
+        self._lazy = lazy
+        self._parse_workers = parse_workers
+        self._metrics = instrument.PipelineMetrics()
+        if lazy:
+            self._source.check(month, year)
+            self._compact = compact
+            self._zip = None
+            self._from_store = None
+            self._loaded = set()
+            self._keep = None
+            self._cleaned = False
+            self._frame = None
+            self._hours = None
+            self._times = None
+            self.invalidate()
+            return
+        with instrument.collect(self._metrics):
+            data, extras = self._get_data(month, year, cache, store=store, compact=compact, source=self._source,
+                                          parse_workers=parse_workers)
+        self._data = data
+        self._hours = extras.get('hours')
+        self._times = extras.get('times')
+
+    @classmethod
+    def from_data(cls, data: pd.DataFrame, month: int, year: int, hours: Optional[np.ndarray] = None,
+                  times: Optional[np.ndarray] = None) -> "BiciMad":
+        """
+        Construye un objeto a partir de un DataFrame ya cargado, sin descargar nada.
+
+        Parámetros:
+        - data (pd.DataFrame): Datos con el formato de `get_data` (limpios o no).
+        - month (int): Mes de los datos.
+        - year (int): Año de los datos.
+        - hours (np.ndarray, opcional): Hora de desbloqueo de cada fila, si `data` ya está limpio.
+        - times (np.ndarray, opcional): Fecha y hora de desbloqueo de cada fila, si `data` se limpió
+          con keep_time=True.
+
+        Devuelve:
+        - BiciMad: Objeto con esos datos.
+        """
+        bici = cls.__new__(cls)
+        bici._month = month
+        bici._year = year
+        bici._cache = None
+        bici._store = None
+        bici._source = RemoteSource()
+        bici._lazy = False
+        bici._parse_workers = 0
+        bici._metrics = instrument.PipelineMetrics()
+        bici._data = data
+        bici._hours = hours
+        bici._times = times
+        return bici
 
     @staticmethod
-    def get_data(month: int, year: int) -> pd.DataFrame:
+    def get_data(month: int, year: int, cache: Optional[ZipCache] = None, stream: bool = False,
+                 store: Optional[ColumnarStore] = None, columns: Optional[List[str]] = None,
+                 compact: bool = False, source=None, parse_workers: Optional[int] = 0) -> pd.DataFrame:
         """
         Método estático que descarga y devuelve el DataFrame con los datos de uso de bicicletas
         para el mes y año especificados. Solo se cargan las columnas necesarias y las fechas se
-        parsean como datetime.
+        parsean como datetime. Si se indica una caché, el ZIP solo se descarga cuando no está en ella.
+        Con stream=True el ZIP se descarga por bloques y no se carga entero en memoria.
+
+        Si se indica un almacén columnar y contiene el mes guardado a partir del mismo ZIP de origen,
+        se devuelve directamente el DataFrame ya limpio que contiene, sin leer el CSV.
+
+        Parámetros:
+        - columns (List[str], opcional): Subconjunto de columnas a cargar. El índice se carga siempre.
+        - compact (bool): Si True, se aplica el plan de tipos COMPACT_DTYPES al leer el CSV y las
+          geolocalizaciones se convierten en columnas lat_unlock, lon_unlock, lat_lock y lon_lock.
+        - source (DataSource, opcional): Origen del CSV. Por defecto, el portal de la EMT con la
+          caché indicada. El CSV se pasa al parser en binario, sin copiarlo antes a una cadena.
+        - parse_workers (int, opcional): Procesos con los que leer el CSV (ver `read_csv`).
 
         Devuelve:
         - pd.DataFrame: DataFrame con los datos del CSV correspondiente.
         """
-        enlaces = UrlEMT()
-        csv_file = enlaces.get_csv(month, year)
+        return BiciMad._get_data(month, year, cache, stream, store, columns, compact, source, parse_workers)[0]
+
+    @staticmethod
+    def _get_data(month: int, year: int, cache: Optional[ZipCache] = None, stream: bool = False,
+                  store: Optional[ColumnarStore] = None, columns: Optional[List[str]] = None,
+                  compact: bool = False, source=None,
+                  parse_workers: Optional[int] = 0) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+        """Como `get_data`, pero devuelve además las horas de desbloqueo guardadas en el almacén."""
+        source = as_source(source) if source is not None else RemoteSource(cache, stream)
+        if store is not None:
+            with instrument.stage('store_load') as etapa:
+                df = store.load(month, year, source.identity(month, year), columns)
+                etapa.rows = None if df is None else len(df)
+            if df is not None:
+                return df, store.extras(month, year)
+
+        csv_file = source.open(month, year)
+        return BiciMad.read_csv(csv_file, columns=columns, compact=compact, parse_workers=parse_workers), {}
+
+    @staticmethod
+    def read_csv(csv_file, columns: Optional[List[str]] = None, compact: bool = False,
+                 parse_workers: Optional[int] = 0) -> pd.DataFrame:
+        """
+        Método estático que convierte un fichero CSV de viajes de la EMT ya abierto en el DataFrame
+        que devuelve `get_data`.
+
+        Parámetros:
+        - csv_file: Fichero o ruta del CSV.
+        - columns (List[str], opcional): Subconjunto de columnas a cargar. El índice se carga siempre.
+        - compact (bool): Si True, se aplica el plan de tipos COMPACT_DTYPES.
+        - parse_workers (int, opcional): Procesos con los que leer el CSV, repartiendo entre ellos
+          rangos de filas (ver `bicimad.parallel`). Con 0 o 1 se lee en el propio proceso; con None,
+          un proceso por núcleo. El resultado es el mismo en todos los casos.
 
-        columnas = [
-            'idBike', 'fleet', 'trip_minutes', 'geolocation_unlock', 'address_unlock', 'unlock_date',
-            'locktype', 'unlocktype', 'geolocation_lock', 'address_lock', 'lock_date',
-            'station_unlock', 'unlock_station_name', 'station_lock', 'lock_station_name'
-        ]
+        Devuelve:
+        - pd.DataFrame: DataFrame con los datos del CSV.
+        """
+        columnas = BiciMad.COLUMNS if columns is None else ['unlock_date'] + list(columns)
+        opciones = dict(
+            sep=';',
+            usecols=columnas,
+            index_col='unlock_date',
+            parse_dates=[c for c in ('unlock_date', 'lock_date') if c in columnas],
+            dtype={c: t for c, t in BiciMad.COMPACT_DTYPES.items() if c in columnas} if compact else None
+        )
         try:
-            df = pd.read_csv(
+            with instrument.stage('read_csv') as etapa:
+                if parse_workers is None or parse_workers > 1:
+                    df = parallel.read_csv(csv_file, workers=parse_workers, **opciones)
+                else:
+                    df = pd.read_csv(csv_file, **opciones)
+                etapa.rows = len(df)
+        except Exception as e:
+            raise ValueError(f"Error al leer el CSV: {e}")
+
+        if compact:
+            for side in ('unlock', 'lock'):
+                col = f'geolocation_{side}'
+                if col in df.columns:
+                    coords = parse_geolocation(df.pop(col), dtype='float32')
+                    df[f'lat_{side}'] = coords['lat']
+                    df[f'lon_{side}'] = coords['lon']
+        return df
+
+    @staticmethod
+    def aggregate(month: int, year: int, chunksize: int = 500_000, cache: Optional[ZipCache] = None,
+                  stream: bool = True, source=None, sketch: Optional[MonthSketch] = None) -> MonthAccumulator:
+        """
+        Método estático que recorre el CSV del mes por bloques de `chunksize` filas, en una sola
+        pasada y sin cargarlo entero en memoria, y devuelve un acumulador capaz de responder a las
+        mismas consultas que un objeto BiciMad limpio (resume, day_time, weekday_time, ...).
+
+        Parámetros:
+        - chunksize (int): Número máximo de filas de cada bloque.
+        - source (DataSource, opcional): Origen del CSV. Por defecto, el portal de la EMT.
+        - sketch (MonthSketch, opcional): Resúmenes aproximados que se alimentan en la misma pasada.
+
+        Devuelve:
+        - MonthAccumulator: Agregados del mes, combinables con los de otros meses mediante `merge`.
+        """
+        source = as_source(source) if source is not None else RemoteSource(cache, stream)
+        csv_file = source.open(month, year)
+        acumulador = MonthAccumulator(month, year)
+        try:
+            bloques = pd.read_csv(
                 csv_file,
                 sep=';',
-                usecols=columnas,
+                usecols=BiciMad.COLUMNS,
                 index_col='unlock_date',
-                parse_dates=['unlock_date', 'lock_date']
+                parse_dates=['unlock_date'],
+                dtype={'station_unlock': str},
+                chunksize=chunksize
             )
+            with instrument.stage('aggregate') as etapa:
+                filas = 0
+                for bloque in bloques:
+                    acumulador.update(bloque)
+                    if sketch is not None:
+                        sketch.update(bloque)
+                    filas += len(bloque)
+                etapa.rows = filas
         except Exception as e:
             raise ValueError(f"Error al leer el CSV: {e}")
-
-        return df
+        return acumulador
 
     @property
     def data(self):
         """
-        Permite acceder directamente al DataFrame de datos de uso de bicicletas.
+        Permite acceder directamente al DataFrame de datos de uso de bicicletas. En modo perezoso
+        carga antes todas las columnas que falten.
 
         Devuelve:
         - pd.DataFrame: DataFrame con los datos cargados.
         """
+        if self._lazy:
+            self._require([c for c in BiciMad.COLUMNS if c != 'unlock_date'])
         return self._data
 
+    @property
+    def _data(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._require(())
+        return self._frame
+
+    @property
+    def loaded_columns(self) -> List[str]:
+        """
+        Columnas leídas hasta ahora. Sin modo perezoso son todas las de los datos.
+
+        Devuelve:
+        - List[str]: Nombres de las columnas, tal como se pidieron (las geolocalizaciones del
+          plan compacto aparecen como geolocation_unlock/geolocation_lock).
+        """
+        if not self._lazy:
+            return list(self._data.columns)
+        return [c for c in BiciMad.COLUMNS if c in self._loaded]
+
+    def _require(self, columns: Iterable[str]):
+        """
+        En modo perezoso, lee las columnas indicadas que aún no estén cargadas (o solo el índice,
+        si todavía no se ha leído nada) y las añade a los datos, alineadas fila a fila. Si los datos
+        ya se han limpiado, las columnas nuevas se limpian igual antes de añadirlas.
+        """
+        if not self._lazy:
+            return
+        missing = [c for c in BiciMad.COLUMNS if c in columns and c not in self._loaded]
+        if self._frame is not None and not missing:
+            return
+
+        with instrument.collect(self._metrics):
+            df = self._read_columns(missing)
+        if self._frame is None:
+            self._frame = df
+        else:
+            if self._keep is not None:
+                df = df[self._keep]
+            for col in df.columns:
+                column = df[col]
+                if self._cleaned and col in ID_COLUMNS:
+                    column = id_labels(column)
+                self._frame[col] = column.array
+            reference = self._read_order()
+            self._frame = self._frame[sorted(self._frame.columns, key=reference.index)]
+        self._loaded.update(missing)
+
+    def _read_order(self) -> List[str]:
+        """Orden de las columnas de `get_data` (con el plan compacto, lat_/lon_ van al final)."""
+        columnas = [c for c in BiciMad.COLUMNS if c != 'unlock_date']
+        if self._compact:
+            columnas = [c for c in columnas if not c.startswith('geolocation_')]
+            columnas += ['lat_unlock', 'lon_unlock', 'lat_lock', 'lon_lock']
+        return columnas
+
+    def _read_columns(self, columns: List[str]) -> pd.DataFrame:
+        """Lee las columnas indicadas del almacén columnar, si tiene el mes, o del ZIP."""
+        if self._from_store is None:
+            self._from_store = False
+            if self._store is not None:
+                with instrument.stage('store_load') as etapa:
+                    self._from_store = self._store.source(self._month, self._year) == \
+                        self._source.identity(self._month, self._year)
+        if self._from_store:
+            fisicas = []
+            for c in columns:
+                if self._compact and c.startswith('geolocation_'):
+                    side = c[len('geolocation_'):]
+                    fisicas += [f'lat_{side}', f'lon_{side}']
+                else:
+                    fisicas.append(c)
+            with instrument.stage('store_load') as etapa:
+                df = self._store.load(self._month, self._year, columns=fisicas)
+                etapa.rows = len(df)
+            if self._frame is None:
+                # Las horas de desbloqueo guardadas tras `clean` se cargan con el índice.
+                extras = self._store.extras(self._month, self._year)
+                self._hours = extras.get('hours')
+                self._times = extras.get('times')
+            return df
+        return BiciMad.read_csv(self._open_csv(), columns=columns, compact=self._compact,
+                                parse_workers=self._parse_workers)
+
+    def _open_csv(self) -> BinaryIO:
+        """Abre el CSV del mes. Los ZIP del portal de la EMT se descargan solo la primera vez."""
+        if not isinstance(self._source, RemoteSource):
+            # Las fuentes locales se vuelven a abrir sin coste en cada lectura de columnas.
+            return self._source.open(self._month, self._year)
+        if self._zip is None:
+            enlaces = UrlEMT(self._cache)
+            with instrument.stage('get_csv') as etapa:
+                zip_file = enlaces.get_zip(self._month, self._year)
+                etapa.bytes = enlaces.bytes_downloaded
+            self._zip = zip_file.getvalue() if isinstance(zip_file, io.BytesIO) else zip_file
+        return open_csv_member(io.BytesIO(self._zip) if isinstance(self._zip, bytes) else self._zip)
+
+    @_data.setter
+    def _data(self, data: pd.DataFrame):
+        # Sustituir los datos invalida los agregados calculados sobre los anteriores
+        self._frame = data
+        self._hours = None
+        self._times = None
+        self.invalidate()
+
+    @property
+    def metrics(self) -> instrument.PipelineMetrics:
+        """
+        Resumen de las etapas medidas para este objeto: descarga del índice y del ZIP, lectura,
+        limpieza y consultas. Solo se rellena con la instrumentación activa (ver `bicimad.instrument`).
+
+        Devuelve:
+        - PipelineMetrics: Tiempo, bytes, filas y pico de memoria de cada etapa.
+        """
+        return self._metrics
+
+    def invalidate(self):
+        """
+        Descarta los agregados memorizados por las consultas. Se llama automáticamente al ejecutar
+        `clean` o al sustituir los datos; solo hace falta llamarlo tras modificar `data` en el sitio.
+        """
+        self._memo = {}
+
+    def _memoized(self, key: str, compute):
+        """Devuelve el agregado `key`, calculándolo con `compute` solo la primera vez."""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def save(self, store: Optional[ColumnarStore] = None):
+        """
+        Guarda los datos actuales (normalmente tras `clean`) en un almacén columnar, asociados a la
+        identidad del ZIP de origen para que `get_data` pueda recargarlos rápidamente.
+
+        Parámetros:
+        - store (ColumnarStore, opcional): Almacén de destino. Por defecto, el indicado al construir el objeto.
+        """
+        store = store if store is not None else self._store
+        if store is None:
+            raise ValueError("No se ha indicado ningún almacén columnar.")
+        extras = {name: array for name, array in (('hours', self._hours), ('times', self._times))
+                  if array is not None}
+        store.save(self.data, self._month, self._year, self._source.identity(self._month, self._year), extras)
+
     def __str__(self):
         """
         Representación informal del objeto, muestra el contenido del DataFrame como string.
@@ -74,21 +513,89 @@ class BiciMad:
         Devuelve:
         - str: Representación en texto del DataFrame.
         """
-        return str(self._data)
+        return str(self.data)
 
-    def clean(self):
+    def clean(self, keep_time: bool = False):
         """
         Limpia y transforma el DataFrame:
         - Elimina filas completamente vacías.
         - Convierte ciertas columnas a tipo string (fleet, idBike, station_unlock, station_lock).
-        - Establece el índice como fecha (sin hora), con el nombre 'fecha'.
-        """
-        self._data.dropna(how='all', inplace=True)
-        for col in ['fleet', 'idBike', 'station_lock', 'station_unlock']:
-            self._data[col] = self._data[col].astype(str)
-        self._data.index = self._data.index.normalize()
-        self._data.index.name = 'fecha'
+          Si alguna ya es categórica (plan de tipos compacto), se convierte a categórica de textos
+          con las mismas etiquetas, en lugar de a una columna de objetos str.
+        - Establece el índice como fecha (sin hora), con el nombre 'fecha'. La hora de desbloqueo
+          se conserva aparte para poder construir el cubo de uso (ver `cube`); `save` la guarda
+          junto a los datos. Volver a llamar a `clean` no la recalcula a partir del índice ya
+          normalizado.
+
+        Parámetros:
+        - keep_time (bool): Si True, se conserva además la fecha y hora completas de desbloqueo de
+          cada viaje, necesarias para las consultas por ventanas de tiempo (ver `timeline`).
+
+        Lanza:
+        - ValueError: Si se pide keep_time después de una limpieza que ya descartó la hora.
 
+        En modo perezoso solo se convierten las columnas ya cargadas, y las filas vacías se
+        localizan recorriendo el texto del CSV sin leer el resto de columnas. Las columnas que se
+        carguen después se limpian al añadirlas.
+        """
+        with instrument.stage('clean', self._metrics) as etapa:
+            if self._lazy:
+                self._drop_empty_rows()
+            else:
+                self._data.dropna(how='all', inplace=True)
+            for col in ID_COLUMNS:
+                if col in self._data.columns:
+                    self._data[col] = id_labels(self._data[col])
+            horas, instantes = self._hours, self._times
+            if self._data.index.name != 'fecha':
+                # Primera limpieza: el índice aún conserva la hora.
+                horas = self._data.index.hour.to_numpy(dtype='int8', na_value=0)
+                instantes = self._data.index.to_numpy(dtype='datetime64[ns]') if keep_time else None
+                self._data.index = self._data.index.normalize()
+                self._data.index.name = 'fecha'
+            elif keep_time and instantes is None:
+                raise ValueError("La hora de desbloqueo ya se descartó en una limpieza anterior sin keep_time=True.")
+            self.invalidate()
+            self._hours = horas
+            self._times = instantes
+            etapa.rows = len(self._data)
+        if self._lazy:
+            self._cleaned = True
+
+    def _drop_empty_rows(self):
+        """Equivalente perezoso de `dropna(how='all')` sobre todas las columnas del mes."""
+        data = self._data
+        if self._from_store:
+            # Los datos del almacén ya se guardaron limpios.
+            keep = np.ones(len(data), dtype=bool)
+        else:
+            columnas = [c for c in BiciMad.COLUMNS if c != 'unlock_date']
+            keep = ~_empty_rows(self._open_csv(), columnas)
+        if self._keep is not None:
+            # Filas ya eliminadas en una limpieza anterior: se conservan las posiciones actuales.
+            keep = keep[self._keep]
+            self._keep[self._keep] = keep
+        else:
+            self._keep = keep
+        self._frame = data[keep]
+
+    def _minutes(self) -> pd.Series:
+        """Duración de los viajes en float64, aunque se haya leído como float32."""
+        return self._memoized('minutes', lambda: self._data['trip_minutes'].astype('float64'))
+
+    def _station_counts(self) -> pd.Series:
+        """Usos por dirección de desbloqueo, de mayor a menor."""
+        return self._memoized('station_counts', lambda: _value_counts(self._data['address_unlock']))
+
+    def _day_minutes(self) -> pd.Series:
+        """Minutos totales de uso por día."""
+        return self._memoized('day_minutes', lambda: self._minutes().groupby(self._data.index).sum())
+
+    def _day_counts(self) -> pd.Series:
+        """Número de usos por día."""
+        return self._memoized('day_counts', lambda: self._data.groupby(self._data.index).size())
+
+    @_query
     def resume(self) -> pd.Series:
         """
         Devuelve un resumen básico de los datos del mes:
@@ -102,9 +609,9 @@ class BiciMad:
         - pd.Series: Resumen estadístico con la información indicada.
         """
         total_uses = len(self._data)
-        total_time = self._data['trip_minutes'].sum() / 60
+        total_time = self._memoized('total_minutes', lambda: self._minutes().sum()) / 60
 
-        popular_counts = self._data['address_unlock'].value_counts()
+        popular_counts = self._station_counts()
         max_count = popular_counts.iloc[0]
         most_popular = set(popular_counts[popular_counts == max_count].index)
 
@@ -117,6 +624,7 @@ class BiciMad:
             'uses_from_most_popular': max_count
         })
 
+    @_query
     def most_popular_stations(self) -> set:
         """
         Devuelve el conjunto de direcciones de las 3 estaciones de desbloqueo
@@ -125,9 +633,10 @@ class BiciMad:
         Returns:
             set: Direcciones de las 3 estaciones más utilizadas.
         """
-        counts = self._data['address_unlock'].value_counts()
+        counts = self._station_counts()
         return set(counts.head(3).index)
 
+    @_query
     def day_time(self, plot: bool = False) -> pd.Series:
         """
         Calcula las horas totales de uso de bicicletas por día.
@@ -138,9 +647,11 @@ class BiciMad:
         Returns:
             pd.Series: Serie con índice = fechas y valores = horas de uso.
         """
-        horas_por_dia = self._data.groupby(self._data.index)['trip_minutes'].sum() / 60
+        horas_por_dia = self._day_minutes() / 60
 
         if plot:
+            import matplotlib.pyplot as plt
+
             horas_por_dia.plot(kind='bar', figsize=(12, 6))
             plt.title("Horas totales de uso de BiciMAD por día")
             plt.xlabel("Día")
@@ -149,6 +660,7 @@ class BiciMad:
 
         return horas_por_dia
 
+    @_query
     def weekday_time(self) -> pd.Series:
         """
         Calcula las horas totales de uso de bicicletas por día de la semana.
@@ -159,15 +671,19 @@ class BiciMad:
         """
         # Mapear número de día (0=lunes, 6=domingo) a letras
         dias = ["L", "M", "X", "J", "V", "S", "D"]
-        weekday = self._data.index.to_series().map(lambda d: dias[d.weekday()])
 
-        horas_por_dia = self._data.groupby(weekday)['trip_minutes'].sum() / 60
+        def minutos_por_dia_semana():
+            weekday = pd.Index(np.array(dias, dtype=object)[self._data.index.weekday], name=self._data.index.name)
+            return self._minutes().groupby(weekday).sum()
+
+        horas_por_dia = self._memoized('weekday_minutes', minutos_por_dia_semana) / 60
 
         # Reordenar para que aparezcan en orden de lunes a domingo
         horas_por_dia = horas_por_dia.reindex(dias, fill_value=0)
 
         return horas_por_dia
 
+    @_query
     def total_usage_day(self) -> pd.Series:
         """
         Calcula el número total de usos de bicicletas por día del mes.
@@ -175,11 +691,12 @@ class BiciMad:
         Returns:
             pd.Series: Serie con índice = fechas y valores = número de usos.
         """
-        usos_por_dia = self._data.groupby(self._data.index).size()
+        usos_por_dia = self._day_counts().copy()
         usos_por_dia.index.name = "fecha"
         usos_por_dia.name = "total_usos"
         return usos_por_dia
 
+    @_query
     def total_usage_by_station_day(self) -> pd.DataFrame:
         """
         Calcula el número total de usos por fecha y estación de desbloqueo.
@@ -188,14 +705,21 @@ class BiciMad:
             pd.DataFrame: DataFrame con MultiIndex (fecha, estación de desbloqueo)
                           y valores = número de usos.
         """
-        usos = (
-            self._data
-            .groupby([pd.Grouper(freq="1D"), "station_unlock"])
-            .size()
-            .rename("total_usos")
-        )
-        return usos
+        def usos_por_estacion_dia():
+            usos = (
+                self._data
+                .groupby([pd.Grouper(freq="1D"), "station_unlock"], observed=True)
+                .size()
+                .rename("total_usos")
+            )
+            estaciones = usos.index.levels[1]
+            if isinstance(estaciones, pd.CategoricalIndex):
+                usos.index = usos.index.set_levels(estaciones.astype(estaciones.categories.dtype), level=1)
+            return usos
 
+        return self._memoized('station_day', usos_por_estacion_dia).copy()
+
+    @_query
     def usage_from_most_popular_station(self) -> pd.Series:
         """
         Devuelve el número de usos de las 3 estaciones de desbloqueo
@@ -204,5 +728,173 @@ class BiciMad:
         Returns:
             pd.Series: Serie con estaciones como índice y número de usos como valores.
         """
-        counts = self._data['address_unlock'].value_counts()
-        return counts.head(3)
+        return self._station_counts().head(3).copy()
+
+    @_query
+    def cube(self) -> UsageCube:
+        """
+        Devuelve el cubo de uso por día × hora × estación de desbloqueo, construyéndolo en una
+        sola pasada la primera vez. Si los datos se han limpiado, la hora de cada viaje es la que
+        tenía antes de `clean`; si el índice se ha normalizado por otros medios, todas las horas son 0.
+
+        Returns:
+            UsageCube: Cubo con los conteos y minutos de uso.
+        """
+        return self._memoized('cube', lambda: UsageCube.from_frame(self._data, hours=self._hours))
+
+    @_query
+    def hourly_usage(self) -> pd.Series:
+        """
+        Calcula el número total de usos por hora del día.
+
+        Returns:
+            pd.Series: Serie con índice = hora (0 a 23) y valores = número de usos.
+        """
+        return self.cube().hourly_usage()
+
+    @_query
+    def peak_hour(self) -> int:
+        """
+        Devuelve la hora del día con más usos en el mes.
+
+        Returns:
+            int: Hora punta (0 a 23).
+        """
+        return self.cube().peak_hour()
+
+    @_query
+    def station_grid(self, side: str = 'unlock', cell_size: float = 500.0) -> StationGrid:
+        """
+        Devuelve un índice espacial en rejilla sobre las estaciones de desbloqueo (o bloqueo),
+        construido la primera vez a partir de las geolocalizaciones de los viajes.
+
+        Args:
+            side (str): "unlock" o "lock".
+            cell_size (float): Lado de las celdas en metros.
+
+        Returns:
+            StationGrid: Índice con consultas por caja, radio, estación más cercana y uso por celda.
+        """
+        self._require([f'geolocation_{side}', f'station_{side}'])
+        return self._memoized(f'grid_{side}_{cell_size}',
+                              lambda: StationGrid.from_trips(self._data, side, cell_size))
+
+    @_query
+    def od_matrix(self, day=None, hour: Optional[int] = None) -> ODMatrix:
+        """
+        Devuelve la matriz origen–destino de viajes entre estaciones, de todo el mes o solo de un
+        día o una hora de desbloqueo. La matriz del mes completo se calcula una sola vez.
+
+        Args:
+            day (optional): Día (fecha o texto 'AAAA-MM-DD').
+            hour (int, optional): Hora de desbloqueo (0 a 23).
+
+        Returns:
+            ODMatrix: Matriz dispersa con viajes y minutos por pareja de estaciones.
+        """
+        if day is None and hour is None:
+            return self._memoized('od', lambda: ODMatrix.from_frame(self._data))
+        return ODMatrix.from_frame(self._data, day=day, hour=hour, hours=self._hours)
+
+    @_query
+    def timeline(self) -> TripTimeline:
+        """
+        Devuelve el índice temporal ordenado de los viajes, construido la primera vez, sobre el que
+        se responden las consultas por ventanas de tiempo en O(log n) (ver `TripTimeline`).
+
+        Returns:
+            TripTimeline: Índice con las horas de desbloqueo ordenadas y los minutos acumulados.
+
+        Raises:
+            ValueError: Si los datos se limpiaron sin conservar la hora (`clean(keep_time=True)`).
+        """
+        return self._memoized('timeline', lambda: TripTimeline.from_frame(self._data, times=self._unlock_times()))
+
+    def _unlock_times(self) -> Optional[np.ndarray]:
+        """Fecha y hora de desbloqueo de cada fila, o None si el índice aún las conserva."""
+        if self._hours is not None and self._times is None:
+            raise ValueError("Esta consulta necesita la hora de desbloqueo: use clean(keep_time=True).")
+        return self._times
+
+    @_query
+    def window_usage(self, start=None, end=None, station=None) -> pd.Series:
+        """
+        Calcula los viajes y las horas de uso desbloqueados entre dos instantes.
+
+        Args:
+            start (optional): Inicio del intervalo (Timestamp o texto 'AAAA-MM-DD HH:MM').
+            end (optional): Fin del intervalo, excluido.
+            station (optional): Estación de desbloqueo; por defecto, todas.
+
+        Returns:
+            pd.Series: Serie con 'trips' y 'hours'.
+        """
+        return self.timeline().window(start, end, station)
+
+    @_query
+    def rolling_usage(self, window='60min', freq='15min', station=None) -> pd.DataFrame:
+        """
+        Calcula la demanda en una ventana deslizante de `window` evaluada cada `freq`.
+
+        Returns:
+            pd.DataFrame: DataFrame con índice = instantes y columnas 'trips' y 'minutes'.
+        """
+        return self.timeline().rolling(window, freq, station=station)
+
+    @_query
+    def peak_windows(self, window='60min', by: Optional[str] = 'day') -> pd.DataFrame:
+        """
+        Devuelve la ventana de `window` con más viajes por día ('day'), por estación ('station')
+        o en todo el mes (None).
+
+        Returns:
+            pd.DataFrame: DataFrame con columnas 'start', 'end' y 'trips'.
+        """
+        return self.timeline().peak_windows(window, by)
+
+    @_query
+    def trip_chains(self) -> TripChains:
+        """
+        Devuelve las cadenas de viajes de cada bicicleta (tiempos de parada, reequilibrados),
+        construidas la primera vez con una sola ordenación por bicicleta y hora (ver `TripChains`).
+
+        Returns:
+            TripChains: Cadenas de viajes del mes.
+
+        Raises:
+            ValueError: Si los datos se limpiaron sin conservar la hora (`clean(keep_time=True)`).
+        """
+        return self._memoized('chains', lambda: TripChains.from_frame(self._data, times=self._unlock_times()))
+
+    @_query
+    def rebalancing(self, by: str = 'station') -> pd.DataFrame:
+        """
+        Resume los movimientos de reequilibrado del operador y la utilización de la flota por
+        estación ('station'), por día ('day') o por bicicleta ('bike').
+
+        Returns:
+            pd.DataFrame: Resumen correspondiente de `TripChains` (by_station, by_day o by_bike).
+        """
+        resumenes = {'station': 'by_station', 'day': 'by_day', 'bike': 'by_bike'}
+        if by not in resumenes:
+            raise ValueError(f"by debe ser uno de {sorted(resumenes)}")
+        return getattr(self.trip_chains(), resumenes[by])()
+
+    @_query
+    def occupancy(self, freq: str = '15min') -> StationOccupancy:
+        """
+        Devuelve el flujo neto y el inventario relativo de bicicletas de cada estación en
+        intervalos de `freq`, calculados la primera vez a partir de los desbloqueos y bloqueos
+        (ver `StationOccupancy`).
+
+        Args:
+            freq (str): Resolución de los intervalos (por ejemplo, '15min' o '1h').
+
+        Returns:
+            StationOccupancy: Inventario de las estaciones, con `net_flow`, `inventory` y `flags`.
+
+        Raises:
+            ValueError: Si los datos se limpiaron sin conservar la hora (`clean(keep_time=True)`).
+        """
+        return self._memoized(f'occupancy_{freq}',
+                              lambda: StationOccupancy.from_frame(self._data, freq, times=self._unlock_times()))
@@ -0,0 +1,197 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .UrlEMT import UrlEMT
+from .bicimad import BiciMad
+from .cache import ZipCache
+
+Month = Tuple[int, int]
+"""Un mes como tupla (mes, año), en el mismo orden que los argumentos de BiciMad."""
+
+
+def month_span(start: Month, end: Month) -> List[Month]:
+    """
+    Devuelve todos los meses entre `start` y `end`, ambos incluidos.
+
+    Args:
+        start (Tuple[int, int]): Primer mes como (mes, año).
+        end (Tuple[int, int]): Último mes como (mes, año).
+
+    Returns:
+        List[Tuple[int, int]]: Meses en orden cronológico como (mes, año).
+
+    Raises:
+        ValueError: Si `end` es anterior a `start`.
+    """
+    first = start[1] * 12 + start[0] - 1
+    last = end[1] * 12 + end[0] - 1
+    if last < first:
+        raise ValueError("El mes final es anterior al inicial")
+    return [(n % 12 + 1, n // 12) for n in range(first, last + 1)]
+
+
+def _load_month(path: str, compact: bool, clean: bool) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    """
+    Lee (y opcionalmente limpia) un ZIP mensual ya descargado y devuelve sus datos con la hora de
+    desbloqueo de cada fila que conserva `clean` (None sin limpiar). Se ejecuta en un proceso hijo.
+    """
+    df = BiciMad.read_csv(UrlEMT.csv_from_zip(path), compact=compact)
+    if not clean:
+        return df, None
+    bici = BiciMad.from_data(df, 0, 0)
+    bici.clean()
+    return bici.data, bici._hours
+
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena meses unificando las categorías de las columnas categóricas. Los DataFrames de
+    entrada ni la lista se modifican: sus columnas categóricas se recodifican sobre las categorías
+    comunes en copias superficiales. Para liberar los meses leídos, quien llama debe soltar su
+    referencia a la lista en cuanto obtiene el resultado.
+    """
+    if not frames:
+        return pd.DataFrame()
+    dtypes = {
+        col: pd.CategoricalDtype(sorted(set().union(*(f[col].cat.categories for f in frames))))
+        for col in frames[0].columns
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames)
+    }
+    pieces = [frame.astype(dtypes) if dtypes else frame for frame in frames]
+    return pd.concat(pieces)
+
+
+def _rows(data: pd.DataFrame, start: int, stop: int) -> pd.DataFrame:
+    """
+    Filas [start, stop) de los datos combinados, sin copiar sus columnas. Las columnas
+    categóricas se quedan solo con las categorías que aparecen en esas filas, como si el mes
+    se hubiera leído por separado.
+    """
+    rows = data.iloc[start:stop]
+    categorical = {col: rows[col].cat.remove_unused_categories()
+                   for col in rows.columns if isinstance(rows[col].dtype, pd.CategoricalDtype)}
+    return rows.assign(**categorical) if categorical else rows
+
+
+class BiciMadRange:
+    """
+    Clase que representa los datos de uso del sistema BiciMAD durante un intervalo de meses.
+
+    Los ZIP de todos los meses se descargan a la vez en un pool de hilos y se leen en paralelo
+    en un pool de procesos. Ofrece las mismas consultas que BiciMad sobre el periodo completo y,
+    mediante `per_month`, los resultados de cada mes por separado.
+    """
+
+    def __init__(self, start: Month, end: Month, cache: Optional[ZipCache] = None,
+                 download_workers: int = 4, parse_workers: Optional[int] = None,
+                 compact: bool = False, clean: bool = True):
+        """
+        Constructor de clase.
+
+        Parámetros:
+        - start (Tuple[int, int]): Primer mes como (mes, año).
+        - end (Tuple[int, int]): Último mes como (mes, año), incluido.
+        - cache (ZipCache, opcional): Caché en disco de los ZIP. Sin ella, los ZIP se descargan a un
+          directorio temporal que se borra al terminar la carga.
+        - download_workers (int): Número de descargas simultáneas.
+        - parse_workers (int, opcional): Número de procesos de lectura. Por defecto, uno por núcleo;
+          con 0 los meses se leen en el propio proceso.
+        - compact (bool): Si True, se usa el plan de tipos compacto de BiciMad.
+        - clean (bool): Si True, cada mes se limpia con `BiciMad.clean` al cargarlo.
+        """
+        self._months = month_span(start, end)
+        enlaces = UrlEMT(cache)
+        urls = [enlaces.get_url(month, year) for month, year in self._months]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            descargas = cache if cache is not None else ZipCache(Path(tmp), max_bytes=float("inf"))
+            with ThreadPoolExecutor(max_workers=download_workers) as pool:
+                paths = [str(p) for p in pool.map(descargas.fetch, urls)]
+
+            workers = os.cpu_count() if parse_workers is None else parse_workers
+            args = ([compact] * len(paths), [clean] * len(paths))
+            if workers:
+                with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                    loaded = list(pool.map(_load_month, paths, *args))
+            else:
+                loaded = list(map(_load_month, paths, *args))
+        frames = [df for df, _ in loaded]
+        hours = np.concatenate([h for _, h in loaded]) if clean else None
+        del loaded
+
+        # Cada mes es una vista de sus filas en los datos combinados, de modo que los meses
+        # leídos se liberan al concatenarlos y el periodo ocupa la memoria de una sola copia.
+        bounds = np.cumsum([0] + [len(df) for df in frames])
+        combined = _concat(frames)
+        del frames
+        self._per_month: Dict[Month, BiciMad] = {
+            (month, year): BiciMad.from_data(_rows(combined, lo, hi), month, year,
+                                             hours=None if hours is None else hours[lo:hi])
+            for (month, year), lo, hi in zip(self._months, bounds[:-1], bounds[1:])
+        }
+        self._combined = BiciMad.from_data(combined, start[0], start[1], hours=hours)
+
+    @property
+    def months(self) -> List[Month]:
+        """Meses del intervalo como tuplas (mes, año)."""
+        return list(self._months)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """DataFrame con los datos de todos los meses del intervalo."""
+        return self._combined.data
+
+    def __getitem__(self, month: Month) -> BiciMad:
+        """Devuelve el objeto BiciMad de un mes (mes, año) del intervalo."""
+        return self._per_month[month]
+
+    def per_month(self, query: str, *args, **kwargs) -> Dict[Month, object]:
+        """
+        Ejecuta una consulta de BiciMad sobre cada mes por separado.
+
+        Parámetros:
+        - query (str): Nombre del método de BiciMad (por ejemplo, 'resume' o 'day_time').
+
+        Devuelve:
+        - Dict[Tuple[int, int], object]: Resultado de la consulta para cada mes (mes, año).
+        """
+        return {month: getattr(bici, query)(*args, **kwargs) for month, bici in self._per_month.items()}
+
+    def resume(self) -> pd.Series:
+        """
+        Devuelve el resumen del periodo completo con los mismos campos que BiciMad.resume, salvo
+        'year' y 'month', que se sustituyen por 'start' y 'end' (tuplas (mes, año)).
+        """
+        resumen = self._combined.resume().drop(['year', 'month'])
+        periodo = pd.Series({'start': self._months[0], 'end': self._months[-1]})
+        return pd.concat([periodo, resumen])
+
+    def most_popular_stations(self) -> set:
+        """Equivalente a BiciMad.most_popular_stations sobre el periodo completo."""
+        return self._combined.most_popular_stations()
+
+    def usage_from_most_popular_station(self) -> pd.Series:
+        """Equivalente a BiciMad.usage_from_most_popular_station sobre el periodo completo."""
+        return self._combined.usage_from_most_popular_station()
+
+    def day_time(self, plot: bool = False) -> pd.Series:
+        """Equivalente a BiciMad.day_time sobre el periodo completo."""
+        return self._combined.day_time(plot)
+
+    def weekday_time(self) -> pd.Series:
+        """Equivalente a BiciMad.weekday_time sobre el periodo completo."""
+        return self._combined.weekday_time()
+
+    def total_usage_day(self) -> pd.Series:
+        """Equivalente a BiciMad.total_usage_day sobre el periodo completo."""
+        return self._combined.total_usage_day()
+
+    def total_usage_by_station_day(self) -> pd.Series:
+        """Equivalente a BiciMad.total_usage_by_station_day sobre el periodo completo."""
+        return self._combined.total_usage_by_station_day()
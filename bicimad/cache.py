@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import requests
+
+from .download import CHUNK_SIZE, ProgressCallback
+from .transport import get_transport
+
+
+class ZipCache:
+    """Caché local en disco para los ficheros ZIP mensuales de viajes de la EMT.
+
+    Los ficheros se guardan direccionados por contenido (el nombre de cada fichero es el
+    SHA-256 de sus bytes) y un índice JSON relaciona cada URL con su contenido, sus
+    cabeceras de validación (ETag / Last-Modified) y su último acceso.
+
+    Esta clase permite:
+    - Revalidar un fichero ya descargado con una petición condicional (304 Not Modified).
+    - Limitar el tamaño total de la caché expulsando los ficheros menos usados (LRU).
+    - Trabajar en modo offline, sin tocar la red si el fichero ya está en caché.
+
+    Una misma instancia puede usarse desde varios hilos a la vez."""
+
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        """
+        Inicializa la caché en el directorio indicado, creándolo si no existe.
+
+        Args:
+            directory (str | Path, optional): Directorio de la caché. Por defecto se usa la variable
+                de entorno BICIMAD_CACHE_DIR o, en su defecto, ~/.cache/bicimad.
+            max_bytes (int): Tamaño máximo que pueden ocupar los ficheros de la caché.
+            offline (bool): Si True, nunca se accede a la red cuando el fichero ya está en caché.
+        """
+        if directory is None:
+            directory = os.environ.get("BICIMAD_CACHE_DIR", Path.home() / ".cache" / "bicimad")
+        self._dir = Path(directory)
+        self._blobs = self._dir / "blobs"
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._index_path = self._dir / "index.json"
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.last_download_bytes = 0
+        self._lock = threading.RLock()
+        self._index = self._load_index()
+
+    @property
+    def directory(self) -> Path:
+        """Directorio raíz de la caché."""
+        return self._dir
+
+    @property
+    def size(self) -> int:
+        """Número de bytes que ocupan actualmente los ficheros de la caché."""
+        digests = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+        return sum(digests.values())
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        with self._lock:
+            fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".json")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp, self._index_path)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._blobs / digest[:2] / f"{digest}.zip"
+
+    def _touch(self, url: str) -> Path:
+        # El último acceso solo se actualiza en memoria: se guarda con el índice en la próxima
+        # escritura (descarga, expulsión o vaciado) para no reescribirlo en cada acierto.
+        with self._lock:
+            entry = self._index[url]
+            entry["last_access"] = time.time()
+            return self._blob_path(entry["sha256"])
+
+    def get(self, url: str) -> Optional[Path]:
+        """
+        Devuelve la ruta del fichero en caché para la URL indicada sin acceder a la red.
+
+        Args:
+            url (str): URL del fichero ZIP.
+
+        Returns:
+            Path | None: Ruta del fichero o None si la URL no está en caché.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None or not self._blob_path(entry["sha256"]).exists():
+                return None
+            return self._touch(url)
+
+    def identity(self, url: str) -> str:
+        """
+        Devuelve una identidad del fichero de la URL indicada sin descargar su contenido: su ETag
+        o, si el servidor no lo da, su fecha de modificación y su tamaño (si lo anuncia). Se obtiene
+        con una petición HEAD (ver remote_identity) o, en modo offline, de las cabeceras guardadas al
+        descargarlo, de modo que ambas coinciden mientras el fichero no cambie.
+
+        Args:
+            url (str): URL del fichero ZIP.
+
+        Returns:
+            str: Identidad del fichero; la propia URL si el servidor no da cabeceras de validación.
+
+        Raises:
+            ConnectionError: Si falla la petición o si se está en modo offline y la URL no está en caché.
+        """
+        if not self.offline:
+            return remote_identity(url)
+        entry = self._index.get(url)
+        if entry is None:
+            raise ConnectionError(f"Modo offline: {url} no está en la caché")
+        return _identity(url, entry.get("etag"), entry.get("last_modified"), entry.get("length", entry["size"]))
+
+    def fetch(self, url: str, progress: Optional[ProgressCallback] = None) -> Path:
+        """
+        Devuelve la ruta local del fichero ZIP de la URL indicada, descargándolo solo si hace falta.
+        Si el fichero ya está en caché se revalida con ETag/Last-Modified (salvo en modo offline).
+        La descarga se escribe a disco por bloques; los bytes descargados quedan en `last_download_bytes`.
+
+        Args:
+            url (str): URL del fichero ZIP.
+            progress (ProgressCallback, optional): Función que recibe (bytes descargados, total esperado).
+
+        Returns:
+            Path: Ruta del fichero en la caché.
+
+        Raises:
+            ConnectionError: Si falla la descarga o si se está en modo offline y la URL no está en caché.
+        """
+        self.last_download_bytes = 0
+        cached = self.get(url)
+        if cached is not None and self.offline:
+            return cached
+        if cached is None and self.offline:
+            raise ConnectionError(f"Modo offline: {url} no está en la caché")
+
+        headers = {}
+        if cached is not None:
+            entry = self._index[url]
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response, digest, size = self._download(url, headers, progress)
+        except requests.RequestException as e:
+            raise ConnectionError(f"Error al descargar el ZIP: {e}")
+
+        if response.status_code == 304:
+            return cached
+        self.last_download_bytes = size
+        with self._lock:
+            self._index[url] = {
+                "sha256": digest,
+                "size": size,
+                "length": size if response.headers.get("Content-Length") is not None else None,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "last_access": time.time(),
+            }
+            self.evict(keep=url)
+        return self._blob_path(digest)
+
+    def _download(self, url: str, headers: dict, progress: Optional[ProgressCallback]):
+        """Descarga la URL a disco (reanudando si se corta) y la guarda según su SHA-256."""
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "w+b") as f:
+                response = get_transport().download(url, f, headers=headers, progress=progress)
+                if response.status_code == 304:
+                    return response, None, 0
+                size = f.tell()
+                f.seek(0)
+                sha = hashlib.sha256()
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            path = self._blob_path(digest)
+            path.parent.mkdir(exist_ok=True)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return response, digest, size
+
+    def evict(self, keep: Optional[str] = None):
+        """
+        Expulsa las entradas usadas hace más tiempo hasta que la caché cabe en max_bytes.
+
+        Args:
+            keep (str, optional): URL que no debe expulsarse (la recién descargada).
+        """
+        with self._lock:
+            by_age = sorted(self._index, key=lambda u: self._index[u]["last_access"])
+            for url in by_age:
+                if self.size <= self.max_bytes:
+                    break
+                if url != keep:
+                    self._remove(url)
+            self._save_index()
+
+    def _remove(self, url: str):
+        digest = self._index.pop(url)["sha256"]
+        if not any(entry["sha256"] == digest for entry in self._index.values()):
+            path = self._blob_path(digest)
+            if path.exists():
+                path.unlink()
+
+    def clear(self):
+        """Elimina todos los ficheros de la caché."""
+        with self._lock:
+            for url in list(self._index):
+                self._remove(url)
+            self._save_index()
+
+
+def _identity(url: str, etag: Optional[str], modified: Optional[str], length) -> str:
+    """Compone la identidad de un fichero a partir de sus cabeceras de validación."""
+    if etag:
+        return f"etag:{etag}"
+    if modified and length is not None:
+        return f"modified:{modified};size:{length}"
+    if modified:
+        return f"modified:{modified}"
+    return url
+
+
+def remote_identity(url: str) -> str:
+    """
+    Devuelve una identidad del fichero de la URL indicada sin descargar su contenido, consultándola
+    con una petición HEAD: su ETag o, si el servidor no lo da, su fecha de modificación y su tamaño
+    (si lo anuncia en Content-Length).
+
+    Args:
+        url (str): URL del fichero.
+
+    Returns:
+        str: Identidad del fichero; la propia URL si el servidor no da cabeceras de validación.
+
+    Raises:
+        ConnectionError: Si falla la petición.
+    """
+    try:
+        response = get_transport().head(url)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise ConnectionError(f"Error al consultar el ZIP: {e}")
+    headers = response.headers
+    return _identity(url, headers.get("ETag"), headers.get("Last-Modified"), headers.get("Content-Length"))
@@ -0,0 +1,160 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+
+class MonthCatalog:
+    """Catálogo de los ficheros mensuales de viajes publicados por la EMT.
+
+    Guarda, para cada mes disponible, la URL de su fichero ZIP en un diccionario con clave
+    (año, mes), de modo que la búsqueda de una URL es O(1). El catálogo se obtiene una sola
+    vez con la función `fetcher`, se refresca cuando ha caducado (TTL) o bajo demanda y
+    puede persistirse en disco para que un proceso nuevo no tenga que pedir el índice. En modo
+    offline nunca se refresca: se usa el catálogo ya obtenido aunque haya caducado."""
+
+    PATTERN = re.compile(r'trips_(\d{2})_(\d{2})_[A-Za-z]+-csv\.zip')
+    DEFAULT_TTL = 24 * 3600
+
+    def __init__(self, fetcher: Callable[[], Iterable[str]], ttl: float = DEFAULT_TTL,
+                 path: Optional[Union[str, Path]] = None, offline: bool = False):
+        """
+        Inicializa el catálogo sin acceder a la red. Si existe un fichero persistido y no
+        ha caducado, se carga desde él.
+
+        Args:
+            fetcher (Callable[[], Iterable[str]]): Función que devuelve las URLs de los ficheros ZIP.
+            ttl (float): Segundos durante los que el catálogo se considera vigente.
+            path (str | Path, optional): Fichero JSON en el que persistir el catálogo.
+            offline (bool): Si True, nunca se llama a `fetcher`; sin un catálogo persistido, las
+                consultas lanzan ConnectionError.
+        """
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self._path = Path(path) if path is not None else None
+        self.offline = offline
+        self._months: Dict[Tuple[int, int], str] = {}
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def parse(cls, urls: Iterable[str]) -> Dict[Tuple[int, int], str]:
+        """
+        Convierte un conjunto de URLs en un diccionario {(año, mes): url}.
+
+        Args:
+            urls (Iterable[str]): URLs de los ficheros ZIP de viajes.
+
+        Returns:
+            Dict[Tuple[int, int], str]: URL de cada mes, con el año en dos cifras.
+        """
+        months = {}
+        for url in urls:
+            match = cls.PATTERN.search(url)
+            if match:
+                months[(int(match.group(1)), int(match.group(2)))] = url
+        return months
+
+    def _load(self):
+        if self._path is None:
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._months = {(y, m): url for y, m, url in stored["months"]}
+        self._fetched_at = stored["fetched_at"]
+
+    def _save(self):
+        if self._path is None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        stored = {
+            "fetched_at": self._fetched_at,
+            "months": [[y, m, url] for (y, m), url in sorted(self._months.items())],
+        }
+        fd, tmp = tempfile.mkstemp(dir=self._path.parent, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(tmp, self._path)
+
+    @property
+    def expired(self) -> bool:
+        """True si el catálogo nunca se ha obtenido o ha superado su TTL."""
+        return self._fetched_at is None or time.time() - self._fetched_at > self.ttl
+
+    def as_offline(self) -> "MonthCatalog":
+        """
+        Devuelve una copia del catálogo en modo offline, con los meses ya obtenidos (o
+        persistidos) y sin acceso a la red. El catálogo original no cambia.
+        """
+        with self._lock:
+            copia = MonthCatalog(self._fetcher, self.ttl, offline=True)
+            copia._months, copia._fetched_at = dict(self._months), self._fetched_at
+        return copia
+
+    def refresh(self):
+        """
+        Vuelve a obtener el catálogo con `fetcher` y lo persiste si hay fichero asociado.
+
+        Raises:
+            ConnectionError: En modo offline.
+        """
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self.offline:
+            raise ConnectionError("Modo offline: no hay un catálogo de meses guardado"
+                                  if self._fetched_at is None else "Modo offline: el catálogo no se refresca")
+        self._months = self.parse(self._fetcher())
+        self._fetched_at = time.time()
+        self._save()
+
+    def _ensure(self):
+        if self.offline and self._fetched_at is not None:
+            return
+        if self.expired:
+            with self._lock:
+                if self.expired:
+                    self._refresh()
+
+    def url(self, month: int, year: int) -> Optional[str]:
+        """
+        Devuelve la URL del mes y año indicados, o None si no está publicado.
+
+        Args:
+            month (int): Mes (entre 1 y 12).
+            year (int): Año en dos cifras.
+
+        Returns:
+            str | None: URL completa del fichero ZIP.
+        """
+        self._ensure()
+        return self._months.get((year, month))
+
+    def months(self) -> List[Tuple[int, int]]:
+        """
+        Devuelve los meses disponibles, ordenados cronológicamente, como tuplas (año, mes).
+        """
+        self._ensure()
+        return sorted(self._months)
+
+    def urls(self) -> Set[str]:
+        """Devuelve el conjunto de URLs del catálogo."""
+        self._ensure()
+        return set(self._months.values())
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        self._ensure()
+        return key in self._months
+
+    def __len__(self) -> int:
+        self._ensure()
+        return len(self._months)
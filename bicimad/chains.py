@@ -0,0 +1,179 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .labels import station_codes
+
+
+class TripChains:
+    """Cadenas de viajes de cada bicicleta, reconstruidas con una única ordenación.
+
+    Los viajes se ordenan una vez por (bicicleta, hora de desbloqueo) y todo lo demás se calcula
+    con desplazamientos y diferencias vectorizadas entre cada viaje y el anterior de la misma
+    bicicleta, sin recorrer las bicicletas una a una:
+
+    - idle: tiempo parada desde el bloqueo anterior hasta este desbloqueo.
+    - teleport: la bicicleta se desbloquea en una estación distinta de la del bloqueo anterior,
+      es decir, la ha movido el operador (reequilibrado) entre los dos viajes.
+
+    Los viajes sin bicicleta o sin hora de desbloqueo se descartan."""
+
+    def __init__(self, trips: pd.DataFrame):
+        """
+        Inicializa las cadenas a partir de la tabla ya ordenada (ver `from_frame`).
+
+        Args:
+            trips (pd.DataFrame): Viajes ordenados por bicicleta y hora, con las columnas de `from_frame`.
+        """
+        self.trips = trips
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, times: Optional[np.ndarray] = None) -> "TripChains":
+        """
+        Construye las cadenas a partir de un DataFrame con el formato de BiciMad.
+
+        Args:
+            data (pd.DataFrame): Viajes con columnas 'idBike', 'trip_minutes', 'station_unlock',
+                'station_lock' y 'lock_date'.
+            times (np.ndarray, optional): Fecha y hora de desbloqueo de cada fila. Por defecto se
+                toma del índice, que debe conservar la hora (es decir, no estar normalizado).
+
+        Returns:
+            TripChains: Las cadenas reconstruidas.
+        """
+        unlock = np.asarray(data.index if times is None else times, dtype='datetime64[ns]')
+        bikes = data['idBike']
+        valid = ~np.isnat(unlock) & bikes.notna().to_numpy() & ~bikes.isin(['nan']).to_numpy()
+        data, unlock = data[valid], unlock[valid]
+
+        bike_codes, _ = pd.factorize(data['idBike'])
+        order = np.lexsort((unlock, bike_codes))
+        bike_codes, unlock = bike_codes[order], unlock[order]
+        lock = data['lock_date'].to_numpy(dtype='datetime64[ns]')[order]
+        st_unlock = data['station_unlock'].iloc[order]
+        st_lock = data['station_lock'].iloc[order]
+        code_unlock, code_lock, names = station_codes(st_unlock, st_lock)
+
+        same = np.zeros(len(order), dtype=bool)
+        same[1:] = bike_codes[1:] == bike_codes[:-1]
+        prev_lock = np.empty_like(lock)
+        prev_lock[0:1] = np.datetime64('NaT')
+        prev_lock[1:] = lock[:-1]
+        prev_lock[~same] = np.datetime64('NaT')
+        prev_station = np.full(len(order), -1)
+        prev_station[1:] = code_lock[:-1]
+        prev_station[~same] = -1
+
+        def etiqueta(codes):
+            labels = np.full(len(codes), np.nan, dtype=object)
+            labels[codes >= 0] = names[codes[codes >= 0]]
+            return labels
+
+        teleport = same & (prev_station >= 0) & (code_unlock >= 0) & (prev_station != code_unlock)
+        trips = pd.DataFrame({
+            'idBike': data['idBike'].iloc[order].to_numpy(),
+            'unlock': unlock,
+            'lock': lock,
+            'trip_minutes': data['trip_minutes'].to_numpy(dtype=np.float64)[order],
+            'station_unlock': etiqueta(code_unlock),
+            'station_lock': etiqueta(code_lock),
+            'prev_station_lock': etiqueta(prev_station),
+            'idle': unlock - prev_lock,
+            'teleport': teleport,
+        })
+        return cls(trips)
+
+    def __len__(self) -> int:
+        return len(self.trips)
+
+    def idle_times(self) -> pd.Series:
+        """
+        Tiempo parada antes de cada viaje, en minutos (los primeros viajes de cada bicicleta no tienen).
+
+        Returns:
+            pd.Series: Minutos entre el bloqueo anterior y el desbloqueo, con el índice de `trips`.
+        """
+        return (self.trips['idle'].dropna() / pd.Timedelta(minutes=1)).rename('idle_minutes')
+
+    def teleports(self) -> pd.DataFrame:
+        """
+        Movimientos de reequilibrado: pares de viajes consecutivos de una bicicleta en los que el
+        desbloqueo es en una estación distinta de la del bloqueo anterior.
+
+        Returns:
+            pd.DataFrame: Columnas 'idBike', 'from_station' (bloqueo anterior), 'to_station'
+            (desbloqueo siguiente), 'unlock' (llegada a la nueva estación) e 'idle'.
+        """
+        t = self.trips[self.trips['teleport']]
+        return pd.DataFrame({
+            'idBike': t['idBike'], 'from_station': t['prev_station_lock'], 'to_station': t['station_unlock'],
+            'unlock': t['unlock'], 'idle': t['idle'],
+        })
+
+    def by_bike(self) -> pd.DataFrame:
+        """
+        Resumen por bicicleta.
+
+        Returns:
+            pd.DataFrame: Índice = idBike; columnas 'trips', 'hours' (de uso), 'idle_hours'
+            (mediana de parada entre viajes) y 'teleports'.
+        """
+        t = self.trips
+        grupos = t.groupby('idBike', sort=True)
+        return pd.DataFrame({
+            'trips': grupos.size(),
+            'hours': grupos['trip_minutes'].sum() / 60,
+            'idle_hours': grupos['idle'].median() / pd.Timedelta(hours=1),
+            'teleports': grupos['teleport'].sum(),
+        })
+
+    def by_day(self) -> pd.DataFrame:
+        """
+        Resumen por día de desbloqueo.
+
+        Returns:
+            pd.DataFrame: Índice = fecha; columnas 'trips', 'bikes' (bicicletas usadas), 'hours',
+            'trips_per_bike', 'utilisation' (fracción del día en uso de las bicicletas usadas),
+            'idle_hours' (mediana de parada antes de los viajes del día) y 'teleports'.
+        """
+        t = self.trips
+        dia = pd.DatetimeIndex(t['unlock']).normalize().rename('fecha')
+        grupos = t.groupby(dia)
+        resumen = pd.DataFrame({
+            'trips': grupos.size(),
+            'bikes': grupos['idBike'].nunique(),
+            'hours': grupos['trip_minutes'].sum() / 60,
+            'idle_hours': grupos['idle'].median() / pd.Timedelta(hours=1),
+            'teleports': grupos['teleport'].sum(),
+        })
+        resumen.insert(3, 'trips_per_bike', resumen['trips'] / resumen['bikes'])
+        resumen.insert(4, 'utilisation', resumen['hours'] / (24 * resumen['bikes']))
+        return resumen
+
+    def by_station(self) -> pd.DataFrame:
+        """
+        Resumen de reequilibrado por estación.
+
+        Returns:
+            pd.DataFrame: Índice = estación; columnas 'rebalance_in' (bicicletas que aparecen en
+            ella), 'rebalance_out' (bicicletas que desaparecen de ella), 'net_rebalance' (entradas
+            menos salidas) e 'idle_hours' (mediana de parada de las bicicletas antes de
+            desbloquearse en ella, sin contar los reequilibrados).
+        """
+        t = self.trips
+        movimientos = self.teleports()
+        entradas = movimientos.groupby('to_station').size()
+        salidas = movimientos.groupby('from_station').size()
+        en_sitio = t[~t['teleport'] & t['idle'].notna() & t['station_unlock'].notna()]
+        parada = en_sitio.groupby('station_unlock')['idle'].median() / pd.Timedelta(hours=1)
+
+        estaciones = entradas.index.union(salidas.index).union(parada.index)
+        resumen = pd.DataFrame({
+            'rebalance_in': entradas.reindex(estaciones, fill_value=0),
+            'rebalance_out': salidas.reindex(estaciones, fill_value=0),
+        })
+        resumen['net_rebalance'] = resumen['rebalance_in'] - resumen['rebalance_out']
+        resumen['idle_hours'] = parada.reindex(estaciones)
+        resumen.index.name = 'station'
+        return resumen
@@ -0,0 +1,170 @@
+"""
+Línea de comandos `bicimad`: ejecuta una consulta de BiciMad sobre un mes o un intervalo de
+meses y escribe el resultado en JSON o CSV.
+
+Ejemplos:
+    bicimad resume 1 23
+    bicimad day_time 1 23 --until 3 23 --format csv
+    bicimad most_popular_stations 1 23 --offline
+
+Los ZIP y el catálogo de meses se guardan en la caché local (~/.cache/bicimad o BICIMAD_CACHE_DIR),
+de modo que las ejecuciones siguientes no vuelven a descargarlos. Con --offline no se accede a la red.
+
+Este módulo solo importa pandas y el resto de la librería después de leer los argumentos, para
+que `bicimad --help` y los errores de uso sean inmediatos.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+QUERIES = [
+    "resume", "most_popular_stations", "usage_from_most_popular_station", "day_time",
+    "weekday_time", "total_usage_day", "total_usage_by_station_day", "hourly_usage", "peak_hour",
+]
+RANGE_QUERIES = QUERIES[:7]
+"""Consultas disponibles también para un intervalo de meses (BiciMadRange)."""
+APPROXIMATE_QUERIES = QUERIES[:3]
+"""Consultas que se pueden responder desde los resúmenes aproximados (--approximate)."""
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bicimad", description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("query", choices=QUERIES, help="Consulta de BiciMad a ejecutar.")
+    parser.add_argument("month", type=int, help="Mes (1 a 12).")
+    parser.add_argument("year", type=int, help="Año con dos cifras (por ejemplo, 23).")
+    parser.add_argument("--until", nargs=2, type=int, metavar=("MONTH", "YEAR"),
+                        help="Último mes del intervalo, incluido.")
+    parser.add_argument("--format", choices=["json", "csv"], default="json", help="Formato de salida.")
+    parser.add_argument("--output", type=Path, help="Fichero de salida (por defecto, la salida estándar).")
+    parser.add_argument("--offline", action="store_true",
+                        help="Usar solo la caché local y el catálogo guardado, sin acceder a la red.")
+    parser.add_argument("--cache-dir", type=Path, help="Directorio de la caché de ZIP.")
+    parser.add_argument("--store", type=Path, help="Almacén columnar con meses ya limpios.")
+    parser.add_argument("--aggregates", type=Path,
+                        help="Almacén de agregados mensuales: con --until, la consulta se responde desde él "
+                             "tras ingerir los meses del intervalo que le falten (salvo con --offline).")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Con --aggregates, responder las consultas de popularidad desde los resúmenes "
+                             "aproximados, con memoria constante sea cual sea el intervalo.")
+    parser.add_argument("--compact", action="store_true", help="Leer con el plan de tipos compacto.")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Procesos con los que leer el CSV de un mes (por defecto, en el propio proceso).")
+    parser.add_argument("--no-clean", action="store_true", help="No limpiar los datos antes de consultar.")
+    return parser
+
+
+def _scalar(value):
+    """Convierte un valor de pandas/NumPy en un valor serializable en JSON."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(_scalar(v) for v in value)
+    if isinstance(value, tuple):
+        return [_scalar(v) for v in value]
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def to_json(result) -> str:
+    """
+    Serializa el resultado de una consulta en JSON. Las series y tablas se escriben como lista de
+    registros (una fila por elemento, con las columnas del índice), salvo las series de valores
+    heterogéneos como `resume`, que se escriben como objeto.
+    """
+    import pandas as pd
+
+    if isinstance(result, pd.Series) and result.dtype == object:
+        return json.dumps({str(k): _scalar(v) for k, v in result.items()}, ensure_ascii=False, indent=2)
+    if isinstance(result, (pd.Series, pd.DataFrame)):
+        frame = result.reset_index()
+        frame.columns = [str(c) for c in frame.columns]
+        records = [{k: _scalar(v) for k, v in row.items()} for row in frame.to_dict(orient="records")]
+        return json.dumps(records, ensure_ascii=False, indent=2)
+    return json.dumps(_scalar(result), ensure_ascii=False, indent=2)
+
+
+def to_csv(result) -> str:
+    """Serializa el resultado de una consulta en CSV, con las columnas del índice incluidas."""
+    import pandas as pd
+
+    if isinstance(result, pd.Series) and result.dtype == object:
+        valores = {k: json.dumps(_scalar(v), ensure_ascii=False) if isinstance(v, (set, tuple)) else _scalar(v)
+                   for k, v in result.items()}
+        return pd.Series(valores, name="value").rename_axis("field").to_csv()
+    if isinstance(result, (pd.Series, pd.DataFrame)):
+        return result.reset_index().to_csv(index=False)
+    if isinstance(result, (set, frozenset)):
+        return "\n".join(str(v) for v in _scalar(result)) + "\n"
+    return f"{_scalar(result)}\n"
+
+
+def run(args: argparse.Namespace):
+    """Ejecuta la consulta descrita por los argumentos ya leídos y devuelve su resultado."""
+    from .cache import ZipCache
+
+    cache = ZipCache(args.cache_dir, offline=args.offline)
+
+    if args.until and args.query not in RANGE_QUERIES:
+        raise ValueError(f"La consulta {args.query} no está disponible para intervalos de meses")
+    if args.until and args.aggregates:
+        from .UrlEMT import UrlEMT
+        from .bicimad_range import month_span
+        from .ingest import AggregateStore
+
+        agregados = AggregateStore(args.aggregates)
+        faltan = [m for m in month_span((args.month, args.year), tuple(args.until)) if m not in agregados]
+        if faltan and not args.offline:
+            # Solo se ingieren los meses del intervalo que falten, no todo el histórico del catálogo.
+            enlaces = UrlEMT(cache)
+            agregados.ingest(urls={enlaces.get_url(month, year) for month, year in faltan}, cache=cache)
+        if args.approximate:
+            if args.query not in APPROXIMATE_QUERIES:
+                raise ValueError(f"La consulta {args.query} no tiene versión aproximada")
+            datos = agregados.sketch((args.month, args.year), tuple(args.until))
+        else:
+            datos = agregados.combined((args.month, args.year), tuple(args.until))
+    elif args.until:
+        from .bicimad_range import BiciMadRange
+
+        datos = BiciMadRange((args.month, args.year), tuple(args.until), cache=cache,
+                             compact=args.compact, clean=not args.no_clean)
+    else:
+        from .bicimad import BiciMad
+        from .store import ColumnarStore
+
+        store = ColumnarStore(args.store) if args.store else None
+        datos = BiciMad(args.month, args.year, cache=cache, store=store, compact=args.compact, lazy=True,
+                        parse_workers=args.parse_workers)
+        if not args.no_clean:
+            datos.clean()
+    return getattr(datos, args.query)()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada del comando `bicimad`. Devuelve el código de salida."""
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.aggregates and not args.until:
+        parser.error("--aggregates requiere --until")
+    if args.approximate and not args.aggregates:
+        parser.error("--approximate requiere --aggregates y --until")
+    try:
+        result = run(args)
+    except (ConnectionError, ValueError) as e:
+        print(f"bicimad: error: {e}", file=sys.stderr)
+        return 1
+
+    text = to_json(result) + "\n" if args.format == "json" else to_csv(result)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import DIAS
+
+
+class UsageCube:
+    """Cubo materializado de uso por día × hora × estación de desbloqueo.
+
+    Guarda el número de viajes y los minutos totales de cada combinación en dos arrays densos
+    de NumPy de forma (días, 24, estaciones + 1), construidos en una sola pasada vectorizada
+    sobre los viajes. La última posición del eje de estaciones agrupa los viajes sin estación
+    de desbloqueo, que cuentan en los totales por día y hora pero no en las consultas por estación.
+    Con el cubo construido, las consultas temporales no vuelven a recorrer la tabla de viajes."""
+
+    def __init__(self, days: pd.DatetimeIndex, stations: pd.Index, counts: np.ndarray, minutes: np.ndarray):
+        """
+        Inicializa el cubo a partir de sus ejes y arrays (ver `from_frame`).
+
+        Args:
+            days (pd.DatetimeIndex): Días del eje 0.
+            stations (pd.Index): Estaciones del eje 2 (sin la posición final de viajes sin estación).
+            counts (np.ndarray): Número de viajes, de forma (días, 24, estaciones + 1).
+            minutes (np.ndarray): Minutos totales, de la misma forma.
+        """
+        self.days = days
+        self.stations = stations
+        self.counts = counts
+        self.minutes = minutes
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, hours: Optional[np.ndarray] = None) -> "UsageCube":
+        """
+        Construye el cubo a partir de un DataFrame con el formato de BiciMad.
+
+        Args:
+            data (pd.DataFrame): Viajes con índice de fecha de desbloqueo y columnas
+                'trip_minutes' y 'station_unlock'.
+            hours (np.ndarray, optional): Hora de desbloqueo de cada fila. Por defecto se toma
+                del índice, que debe conservar la hora (es decir, no estar normalizado).
+
+        Returns:
+            UsageCube: El cubo construido.
+        """
+        index = data.index
+        if hours is None:
+            hours = index.hour.to_numpy(dtype=np.int64, na_value=0)
+        hours = np.asarray(hours, dtype=np.int64)
+        valid = ~np.asarray(index.isna())
+
+        day_codes, days = pd.factorize(index.normalize()[valid], sort=True)
+        station_codes, stations = pd.factorize(data['station_unlock'][valid], sort=True)
+        n_stations = len(stations) + 1
+        station_codes = np.where(station_codes < 0, n_stations - 1, station_codes)
+
+        shape = (len(days), 24, n_stations)
+        flat = (day_codes * 24 + hours[valid]) * n_stations + station_codes
+        size = int(np.prod(shape))
+        counts = np.bincount(flat, minlength=size).reshape(shape)
+        minutes = np.bincount(flat, weights=data['trip_minutes'].to_numpy(dtype=np.float64)[valid],
+                              minlength=size).reshape(shape)
+        return cls(pd.DatetimeIndex(days, name='fecha'), pd.Index(stations, name='station_unlock'),
+                   counts, minutes)
+
+    def day_time(self) -> pd.Series:
+        """Horas totales de uso por día (equivalente a BiciMad.day_time)."""
+        return pd.Series(self.minutes.sum(axis=(1, 2)) / 60, index=self.days, name='trip_minutes')
+
+    def total_usage_day(self) -> pd.Series:
+        """Número de usos por día (equivalente a BiciMad.total_usage_day)."""
+        return pd.Series(self.counts.sum(axis=(1, 2)), index=self.days, name='total_usos')
+
+    def weekday_time(self) -> pd.Series:
+        """Horas totales de uso por día de la semana (equivalente a BiciMad.weekday_time)."""
+        horas = self.day_time()
+        weekday = pd.Index(np.array(DIAS, dtype=object)[self.days.weekday], name='fecha')
+        return horas.groupby(weekday).sum().reindex(DIAS, fill_value=0)
+
+    def total_usage_by_station_day(self) -> pd.Series:
+        """Número de usos por día y estación (equivalente a BiciMad.total_usage_by_station_day)."""
+        por_estacion = self.counts.sum(axis=1)[:, :-1]
+        day_idx, station_idx = np.nonzero(por_estacion)
+        index = pd.MultiIndex.from_arrays([self.days[day_idx], self.stations[station_idx]],
+                                          names=['fecha', 'station_unlock'])
+        return pd.Series(por_estacion[day_idx, station_idx], index=index, name='total_usos')
+
+    def hourly_usage(self, station=None) -> pd.Series:
+        """
+        Número de usos por hora del día, en todo el periodo o desde una estación.
+
+        Args:
+            station (optional): Estación de desbloqueo; por defecto, todas.
+
+        Returns:
+            pd.Series: Serie con índice = hora (0 a 23) y valores = número de usos.
+        """
+        counts = self.counts if station is None else self.counts[:, :, [self.stations.get_loc(station)]]
+        return pd.Series(counts.sum(axis=(0, 2)), index=pd.RangeIndex(24, name='hora'), name='total_usos')
+
+    def hourly_time(self) -> pd.Series:
+        """Horas totales de uso por hora del día."""
+        return pd.Series(self.minutes.sum(axis=(0, 2)) / 60, index=pd.RangeIndex(24, name='hora'),
+                         name='trip_minutes')
+
+    def day_hour_usage(self) -> pd.DataFrame:
+        """Número de usos por día (filas) y hora (columnas)."""
+        return pd.DataFrame(self.counts.sum(axis=2), index=self.days, columns=pd.RangeIndex(24, name='hora'))
+
+    def peak_hour(self) -> int:
+        """Hora del día con más usos en todo el periodo."""
+        return int(np.argmax(self.counts.sum(axis=(0, 2))))
+
+    def peak_hour_by_day(self) -> pd.DataFrame:
+        """
+        Hora punta de cada día.
+
+        Returns:
+            pd.DataFrame: DataFrame con índice = fechas y columnas 'hora' y 'total_usos'.
+        """
+        por_hora = self.counts.sum(axis=2)
+        hora = por_hora.argmax(axis=1)
+        return pd.DataFrame({'hora': hora, 'total_usos': por_hora[np.arange(len(hora)), hora]}, index=self.days)
+
+    def peak_hour_by_station(self) -> pd.DataFrame:
+        """
+        Hora punta de cada estación de desbloqueo.
+
+        Returns:
+            pd.DataFrame: DataFrame con índice = estaciones y columnas 'hora' y 'total_usos'.
+        """
+        por_hora = self.counts.sum(axis=0)[:, :-1]
+        hora = por_hora.argmax(axis=0)
+        return pd.DataFrame({'hora': hora, 'total_usos': por_hora[hora, np.arange(len(hora))]},
+                            index=self.stations)
@@ -0,0 +1,76 @@
+import tempfile
+from typing import BinaryIO, Callable, Iterator, Optional
+
+import requests
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+"""Función que recibe los bytes descargados hasta el momento y el total esperado (o None)."""
+
+CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def iter_chunks(response: requests.Response, progress: Optional[ProgressCallback] = None,
+                chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Recorre por bloques el cuerpo de una respuesta abierta con stream=True, informando del
+    progreso tras cada bloque.
+
+    Args:
+        response (requests.Response): Respuesta HTTP en modo streaming.
+        progress (ProgressCallback, optional): Función a la que notificar el progreso.
+        chunk_size (int): Tamaño máximo de cada bloque en bytes.
+
+    Yields:
+        bytes: Los bloques del cuerpo de la respuesta.
+    """
+    length = response.headers.get("Content-Length")
+    total = int(length) if length is not None else None
+    done = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if not chunk:
+            continue
+        done += len(chunk)
+        if progress is not None:
+            progress(done, total)
+        yield chunk
+
+
+def write_response(response: requests.Response, fileobj: BinaryIO,
+                   progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Escribe por bloques el cuerpo de una respuesta en un fichero binario.
+
+    Args:
+        response (requests.Response): Respuesta HTTP en modo streaming.
+        fileobj (BinaryIO): Fichero de destino.
+        progress (ProgressCallback, optional): Función a la que notificar el progreso.
+
+    Returns:
+        int: Número de bytes escritos.
+    """
+    written = 0
+    for chunk in iter_chunks(response, progress):
+        fileobj.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def spool_response(response: requests.Response, progress: Optional[ProgressCallback] = None,
+                   max_size: int = SPOOL_MAX_SIZE):
+    """
+    Vuelca una respuesta a un fichero temporal que solo se mantiene en memoria mientras no
+    supere `max_size` bytes; a partir de ahí pasa a disco.
+
+    Args:
+        response (requests.Response): Respuesta HTTP en modo streaming.
+        progress (ProgressCallback, optional): Función a la que notificar el progreso.
+        max_size (int): Bytes a partir de los cuales el fichero pasa a disco.
+
+    Returns:
+        Tuple[SpooledTemporaryFile, int]: El fichero, posicionado al principio, y los bytes escritos.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_size)
+    written = write_response(response, spooled, progress)
+    spooled.seek(0)
+    return spooled, written
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+
+COORDINATES = r"\[\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*\]"
+"""Expresión regular de la lista de coordenadas [longitud, latitud] de un punto GeoJSON."""
+
+
+def parse_geolocation(geolocation: pd.Series, dtype: str = "float64") -> pd.DataFrame:
+    """
+    Convierte una columna de geolocalizaciones en texto (puntos GeoJSON como
+    "{'type': 'Point', 'coordinates': [-3.70, 40.41]}") en dos columnas numéricas.
+
+    El texto se analiza una sola vez por valor distinto (las estaciones se repiten millones de
+    veces) y el resultado se reparte a todas las filas mediante sus códigos, sin json.loads por fila.
+
+    Args:
+        geolocation (pd.Series): Columna con las geolocalizaciones en texto (o categórica).
+        dtype (str): Tipo de las columnas resultantes.
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas 'lat' y 'lon' e igual índice que la entrada.
+            Los valores ausentes o no reconocidos quedan como NaN.
+    """
+    if isinstance(geolocation.dtype, pd.CategoricalDtype):
+        codes = geolocation.cat.codes.to_numpy()
+        uniques = pd.Series(geolocation.cat.categories, dtype=object)
+    else:
+        codes, uniques = pd.factorize(geolocation)
+        uniques = pd.Series(uniques, dtype=object)
+
+    coords = uniques.astype(str).str.extract(COORDINATES).astype(dtype).to_numpy()
+    # Un código -1 (valor ausente) toma la última fila, que es NaN
+    coords = np.vstack([coords, np.full((1, 2), np.nan, dtype=dtype)])
+    return pd.DataFrame({"lat": coords[codes, 1], "lon": coords[codes, 0]}, index=geolocation.index)
+
+
+EARTH_RADIUS = 6_371_000.0
+METERS_PER_DEGREE = 111_320.0
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Distancia en metros entre puntos (lat, lon) en grados, vectorizada sobre arrays.
+
+    Returns:
+        np.ndarray: Distancias de círculo máximo en metros.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def trip_coordinates(data: pd.DataFrame, side: str = "unlock") -> pd.DataFrame:
+    """
+    Devuelve las coordenadas de desbloqueo o bloqueo de cada viaje, tanto si los datos tienen
+    columnas lat_/lon_ (plan de tipos compacto) como si conservan la geolocalización en texto.
+
+    Args:
+        data (pd.DataFrame): Viajes con el formato de BiciMad.
+        side (str): "unlock" o "lock".
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas 'lat' y 'lon' e igual índice que `data`.
+    """
+    if f"lat_{side}" in data.columns:
+        return pd.DataFrame({"lat": data[f"lat_{side}"], "lon": data[f"lon_{side}"]}, index=data.index)
+    return parse_geolocation(data[f"geolocation_{side}"])
+
+
+class StationGrid:
+    """Índice espacial en rejilla sobre las estaciones de BiciMAD.
+
+    Las estaciones se reparten en celdas cuadradas de `cell_size` metros y se ordenan por
+    celda, de modo que cada celda es un rango contiguo de un array (como una matriz CSR).
+    Las consultas por caja, radio y estación más cercana solo examinan las celdas afectadas,
+    y todas están vectorizadas sobre arrays de puntos."""
+
+    def __init__(self, stations: pd.Index, lat: np.ndarray, lon: np.ndarray, cell_size: float = 500.0):
+        """
+        Construye la rejilla a partir de las coordenadas de las estaciones.
+
+        Args:
+            stations (pd.Index): Identificadores de las estaciones.
+            lat (np.ndarray): Latitud de cada estación en grados.
+            lon (np.ndarray): Longitud de cada estación en grados.
+            cell_size (float): Lado de las celdas en metros.
+        """
+        keep = ~(np.isnan(lat) | np.isnan(lon))
+        self.stations = pd.Index(stations)[keep]
+        self.lat = np.asarray(lat, dtype=np.float64)[keep]
+        self.lon = np.asarray(lon, dtype=np.float64)[keep]
+        self.cell_size = cell_size
+        self._origin = (self.lat.min(), self.lon.min())
+        self._dlat = cell_size / METERS_PER_DEGREE
+        self._dlon = cell_size / (METERS_PER_DEGREE * np.cos(np.radians(self.lat.mean())))
+
+        rows, cols = self.cell_of(self.lat, self.lon)
+        self._nrows = int(rows.max()) + 3
+        self._ncols = int(cols.max()) + 3
+        codes = self._code(rows, cols)
+        self._order = np.argsort(codes, kind="stable")
+        self._sorted_codes = codes[self._order]
+
+    @classmethod
+    def from_trips(cls, data: pd.DataFrame, side: str = "unlock", cell_size: float = 500.0) -> "StationGrid":
+        """
+        Construye la rejilla con las estaciones de desbloqueo (o bloqueo) de los viajes, situando
+        cada estación en la mediana de las coordenadas de sus viajes.
+
+        Args:
+            data (pd.DataFrame): Viajes con el formato de BiciMad.
+            side (str): "unlock" o "lock".
+            cell_size (float): Lado de las celdas en metros.
+
+        Returns:
+            StationGrid: El índice espacial.
+        """
+        coords = trip_coordinates(data, side)
+        coords["station"] = data[f"station_{side}"].to_numpy()
+        centers = coords.dropna().groupby("station", observed=True)[["lat", "lon"]].median()
+        return cls(centers.index, centers["lat"].to_numpy(), centers["lon"].to_numpy(), cell_size)
+
+    def cell_of(self, lat, lon):
+        """
+        Devuelve la fila y la columna de la celda de cada punto.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Filas y columnas (enteros, pueden ser negativos fuera de la rejilla).
+        """
+        rows = np.floor((np.asarray(lat, dtype=np.float64) - self._origin[0]) / self._dlat).astype(np.int64) + 1
+        cols = np.floor((np.asarray(lon, dtype=np.float64) - self._origin[1]) / self._dlon).astype(np.int64) + 1
+        return rows, cols
+
+    def _code(self, rows, cols):
+        return rows * self._ncols + cols
+
+    def _cell_range(self, rows, cols):
+        codes = self._code(rows, cols)
+        outside = (cols < 0) | (cols >= self._ncols)
+        starts = np.searchsorted(self._sorted_codes, codes, side="left")
+        ends = np.searchsorted(self._sorted_codes, codes, side="right")
+        ends[outside] = starts[outside]
+        return starts, ends
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> pd.Index:
+        """
+        Devuelve las estaciones dentro de una caja de coordenadas.
+
+        Solo se comprueban las estaciones de las celdas que tocan la caja: las de cada fila de
+        celdas son contiguas en el orden de la rejilla.
+
+        Returns:
+            pd.Index: Estaciones dentro de la caja, en el orden en que se dieron al construir la rejilla.
+        """
+        (row0, row1), (col0, col1) = self.cell_of([min_lat, max_lat], [min_lon, max_lon])
+        rows = np.arange(max(row0, 0), min(row1, self._nrows - 1) + 1)
+        col0, col1 = max(col0, 0), min(col1, self._ncols - 1)
+        if not len(rows) or col0 > col1:
+            return self.stations[:0]
+        starts = np.searchsorted(self._sorted_codes, self._code(rows, col0), side="left")
+        ends = np.searchsorted(self._sorted_codes, self._code(rows, col1), side="right")
+        candidates = np.sort(self._order[np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])])
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return self.stations[candidates[inside]]
+
+    def within(self, lat: float, lon: float, radius: float) -> pd.Series:
+        """
+        Devuelve las estaciones a menos de `radius` metros de un punto, con su distancia.
+
+        Returns:
+            pd.Series: Distancias en metros indexadas por estación, de menor a mayor.
+        """
+        reach = int(np.ceil(radius / self.cell_size))
+        row, col = self.cell_of(lat, lon)
+        rows, cols = np.meshgrid(np.arange(row - reach, row + reach + 1), np.arange(col - reach, col + reach + 1))
+        starts, ends = self._cell_range(rows.ravel(), cols.ravel())
+        candidates = self._order[np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])]
+        dist = haversine(lat, lon, self.lat[candidates], self.lon[candidates])
+        near = dist <= radius
+        return pd.Series(dist[near], index=self.stations[candidates[near]], name="distance").sort_values()
+
+    def nearest(self, lat, lon):
+        """
+        Devuelve la estación más cercana a cada punto.
+
+        Primero se buscan candidatas en la celda del punto y sus 8 vecinas; si la mejor está más
+        lejos que el lado de la celda (podría haber otra más cerca fuera de ese bloque) o no hay
+        ninguna, se recurre a comparar con todas las estaciones.
+
+        Args:
+            lat: Latitud o array de latitudes.
+            lon: Longitud o array de longitudes.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Estación más cercana y distancia en metros de cada punto
+                (None e infinito para los puntos sin coordenadas).
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        best = np.full(len(lat), -1, dtype=np.int64)
+        best_dist = np.full(len(lat), np.inf)
+        rows, cols = self.cell_of(lat, lon)
+
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                starts, ends = self._cell_range(rows + dr, cols + dc)
+                for k in range(int((ends - starts).max(initial=0))):
+                    pos = starts + k
+                    valid = pos < ends
+                    cand = self._order[np.minimum(pos, len(self._order) - 1)]
+                    dist = np.where(valid, haversine(lat, lon, self.lat[cand], self.lon[cand]), np.inf)
+                    better = dist < best_dist
+                    best[better] = cand[better]
+                    best_dist[better] = dist[better]
+
+        known = np.isfinite(lat) & np.isfinite(lon)
+        unsure = np.flatnonzero((best_dist > self.cell_size) & known)
+        for start in range(0, len(unsure), 4096):
+            idx = unsure[start:start + 4096]
+            dist = haversine(lat[idx, None], lon[idx, None], self.lat[None, :], self.lon[None, :])
+            best[idx] = dist.argmin(axis=1)
+            best_dist[idx] = dist.min(axis=1)
+
+        stations = np.asarray(self.stations, dtype=object)[best]
+        stations[best < 0] = None
+        return stations, best_dist
+
+    def cell_usage(self, data: pd.DataFrame, side: str = "unlock") -> pd.DataFrame:
+        """
+        Agrega los viajes por celda de la rejilla según sus coordenadas de desbloqueo (o bloqueo).
+
+        Args:
+            data (pd.DataFrame): Viajes con el formato de BiciMad.
+            side (str): "unlock" o "lock".
+
+        Returns:
+            pd.DataFrame: Una fila por celda con viajes, indexada por (fila, columna), con las
+                coordenadas del centro de la celda ('lat', 'lon'), 'total_usos' y 'trip_minutes'.
+        """
+        coords = trip_coordinates(data, side)
+        keep = coords.notna().all(axis=1).to_numpy()
+        rows, cols = self.cell_of(coords["lat"].to_numpy()[keep], coords["lon"].to_numpy()[keep])
+        minutes = data["trip_minutes"].to_numpy(dtype=np.float64)[keep]
+        usage = (
+            pd.DataFrame({"fila": rows, "columna": cols, "total_usos": 1, "trip_minutes": minutes})
+            .groupby(["fila", "columna"])
+            .sum()
+        )
+        fila = usage.index.get_level_values(0).to_numpy()
+        columna = usage.index.get_level_values(1).to_numpy()
+        usage.insert(0, "lat", self._origin[0] + (fila - 0.5) * self._dlat)
+        usage.insert(1, "lon", self._origin[1] + (columna - 0.5) * self._dlon)
+        return usage
+
+
+def trips_in_bbox(data: pd.DataFrame, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                  side: str = "unlock") -> np.ndarray:
+    """
+    Máscara booleana de los viajes cuyo desbloqueo (o bloqueo) cae dentro de una caja de coordenadas.
+    """
+    coords = trip_coordinates(data, side)
+    lat, lon = coords["lat"].to_numpy(), coords["lon"].to_numpy()
+    return (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+
+
+def trips_within(data: pd.DataFrame, lat: float, lon: float, radius: float, side: str = "unlock") -> np.ndarray:
+    """
+    Máscara booleana de los viajes cuyo desbloqueo (o bloqueo) está a menos de `radius` metros de un punto.
+    La distancia exacta solo se calcula para los viajes dentro de la caja que circunscribe el círculo.
+    """
+    dlat = radius / METERS_PER_DEGREE
+    dlon = radius / (METERS_PER_DEGREE * np.cos(np.radians(lat)))
+    mask = trips_in_bbox(data, lat - dlat, lon - dlon, lat + dlat, lon + dlon, side)
+    coords = trip_coordinates(data, side)
+    idx = np.flatnonzero(mask)
+    mask[idx] = haversine(lat, lon, coords["lat"].to_numpy()[idx], coords["lon"].to_numpy()[idx]) <= radius
+    return mask
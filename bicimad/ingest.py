@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from . import instrument
+from .UrlEMT import UrlEMT
+from .aggregate import MonthAccumulator
+from .bicimad import BiciMad
+from .bicimad_range import month_span
+from .cache import ZipCache
+from .catalog import MonthCatalog
+from .sketch import MonthSketch
+from .sources import FileSource, UrlSource
+
+Month = Tuple[int, int]
+
+
+class AggregateStore:
+    """Almacén en disco, solo de añadido, de los agregados mensuales de BiciMAD.
+
+    Cada mes se guarda una única vez, en un subdirectorio `YY_MM` con las tablas de
+    `MonthAccumulator.to_frames` en Parquet: totales, minutos y usos por día, usos por día y
+    estación y usos por dirección de desbloqueo. El fichero `manifest.json` enumera los meses
+    ingeridos con la URL de su ZIP de origen; un mes solo cuenta como ingerido cuando aparece en
+    él, de modo que una ingesta interrumpida no deja meses a medias.
+
+    `ingest` compara el catálogo de la EMT con el manifiesto y procesa solo los meses nuevos,
+    por lo que el coste de cada actualización depende únicamente de los datos nuevos. Las
+    consultas sobre varios meses (`combined`) se responden desde los agregados guardados.
+
+    Junto a las tablas, cada mes puede guardar sus resúmenes aproximados (`MonthSketch`) en
+    `sketch.npz`; `sketch` los combina mes a mes, con memoria constante, para los rankings de
+    popularidad de periodos largos.
+
+    Requiere el paquete opcional `pyarrow`."""
+
+    MANIFEST = "manifest.json"
+    SKETCH = "sketch.npz"
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Inicializa el almacén en el directorio indicado, creándolo si no existe.
+
+        Args:
+            directory (str | Path): Directorio del almacén.
+        """
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def _manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self._dir / self.MANIFEST, encoding="utf-8") as f:
+                return json.load(f)["months"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write_manifest(self, months: Dict[str, dict]):
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"months": months}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._dir / self.MANIFEST)
+
+    @staticmethod
+    def _key(month: int, year: int) -> str:
+        return f"{year:02d}_{month:02d}"
+
+    def months(self) -> List[Month]:
+        """Meses ingeridos como tuplas (mes, año), ordenados cronológicamente."""
+        ingested = (tuple(int(p) for p in key.split("_")) for key in self._manifest())
+        return [(month, year) for year, month in sorted(ingested)]
+
+    def __contains__(self, key: Month) -> bool:
+        month, year = key
+        return self._key(month, year) in self._manifest()
+
+    def source(self, month: int, year: int) -> Optional[str]:
+        """Devuelve la URL del ZIP del que se ingirió el mes, o None si no está."""
+        entry = self._manifest().get(self._key(month, year))
+        return None if entry is None else entry["source"]
+
+    def pending(self, urls: Iterable[str]) -> Dict[Month, str]:
+        """
+        Compara un catálogo de URLs de la EMT con los meses ya ingeridos.
+
+        Args:
+            urls (Iterable[str]): URLs de los ZIP mensuales (ver UrlEMT.select_valid_urls).
+
+        Returns:
+            Dict[Tuple[int, int], str]: URL de cada mes (mes, año) que aún no está en el almacén,
+            en orden cronológico.
+        """
+        ingested = self._manifest()
+        return {(month, year): url for (year, month), url in sorted(MonthCatalog.parse(urls).items())
+                if self._key(month, year) not in ingested}
+
+    def append(self, acc: MonthAccumulator, source: str, sketch: Optional[MonthSketch] = None):
+        """
+        Añade los agregados de un mes. Los meses ya ingeridos no se sobrescriben nunca.
+
+        Args:
+            acc (MonthAccumulator): Agregados de un único mes, con `month` y `year`.
+            source (str): Identidad del fichero de origen (la URL de su ZIP).
+            sketch (MonthSketch, optional): Resúmenes aproximados del mismo mes.
+
+        Raises:
+            ValueError: Si el acumulador no es de un único mes o el mes ya está en el almacén.
+        """
+        if acc.month is None or acc.year is None:
+            raise ValueError("Solo se pueden añadir los agregados de un único mes")
+        key = self._key(acc.month, acc.year)
+        if key in self._manifest():
+            raise ValueError(f"El mes {acc.month:02d}/{acc.year:02d} ya está en el almacén")
+
+        tmp = Path(tempfile.mkdtemp(dir=self._dir, prefix=f".{key}-"))
+        for name, frame in acc.to_frames().items():
+            frame.to_parquet(tmp / f"{name}.parquet", index=False)
+        if sketch is not None:
+            (tmp / self.SKETCH).write_bytes(sketch.to_bytes())
+        target = self._dir / key
+        if target.exists():
+            # Restos de una ingesta interrumpida antes de actualizar el manifiesto.
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+
+        months = self._manifest()
+        months[key] = {"source": source, "rows": acc.total_uses, "ingested_at": time.time()}
+        self._write_manifest(months)
+
+    def _frames(self, month: int, year: int) -> Dict[str, pd.DataFrame]:
+        directory = self._dir / self._key(month, year)
+        return {p.stem: pd.read_parquet(p) for p in directory.glob("*.parquet")}
+
+    def load(self, month: int, year: int) -> MonthAccumulator:
+        """
+        Carga los agregados de un mes.
+
+        Raises:
+            ValueError: Si el mes no está en el almacén.
+        """
+        if (month, year) not in self:
+            raise ValueError(f"El mes {month:02d}/{year:02d} no está en el almacén")
+        return MonthAccumulator.from_frames(self._frames(month, year), month, year)
+
+    def _span(self, start: Optional[Month], end: Optional[Month]) -> List[Month]:
+        """Meses (mes, año) del intervalo, comprobando que estén todos en el almacén."""
+        ingested = self.months()
+        if not ingested:
+            raise ValueError("El almacén de agregados está vacío")
+        span = month_span(start or ingested[0], end or ingested[-1])
+        ingested = set(ingested)
+        missing = [m for m in span if m not in ingested]
+        if missing:
+            raise ValueError(f"Faltan meses en el almacén de agregados: {missing}")
+        return span
+
+    def combined(self, start: Optional[Month] = None, end: Optional[Month] = None) -> MonthAccumulator:
+        """
+        Combina los agregados de un intervalo de meses en un único acumulador, que responde a
+        las mismas consultas que BiciMad sobre el periodo completo. Solo se leen las tablas
+        guardadas, nunca los CSV.
+
+        Args:
+            start (Tuple[int, int], optional): Primer mes como (mes, año). Por defecto, el primero ingerido.
+            end (Tuple[int, int], optional): Último mes como (mes, año), incluido. Por defecto, el último.
+
+        Returns:
+            MonthAccumulator: Agregados del periodo.
+
+        Raises:
+            ValueError: Si falta en el almacén algún mes del intervalo o no hay ninguno.
+        """
+        span = self._span(start, end)
+        with instrument.stage("combine") as etapa:
+            tables: Dict[str, List[pd.DataFrame]] = {}
+            for month, year in span:
+                for name, frame in self._frames(month, year).items():
+                    tables.setdefault(name, []).append(frame)
+            frames = {name: pd.concat(parts, ignore_index=True) for name, parts in tables.items()}
+            acc = MonthAccumulator.from_frames(frames, *span[0]) if len(span) == 1 else \
+                MonthAccumulator.from_frames(frames)
+            etapa.rows = acc.total_uses
+        return acc
+
+    def sketch(self, start: Optional[Month] = None, end: Optional[Month] = None) -> MonthSketch:
+        """
+        Combina los resúmenes aproximados de un intervalo de meses. Se leen y combinan de uno en
+        uno, así que la memoria no depende de la longitud del intervalo.
+
+        Args:
+            start (Tuple[int, int], optional): Primer mes como (mes, año). Por defecto, el primero ingerido.
+            end (Tuple[int, int], optional): Último mes como (mes, año), incluido. Por defecto, el último.
+
+        Returns:
+            MonthSketch: Resúmenes del periodo, con `top_stations`, `top_routes`, `distinct_bikes`...
+
+        Raises:
+            ValueError: Si falta algún mes del intervalo o alguno se ingirió sin resúmenes.
+        """
+        span = self._span(start, end)
+        with instrument.stage("sketch") as etapa:
+            combined = None
+            for month, year in span:
+                path = self._dir / self._key(month, year) / self.SKETCH
+                if not path.exists():
+                    raise ValueError(f"El mes {month:02d}/{year:02d} no tiene resúmenes aproximados")
+                sketch = MonthSketch.from_bytes(path.read_bytes())
+                combined = sketch if combined is None else combined.merge(sketch)
+            etapa.rows = combined.total_uses
+        return combined
+
+    def ingest(self, urls: Optional[Iterable[str]] = None, cache: Optional[ZipCache] = None,
+               chunksize: int = 500_000) -> List[Month]:
+        """
+        Ingiere los meses del catálogo de la EMT que aún no están en el almacén. Cada mes nuevo
+        se descarga y se agrega por bloques con `BiciMad.aggregate`, que en la misma pasada
+        alimenta sus resúmenes aproximados; los ya ingeridos no se tocan.
+
+        Args:
+            urls (Iterable[str], optional): Catálogo de URLs. Por defecto, se refresca el catálogo
+                compartido de UrlEMT, que vuelve a pedir el índice a la EMT (UrlEMT.select_valid_urls).
+            cache (ZipCache, optional): Caché en disco de los ZIP.
+            chunksize (int): Número máximo de filas de cada bloque.
+
+        Returns:
+            List[Tuple[int, int]]: Meses añadidos como (mes, año), en orden cronológico.
+        """
+        if urls is None:
+            catalog = UrlEMT.catalog()
+            catalog.refresh()
+            urls = catalog.urls()
+        added = []
+        for (month, year), url in self.pending(urls).items():
+            source = FileSource(cache.fetch(url)) if cache is not None else UrlSource(url)
+            sketch = MonthSketch(month, year)
+            acc = BiciMad.aggregate(month, year, chunksize=chunksize, source=source, sketch=sketch)
+            self.append(acc, url, sketch)
+            added.append((month, year))
+        return added
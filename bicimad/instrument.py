@@ -0,0 +1,241 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+import pandas as pd
+
+
+@dataclass
+class StageMetrics:
+    """Medidas de una ejecución de una etapa del proceso (descarga, lectura, limpieza, consulta...)."""
+    stage: str
+    seconds: float
+    bytes: Optional[int] = None
+    """Bytes transferidos por la red, si la etapa descarga algo."""
+    rows: Optional[int] = None
+    """Filas leídas o procesadas, si la etapa trabaja con viajes."""
+    peak_memory: Optional[int] = None
+    """Pico de memoria reservada durante la etapa, en bytes (solo con `enable(memory=True)`)."""
+    started_at: float = 0.0
+    """Instante de inicio (time.time())."""
+
+
+Observer = Callable[[StageMetrics], None]
+"""Función a la que se notifica cada etapa terminada."""
+
+
+@dataclass
+class PipelineMetrics:
+    """Resumen estructurado de las etapas registradas, por ejemplo las de un objeto BiciMad."""
+    stages: List[StageMetrics] = field(default_factory=list)
+
+    def __iter__(self) -> Iterator[StageMetrics]:
+        return iter(self.stages)
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    def append(self, metrics: StageMetrics):
+        self.stages.append(metrics)
+
+    def total_seconds(self, stage: Optional[str] = None) -> float:
+        """Tiempo total de todas las etapas, o solo de las que se llaman `stage`."""
+        return sum(m.seconds for m in self.stages if stage is None or m.stage == stage)
+
+    def to_records(self) -> List[dict]:
+        """Devuelve las etapas como diccionarios, listos para enviar a un sistema de métricas."""
+        return [asdict(m) for m in self.stages]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Devuelve las etapas como DataFrame, una fila por ejecución y en orden de finalización."""
+        return pd.DataFrame(self.to_records(), columns=list(StageMetrics.__dataclass_fields__))
+
+
+class Stage:
+    """Etapa en curso. Dentro del bloque `with` se pueden anotar `bytes` y `rows`."""
+
+    __slots__ = ("name", "summary", "bytes", "rows", "_start", "_wall", "_base", "_peak")
+
+    def __init__(self, name: str, summary: Optional[PipelineMetrics]):
+        self.name = name
+        self.summary = summary
+        self.bytes = None
+        self.rows = None
+        self._base = self._peak = 0
+
+
+class _NullStage:
+    """Etapa que no mide nada, usada cuando la instrumentación está desactivada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullStage()
+_observers: List[Observer] = []
+_enabled = False
+_memory = False
+_started_tracemalloc = False
+_local = threading.local()
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _collectors() -> list:
+    collectors = getattr(_local, "collectors", None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    return collectors
+
+
+def add_observer(observer: Observer):
+    """
+    Registra una función a la que se notifica cada etapa terminada (en el hilo que la ejecuta).
+    Mientras haya algún observador la instrumentación está activa.
+
+    Args:
+        observer (Observer): Función que recibe un StageMetrics.
+    """
+    _observers.append(observer)
+
+
+def remove_observer(observer: Observer):
+    """Da de baja un observador registrado con `add_observer`."""
+    _observers.remove(observer)
+
+
+@contextmanager
+def observe(observer: Observer):
+    """Registra `observer` mientras dura el bloque `with`."""
+    add_observer(observer)
+    try:
+        yield observer
+    finally:
+        remove_observer(observer)
+
+
+def enable(memory: bool = False):
+    """
+    Activa la instrumentación aunque no haya observadores, de modo que los objetos BiciMad
+    rellenen su resumen `metrics`.
+
+    Args:
+        memory (bool): Si True, también se mide el pico de memoria de cada etapa con tracemalloc,
+            lo que ralentiza notablemente la ejecución.
+    """
+    global _enabled, _memory, _started_tracemalloc
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable():
+    """Desactiva la instrumentación activada con `enable` (los observadores siguen registrados)."""
+    global _enabled, _memory, _started_tracemalloc
+    _enabled = False
+    _memory = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled() -> bool:
+    """Indica si las etapas se están midiendo."""
+    return _enabled or bool(_observers)
+
+
+@contextmanager
+def collect(summary: Optional[PipelineMetrics] = None):
+    """
+    Recoge en `summary` todas las etapas que terminen en este hilo mientras dura el bloque `with`,
+    incluidas las de funciones llamadas desde él.
+
+    Args:
+        summary (PipelineMetrics, optional): Resumen al que añadir las etapas; por defecto, uno nuevo.
+
+    Yields:
+        PipelineMetrics: El resumen.
+    """
+    summary = summary if summary is not None else PipelineMetrics()
+    collectors = _collectors()
+    collectors.append(summary)
+    try:
+        yield summary
+    finally:
+        collectors.remove(summary)
+
+
+def stage(name: str, summary: Optional[PipelineMetrics] = None):
+    """
+    Mide la etapa `name` durante un bloque `with`. Con la instrumentación desactivada devuelve
+    un objeto que no hace nada, por lo que su coste es despreciable.
+
+    Args:
+        name (str): Nombre de la etapa (por ejemplo 'get_csv' o 'clean').
+        summary (PipelineMetrics, optional): Resumen al que añadir la etapa, además de los
+            recogidos con `collect` y de los observadores.
+
+    Returns:
+        Stage: Etapa en la que anotar `bytes` y `rows`.
+    """
+    if not (_enabled or _observers):
+        return _NULL
+    return _measure(name, summary)
+
+
+@contextmanager
+def _measure(name: str, summary: Optional[PipelineMetrics]):
+    record = Stage(name, summary)
+    tracing = _memory and tracemalloc.is_tracing()
+    stack = _stack()
+    if tracing:
+        # Con etapas anidadas, el pico de la etapa exterior se acumula antes de reiniciarlo.
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]._peak = max(stack[-1]._peak, peak)
+        tracemalloc.reset_peak()
+        record._base = record._peak = current
+    stack.append(record)
+    record._wall = time.time()
+    record._start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        seconds = time.perf_counter() - record._start
+        stack.pop()
+        peak_memory = None
+        if tracing:
+            peak = max(record._peak, tracemalloc.get_traced_memory()[1])
+            peak_memory = peak - record._base
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+            tracemalloc.reset_peak()
+        _emit(record, StageMetrics(name, seconds, record.bytes, record.rows, peak_memory, record._wall))
+
+
+def _emit(record: Stage, metrics: StageMetrics):
+    if record.summary is not None:
+        record.summary.append(metrics)
+    for summary in _collectors():
+        if summary is not record.summary:
+            summary.append(metrics)
+    for observer in list(_observers):
+        observer(metrics)
@@ -0,0 +1,74 @@
+"""
+Etiquetas de los identificadores de estaciones y bicicletas.
+
+`clean` convierte los identificadores a texto, y el texto depende de cómo se infirió cada
+columna al leer el CSV ('12' en una columna entera, '12.0' si tenía ausentes). Estas funciones
+producen esas etiquetas y permiten comparar las estaciones de desbloqueo y de bloqueo aunque
+sus etiquetas difieran. Las usan BiciMad y los índices que cruzan ambas columnas (TripChains,
+ODMatrix y StationOccupancy).
+"""
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def id_labels(column: pd.Series) -> pd.Series:
+    """Convierte una columna de identificadores a texto como hace `clean`."""
+    if isinstance(column.dtype, pd.CategoricalDtype) or column.dtype.name in ('Int8', 'Int16', 'Int32'):
+        return as_labels(column)
+    return column.astype(str)
+
+
+def as_labels(column: pd.Series) -> pd.Series:
+    """
+    Devuelve la columna como categórica de textos, con las mismas etiquetas que produciría
+    `astype(str)` sobre la columna leída sin plan de tipos (por ejemplo '12.0' y 'nan' en una
+    columna de enteros con valores ausentes), pero guardando un código por fila.
+    """
+    codes, uniques = pd.factorize(column)
+    missing = codes == -1
+    if pd.api.types.is_integer_dtype(column.dtype) and missing.any():
+        labels = [str(float(u)) for u in uniques]
+    else:
+        labels = [str(u) for u in uniques]
+    # Según la versión de pandas, astype(str) convierte los ausentes en 'nan' o los conserva
+    missing_label = pd.Series([np.nan]).astype(str).iloc[0]
+    if missing.any() and isinstance(missing_label, str):
+        if missing_label not in labels:
+            labels.append(missing_label)
+        codes = np.where(missing, labels.index(missing_label), codes)
+
+    order = np.argsort(labels)
+    remap = np.empty(len(order) + 1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    remap[-1] = -1
+    categories = pd.Index(labels)[order]
+    return pd.Series(pd.Categorical.from_codes(remap[codes], categories=categories),
+                     index=column.index, name=column.name)
+
+
+def station_codes(unlock: pd.Series, lock: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Códigos enteros comparables entre las estaciones de desbloqueo y de bloqueo (-1 = sin
+    estación) y la etiqueta de cada código, en ese orden. Las etiquetas de `clean()` dependen de cómo se
+    infirió cada columna ('12' o '12.0'), así que si todas son numéricas se comparan como
+    números; cada estación se etiqueta como en la columna de desbloqueo, si aparece en ella.
+    """
+    # Se trabaja sobre los valores distintos de cada columna (unos cientos), no sobre cada viaje.
+    codes_unlock, uniques_unlock = pd.factorize(unlock)
+    codes_lock, uniques_lock = pd.factorize(lock)
+    labels = pd.Series(np.concatenate([np.asarray(uniques_unlock, dtype=object),
+                                       np.asarray(uniques_lock, dtype=object)]), dtype=object)
+    missing = labels.isna() | labels.isin(['nan', ''])
+    values = labels.where(~missing)
+    numeric = pd.to_numeric(values, errors='coerce')
+    if numeric[~missing].notna().all():
+        values = numeric
+    keys, _ = pd.factorize(values)
+    names = labels[keys >= 0].groupby(keys[keys >= 0], sort=True).first().to_numpy()
+    # El código -1 de factorize (sin estación) toma el último elemento, que se añade como -1.
+    keys = np.append(keys, -1)
+    code_unlock = keys[codes_unlock]
+    code_lock = keys[np.where(codes_lock >= 0, len(uniques_unlock) + codes_lock, -1)]
+    return code_unlock, code_lock, names
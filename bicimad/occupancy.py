@@ -0,0 +1,199 @@
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .labels import station_codes
+
+
+class StationOccupancy:
+    """Inventario relativo y flujo neto de bicicletas de cada estación a lo largo del tiempo.
+
+    Une los desbloqueos (una bicicleta sale de station_unlock en unlock_date) y los bloqueos
+    (entra en station_lock en lock_date) en un único flujo de eventos ordenado por estación y
+    hora. A partir de él se construyen, con una sola pasada de `np.bincount`, dos arrays densos
+    de forma (intervalos, estaciones) con las entradas y salidas de cada intervalo de `freq`; el
+    flujo neto es su diferencia y el inventario relativo su suma acumulada por intervalos.
+
+    El inventario es relativo al nivel de cada estación al principio del periodo, que los datos
+    no incluyen; los reequilibrados del operador tampoco aparecen como eventos (ver `TripChains`).
+    Con el flujo de eventos ordenado, el inventario en un instante cualquiera se obtiene con una
+    búsqueda binaria (`inventory_at`)."""
+
+    def __init__(self, bins: pd.DatetimeIndex, stations: pd.Index, inflow: np.ndarray, outflow: np.ndarray,
+                 event_times: np.ndarray, event_levels: np.ndarray, offsets: np.ndarray):
+        """
+        Inicializa el inventario a partir de sus arrays (ver `from_frame`).
+
+        Args:
+            bins (pd.DatetimeIndex): Inicio de cada intervalo.
+            stations (pd.Index): Estaciones.
+            inflow (np.ndarray): Bloqueos por intervalo y estación, de forma (intervalos, estaciones).
+            outflow (np.ndarray): Desbloqueos por intervalo y estación, de la misma forma.
+            event_times (np.ndarray): Horas de los eventos, ordenadas por (estación, hora).
+            event_levels (np.ndarray): Inventario relativo tras cada evento, en el mismo orden.
+            offsets (np.ndarray): Inicio del tramo de eventos de cada estación, más el final del último.
+        """
+        self.bins = bins
+        self.stations = stations
+        self.inflow = inflow
+        self.outflow = outflow
+        self.net = inflow - outflow
+        self.levels = np.cumsum(self.net, axis=0)
+        self._event_times = event_times
+        self._event_levels = event_levels
+        self._offsets = offsets
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, freq: str = '15min',
+                   times: Optional[np.ndarray] = None) -> "StationOccupancy":
+        """
+        Construye el inventario a partir de un DataFrame con el formato de BiciMad.
+
+        Args:
+            data (pd.DataFrame): Viajes con columnas 'station_unlock', 'station_lock' y 'lock_date'.
+            freq (str): Resolución de los intervalos (por ejemplo, '15min' o '1h').
+            times (np.ndarray, optional): Fecha y hora de desbloqueo de cada fila. Por defecto se
+                toma del índice, que debe conservar la hora (es decir, no estar normalizado).
+
+        Returns:
+            StationOccupancy: El inventario construido.
+        """
+        unlock = np.asarray(data.index if times is None else times, dtype='datetime64[ns]')
+        lock = data['lock_date'].to_numpy(dtype='datetime64[ns]')
+        code_unlock, code_lock, names = station_codes(data['station_unlock'], data['station_lock'])
+
+        # Flujo único de eventos: -1 al desbloquear, +1 al bloquear.
+        event_times = np.concatenate([unlock, lock])
+        codes = np.concatenate([code_unlock, code_lock])
+        deltas = np.concatenate([np.full(len(unlock), -1, dtype=np.int64), np.ones(len(lock), dtype=np.int64)])
+        valid = (codes >= 0) & ~np.isnat(event_times)
+        event_times, codes, deltas = event_times[valid], codes[valid], deltas[valid]
+
+        n_stations = len(names)
+        # Orden por (estación, hora) en dos pasadas estables: mucho más rápido que np.lexsort, y la
+        # segunda, sobre códigos pequeños, es una ordenación por radix.
+        order = np.argsort(event_times, kind='stable')
+        order = order[np.argsort(codes[order].astype(np.int16 if n_stations < 2 ** 15 else np.int64), kind='stable')]
+        event_times, codes, deltas = event_times[order], codes[order], deltas[order]
+        offsets = np.searchsorted(codes, np.arange(n_stations + 1))
+        # Suma acumulada de cada tramo: la global menos la acumulada antes del tramo.
+        levels = np.cumsum(deltas)
+        levels -= np.repeat(np.concatenate([[0], levels])[offsets[:-1]], np.diff(offsets))
+
+        step = pd.Timedelta(freq)
+        if len(event_times):
+            start = pd.Timestamp(event_times.min()).floor(step)
+            end = pd.Timestamp(event_times.max()).floor(step)
+        else:
+            start = end = pd.Timestamp(0)
+        bins = pd.date_range(start, end, freq=step, name='hora')
+        bin_codes = (event_times - start.to_datetime64()) // step.to_timedelta64()
+        flat = bin_codes * n_stations + codes
+        size = len(bins) * n_stations
+        inflow = np.bincount(flat[deltas > 0], minlength=size).reshape(len(bins), n_stations)
+        outflow = np.bincount(flat[deltas < 0], minlength=size).reshape(len(bins), n_stations)
+
+        stations = pd.Index(names, name='station')
+        return cls(bins, stations, inflow, outflow, event_times, levels, offsets)
+
+    def _position(self, station) -> int:
+        try:
+            return self.stations.get_loc(station)
+        except KeyError:
+            raise ValueError(f"Estación desconocida: {station}")
+
+    def net_flow(self, station=None) -> Union[pd.DataFrame, pd.Series]:
+        """
+        Flujo neto (bloqueos menos desbloqueos) de cada intervalo.
+
+        Args:
+            station (optional): Estación; por defecto, todas.
+
+        Returns:
+            pd.DataFrame | pd.Series: Índice = intervalos; una columna por estación, o una serie.
+        """
+        if station is not None:
+            return pd.Series(self.net[:, self._position(station)], index=self.bins, name=station)
+        return pd.DataFrame(self.net, index=self.bins, columns=self.stations)
+
+    def inventory(self, station=None) -> Union[pd.DataFrame, pd.Series]:
+        """
+        Inventario relativo al final de cada intervalo: bicicletas ganadas (o perdidas, si es
+        negativo) desde el principio del periodo.
+
+        Args:
+            station (optional): Estación; por defecto, todas.
+
+        Returns:
+            pd.DataFrame | pd.Series: Índice = intervalos; una columna por estación, o una serie.
+        """
+        if station is not None:
+            return pd.Series(self.levels[:, self._position(station)], index=self.bins, name=station)
+        return pd.DataFrame(self.levels, index=self.bins, columns=self.stations)
+
+    def inventory_at(self, station, when) -> int:
+        """
+        Inventario relativo de una estación justo después de los eventos anteriores o iguales a `when`.
+
+        Args:
+            station: Estación.
+            when (Timestamp | str): Instante.
+
+        Returns:
+            int: Bicicletas ganadas desde el principio del periodo.
+        """
+        i = self._position(station)
+        lo, hi = self._offsets[i], self._offsets[i + 1]
+        n = np.searchsorted(self._event_times[lo:hi], np.datetime64(pd.Timestamp(when)), 'right')
+        return int(self._event_levels[lo + n - 1]) if n else 0
+
+    def swing(self) -> pd.Series:
+        """
+        Diferencia entre el inventario máximo y el mínimo de cada estación (incluido el nivel
+        inicial): bicicletas que necesitaría la estación para no vaciarse ni llenarse nunca sin
+        reequilibrado.
+        """
+        minimo = np.minimum(self.levels.min(axis=0, initial=0), 0)
+        maximo = np.maximum(self.levels.max(axis=0, initial=0), 0)
+        return pd.Series(maximo - minimo, index=self.stations, name='swing')
+
+    def flags(self, empty: Union[int, pd.Series] = -10, full: Union[int, pd.Series] = 10,
+              initial: Union[int, pd.Series] = 0) -> pd.DataFrame:
+        """
+        Marca las estaciones que se vacían o se llenan. El nivel de cada intervalo es
+        `initial` más el inventario relativo; la estación se considera vacía cuando el nivel es
+        menor o igual que `empty` y llena cuando es mayor o igual que `full`.
+
+        Args:
+            empty (int | pd.Series): Umbral de vaciado, común o por estación.
+            full (int | pd.Series): Umbral de llenado (por ejemplo, la capacidad), común o por estación.
+            initial (int | pd.Series): Nivel inicial, común o por estación.
+
+        Returns:
+            pd.DataFrame: Índice = estaciones; columnas 'min_level', 'max_level', 'empty_bins',
+            'full_bins', 'first_empty', 'first_full', 'empties' y 'fills'.
+        """
+        def por_estacion(valor):
+            if isinstance(valor, pd.Series):
+                return valor.reindex(self.stations).to_numpy(dtype=np.float64)
+            return np.float64(valor)
+
+        nivel = self.levels + por_estacion(initial)
+        vacia = nivel <= por_estacion(empty)
+        llena = nivel >= por_estacion(full)
+
+        def primero(mask):
+            hay = mask.any(axis=0)
+            return pd.DatetimeIndex(np.where(hay, self.bins.to_numpy()[mask.argmax(axis=0)], np.datetime64('NaT')))
+
+        return pd.DataFrame({
+            'min_level': nivel.min(axis=0, initial=np.inf),
+            'max_level': nivel.max(axis=0, initial=-np.inf),
+            'empty_bins': vacia.sum(axis=0),
+            'full_bins': llena.sum(axis=0),
+            'first_empty': primero(vacia),
+            'first_full': primero(llena),
+            'empties': vacia.any(axis=0),
+            'fills': llena.any(axis=0),
+        }, index=self.stations)
@@ -0,0 +1,141 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .labels import station_codes
+
+
+class ODMatrix:
+    """Matriz dispersa origen–destino de viajes entre estaciones.
+
+    Las columnas station_unlock y station_lock se codifican con un mismo diccionario de
+    estaciones, y la matriz se guarda en formato de coordenadas (COO): solo las parejas
+    (origen, destino) con algún viaje, ordenadas, con su número de viajes y sus minutos totales.
+    Todas las consultas (flujos principales, grados de entrada y salida, desequilibrio) son
+    operaciones vectorizadas sobre esos arrays."""
+
+    def __init__(self, stations: pd.Index, origins: np.ndarray, destinations: np.ndarray,
+                 counts: np.ndarray, minutes: np.ndarray):
+        """
+        Inicializa la matriz a partir de sus arrays (ver `from_frame`).
+
+        Args:
+            stations (pd.Index): Estación correspondiente a cada código.
+            origins (np.ndarray): Código de la estación de origen de cada pareja.
+            destinations (np.ndarray): Código de la estación de destino de cada pareja.
+            counts (np.ndarray): Número de viajes de cada pareja.
+            minutes (np.ndarray): Minutos totales de cada pareja.
+        """
+        self.stations = stations
+        self.origins = origins
+        self.destinations = destinations
+        self.counts = counts
+        self.minutes = minutes
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, day=None, hour: Optional[int] = None,
+                   hours: Optional[np.ndarray] = None) -> "ODMatrix":
+        """
+        Construye la matriz a partir de los viajes, opcionalmente solo los de un día o una hora.
+        Los viajes sin estación de origen o de destino no se incluyen.
+
+        Args:
+            data (pd.DataFrame): Viajes con el formato de BiciMad.
+            day (optional): Día (fecha o texto 'AAAA-MM-DD') al que limitar la matriz.
+            hour (int, optional): Hora de desbloqueo (0 a 23) a la que limitar la matriz.
+            hours (np.ndarray, optional): Hora de desbloqueo de cada fila, si el índice ya no la
+                conserva (ver BiciMad.clean). Por defecto se toma del índice.
+
+        Returns:
+            ODMatrix: La matriz origen–destino.
+        """
+        mask = np.ones(len(data), dtype=bool)
+        if day is not None:
+            mask &= np.asarray(data.index.normalize() == pd.Timestamp(day))
+        if hour is not None:
+            if hours is None:
+                hours = data.index.hour.to_numpy(dtype=np.int64, na_value=-1)
+            mask &= np.asarray(hours) == hour
+
+        # Las etiquetas de las dos columnas pueden diferir para la misma estación ('1.0' y '1').
+        o, d, names = station_codes(data['station_unlock'][mask], data['station_lock'][mask])
+        order = np.argsort(names.astype(str), kind='stable')
+        rank = np.empty(len(order) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        rank[-1] = -1
+        o, d, stations = rank[o], rank[d], names[order]
+        keep = (o >= 0) & (d >= 0)
+        n = len(stations)
+
+        keys, inverse = np.unique(o[keep].astype(np.int64) * n + d[keep], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(keys))
+        minutes = np.bincount(inverse, weights=data['trip_minutes'].to_numpy(dtype=np.float64)[mask][keep],
+                              minlength=len(keys))
+        return cls(pd.Index(stations, name='station'), keys // max(n, 1), keys % max(n, 1), counts, minutes)
+
+    def __len__(self) -> int:
+        """Número de parejas (origen, destino) con algún viaje."""
+        return len(self.counts)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Devuelve la matriz como tabla larga, una fila por pareja con viajes.
+
+        Returns:
+            pd.DataFrame: Columnas 'origin', 'destination', 'total_usos' y 'trip_minutes'.
+        """
+        return pd.DataFrame({
+            'origin': self.stations[self.origins],
+            'destination': self.stations[self.destinations],
+            'total_usos': self.counts,
+            'trip_minutes': self.minutes,
+        })
+
+    def to_scipy(self, values: str = 'counts'):
+        """
+        Devuelve la matriz como `scipy.sparse.csr_matrix` de estaciones × estaciones.
+        Requiere el paquete opcional `scipy`.
+
+        Args:
+            values (str): "counts" (número de viajes) o "minutes" (minutos totales).
+        """
+        from scipy import sparse
+
+        n = len(self.stations)
+        data = self.counts if values == 'counts' else self.minutes
+        return sparse.csr_matrix((data, (self.origins, self.destinations)), shape=(n, n))
+
+    def top_k(self, k: int = 10, by: str = 'total_usos') -> pd.DataFrame:
+        """
+        Devuelve los `k` flujos (origen, destino) con más viajes o más minutos.
+
+        Args:
+            k (int): Número de flujos.
+            by (str): "total_usos" o "trip_minutes".
+
+        Returns:
+            pd.DataFrame: Los flujos ordenados de mayor a menor.
+        """
+        values = self.counts if by == 'total_usos' else self.minutes
+        k = min(k, len(values))
+        top = np.argpartition(-values, k - 1)[:k] if k else np.array([], dtype=np.int64)
+        top = top[np.argsort(-values[top], kind='stable')]
+        return self.to_frame().iloc[top].reset_index(drop=True)
+
+    def out_degree(self) -> pd.Series:
+        """Número de viajes que salen de cada estación."""
+        return pd.Series(np.bincount(self.origins, weights=self.counts, minlength=len(self.stations)).astype(np.int64),
+                         index=self.stations, name='salidas')
+
+    def in_degree(self) -> pd.Series:
+        """Número de viajes que llegan a cada estación."""
+        return pd.Series(np.bincount(self.destinations, weights=self.counts, minlength=len(self.stations)).astype(np.int64),
+                         index=self.stations, name='llegadas')
+
+    def imbalance(self) -> pd.Series:
+        """
+        Desequilibrio neto de cada estación: llegadas menos salidas. Un valor negativo indica
+        una estación que se vacía y uno positivo una que se llena.
+        """
+        return (self.in_degree() - self.out_degree()).rename('desequilibrio')
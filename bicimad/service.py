@@ -0,0 +1,289 @@
+"""
+Servicio HTTP local de consultas sobre BiciMAD.
+
+Mantiene en memoria los meses más usados como objetos BiciMad ya limpios y responde en JSON a
+las consultas de BiciMad. Se arranca con:
+
+    python -m bicimad.service --port 8000 --budget 4G
+
+y se consulta con, por ejemplo, GET /months/1/23/resume.
+"""
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+from .bicimad import BiciMad
+from .cache import ZipCache
+from .cli import to_json
+
+QUERIES = [
+    "resume", "day_time", "weekday_time", "total_usage_day", "total_usage_by_station_day",
+    "most_popular_stations", "usage_from_most_popular_station",
+]
+"""Consultas de BiciMad que expone el servicio."""
+
+DEFAULT_BUDGET = 2 * 1024 ** 3
+
+Key = Tuple[int, int]
+
+
+class _Entry:
+    """Mes cargado en el pool, con las respuestas ya serializadas de sus consultas."""
+
+    def __init__(self, bici: BiciMad):
+        self.bici = bici
+        self.size = int(bici.data.memory_usage(deep=True).sum())
+        self.responses: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def answer(self, query: str) -> str:
+        with self.lock:
+            if query not in self.responses:
+                self.responses[query] = to_json(getattr(self.bici, query)())
+            return self.responses[query]
+
+
+class MonthPool:
+    """Conjunto de meses cargados en memoria, con expulsión LRU bajo un presupuesto de RAM.
+
+    El tamaño de cada mes es el de su DataFrame (memory_usage(deep=True)). Al cargar un mes
+    nuevo se expulsan los usados hace más tiempo hasta volver a caber en el presupuesto; el mes
+    recién cargado no se expulsa nunca, aunque por sí solo lo supere. Si varios hilos piden a la
+    vez un mes que no está cargado, solo uno lo carga y el resto esperan a ese resultado."""
+
+    def __init__(self, budget: int = DEFAULT_BUDGET, loader: Optional[Callable[[int, int], BiciMad]] = None,
+                 cache: Optional[ZipCache] = None, compact: bool = False):
+        """
+        Args:
+            budget (int): Bytes de memoria que pueden ocupar en total los meses cargados.
+            loader (Callable[[int, int], BiciMad], optional): Función que carga y limpia un mes
+                (mes, año). Por defecto, BiciMad con la caché y el plan de tipos indicados.
+            cache (ZipCache, optional): Caché de ZIP del cargador por defecto.
+            compact (bool): Si True, el cargador por defecto usa el plan de tipos compacto.
+        """
+        self.budget = budget
+        self._loader = loader or (lambda month, year: self._load(month, year, cache, compact))
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._loading: Dict[Key, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.loads = self.evictions = 0
+
+    @staticmethod
+    def _load(month: int, year: int, cache: Optional[ZipCache], compact: bool) -> BiciMad:
+        bici = BiciMad(month, year, cache=cache, compact=compact)
+        bici.clean()
+        return bici
+
+    @property
+    def size(self) -> int:
+        """Bytes ocupados por los meses cargados."""
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    def months(self):
+        """Meses cargados como (mes, año), del usado hace más tiempo al más reciente."""
+        with self._lock:
+            return list(self._entries)
+
+    def _entry(self, month: int, year: int) -> _Entry:
+        key = (month, year)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+
+        if not owner:
+            return future.result()
+        try:
+            entry = _Entry(self._loader(month, year))
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self.loads += 1
+            self._entries[key] = entry
+            self._evict(keep=key)
+        future.set_result(entry)
+        return entry
+
+    def _evict(self, keep: Key):
+        total = sum(e.size for e in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.budget:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key).size
+            self.evictions += 1
+
+    def get(self, month: int, year: int) -> BiciMad:
+        """
+        Devuelve el mes indicado, cargándolo si no está en memoria.
+
+        Args:
+            month (int): Mes (1 a 12).
+            year (int): Año con dos cifras.
+
+        Returns:
+            BiciMad: Objeto con los datos del mes ya limpios.
+        """
+        return self._entry(month, year).bici
+
+    def query(self, month: int, year: int, query: str) -> str:
+        """
+        Ejecuta una consulta sobre un mes y devuelve su resultado en JSON. Cada respuesta se
+        serializa una sola vez mientras el mes siga cargado.
+
+        Args:
+            month (int): Mes (1 a 12).
+            year (int): Año con dos cifras.
+            query (str): Nombre de la consulta (ver QUERIES).
+
+        Returns:
+            str: El resultado en JSON.
+
+        Raises:
+            ValueError: Si la consulta no existe o el mes no está disponible.
+        """
+        if query not in QUERIES:
+            raise ValueError(f"Consulta desconocida: {query}")
+        return self._entry(month, year).answer(query)
+
+    def stats(self) -> dict:
+        """Estadísticas del pool: aciertos, fallos, cargas, expulsiones y meses en memoria."""
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "size": sum(e.size for e in self._entries.values()),
+                "months": [list(k) for k in self._entries],
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pool: MonthPool
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        if parts == ["queries"]:
+            return self._send(200, json.dumps(QUERIES))
+        if parts == ["stats"]:
+            return self._send(200, json.dumps(self.pool.stats()))
+        if len(parts) != 4 or parts[0] != "months" or not (parts[1].isdigit() and parts[2].isdigit()):
+            return self._send(404, json.dumps({"error": "Ruta no encontrada: use /months/<mes>/<año>/<consulta>"}))
+
+        month, year, query = int(parts[1]), int(parts[2]), parts[3]
+        try:
+            self._send(200, self.pool.query(month, year, query))
+        except ValueError as e:
+            self._send(404 if query in QUERIES else 400, json.dumps({"error": str(e)}))
+        except ConnectionError as e:
+            self._send(502, json.dumps({"error": str(e)}))
+
+
+class QueryService:
+    """Servidor HTTP que responde en JSON a las consultas sobre los meses de un MonthPool.
+
+    Rutas:
+    - GET /months/<mes>/<año>/<consulta>: resultado de la consulta (año con dos cifras).
+    - GET /queries: consultas disponibles.
+    - GET /stats: estadísticas del pool de meses."""
+
+    def __init__(self, pool: MonthPool, host: str = "127.0.0.1", port: int = 8000):
+        """
+        Args:
+            pool (MonthPool): Meses en memoria a los que se dirigen las consultas.
+            host (str): Dirección en la que escuchar.
+            port (int): Puerto; con 0 se elige uno libre.
+        """
+        handler = type("Handler", (_Handler,), {"pool": pool})
+        self.pool = pool
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL base del servicio."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def serve_forever(self):
+        """Atiende peticiones hasta que se llame a `shutdown`."""
+        self._server.serve_forever()
+
+    def start(self) -> "QueryService":
+        """Atiende peticiones en un hilo en segundo plano."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Detiene el servidor y libera el puerto."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "QueryService":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def _bytes(text: str) -> int:
+    """Convierte un tamaño como '512M' o '4G' en bytes."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de consultas sobre BiciMAD.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--budget", type=_bytes, default=DEFAULT_BUDGET,
+                        help="Memoria máxima para los meses cargados (por ejemplo, 512M o 4G).")
+    parser.add_argument("--compact", action="store_true", help="Cargar los meses con el plan de tipos compacto.")
+    args = parser.parse_args(argv)
+
+    service = QueryService(MonthPool(args.budget, cache=ZipCache(), compact=args.compact), args.host, args.port)
+    print(f"Sirviendo consultas en {service.url}")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Publicación de un mes ya cargado en memoria compartida para consultarlo desde varios procesos.
+
+`SharedMonth.publish` copia una vez las columnas de un objeto BiciMad en un único bloque de
+memoria compartida (o en un fichero proyectado en memoria) como arrays de NumPy:
+
+- Las columnas numéricas y de fechas se guardan tal cual.
+- Las de enteros con nulos (plan compacto) se guardan como valores más una máscara.
+- Las de texto y las categóricas se guardan como códigos enteros, con la tabla de etiquetas
+  en el descriptor.
+
+El descriptor (`SharedMonthHandle`) es pequeño y se envía a los procesos hijos en lugar de los
+datos. Allí `attach` reconstruye un objeto BiciMad cuyas columnas son vistas de solo lectura
+sobre el bloque compartido, sin copiar nada, y las consultas de BiciMad funcionan sobre él sin
+cambios. Así, N procesos consultando el mismo mes ocupan aproximadamente la memoria de un mes.
+
+El proceso que publica es el dueño del bloque: `close` (o salir del bloque `with`) lo libera, y
+si no se llama se libera al recolectar el objeto o al terminar el proceso. Los procesos hijos
+se desconectan con `detach` o al terminar, sin borrarlo.
+"""
+import atexit
+import mmap
+import os
+import tempfile
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .bicimad import BiciMad
+
+ALIGNMENT = 64
+"""Alineación en bytes del inicio de cada array dentro del bloque."""
+
+INDEX = "__index__"
+"""Nombre con el que se guarda el índice del DataFrame entre las columnas."""
+
+
+@dataclass(frozen=True)
+class _Array:
+    """Posición y tipo de un array dentro del bloque compartido."""
+    offset: int
+    dtype: str
+    length: int
+
+
+@dataclass(frozen=True)
+class _Column:
+    """Cómo reconstruir una columna a partir de sus arrays."""
+    kind: str  # 'plain', 'masked' o 'codes'
+    dtype: str
+    arrays: Tuple[_Array, ...]
+    categories: Optional[Tuple[Any, ...]] = None
+    ordered: bool = False
+
+
+@dataclass(frozen=True)
+class SharedMonthHandle:
+    """Descriptor serializable de un mes publicado: dónde está el bloque y cómo leerlo.
+
+    Attributes:
+        name (str): Nombre del bloque de memoria compartida, o ruta del fichero proyectado.
+        backend (str): 'shm' (memoria compartida) o 'file' (fichero proyectado en memoria).
+        size (int): Tamaño del bloque en bytes.
+        month (int): Mes de los datos.
+        year (int): Año de los datos.
+        columns (Tuple): Columnas del DataFrame, en orden, con su descripción.
+        index_name (str): Nombre del índice.
+        extras (Tuple): Arrays auxiliares de BiciMad (horas y fecha y hora de desbloqueo).
+    """
+    name: str
+    backend: str
+    size: int
+    month: int
+    year: int
+    columns: Tuple[Tuple[str, _Column], ...]
+    index_name: Optional[str]
+    extras: Tuple[Tuple[str, _Array], ...] = field(default=())
+
+
+def _narrow(codes: np.ndarray, n: int) -> np.ndarray:
+    """Códigos con el tipo entero que usa pandas para `n` categorías, para que no los copie."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return codes.astype(dtype, copy=False)
+    return codes.astype(np.int64, copy=False)
+
+
+def _encode(values: Union[pd.Series, pd.Index]) -> Tuple[str, str, List[np.ndarray], Optional[tuple], bool]:
+    """Descompone una columna en arrays de NumPy: (tipo, dtype, arrays, etiquetas, ordenada)."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = _narrow(np.asarray(pd.Categorical(values).codes), len(dtype.categories))
+        return 'codes', str(dtype), [codes], tuple(dtype.categories), bool(dtype.ordered)
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        return 'plain', str(dtype), [np.ascontiguousarray(values.to_numpy())], None, False
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, 'numpy_dtype') \
+            and dtype.kind in 'biuf':
+        # Enteros y decimales con nulos: valores y máscara, como los guarda pandas.
+        array = values.array
+        datos = array.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        return 'masked', str(dtype), [datos, np.asarray(array.isna())], None, False
+    # Textos: códigos enteros y tabla de etiquetas ordenada, para que las agrupaciones salgan en
+    # el mismo orden que sobre los textos (los nulos con el código -1).
+    codes, uniques = pd.factorize(values, sort=True)
+    return 'codes', str(dtype), [_narrow(codes, len(uniques))], tuple(np.asarray(uniques, dtype=object)), False
+
+
+def _decode(column: _Column, arrays: List[np.ndarray]):
+    """Reconstruye una columna sobre sus arrays, sin copiarlos."""
+    if column.kind == 'plain':
+        return arrays[0]
+    if column.kind == 'masked':
+        array_type = pd.api.types.pandas_dtype(column.dtype).construct_array_type()
+        return array_type(arrays[0], arrays[1], copy=False)
+    dtype = pd.CategoricalDtype(pd.Index(list(column.categories)), ordered=column.ordered)
+    return pd.Categorical.from_codes(arrays[0], dtype=dtype, validate=False)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _open_shm(name: str) -> shared_memory.SharedMemory:
+    """Se conecta a un bloque existente sin que el proceso lo borre al terminar."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registra siempre el bloque en el resource tracker, que lo borraría al
+        # terminar el proceso (o, si el tracker es el del padre, al terminar este).
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _Mapping:
+    """Bloque compartido abierto: memoria compartida o fichero proyectado en memoria."""
+
+    def __init__(self, backend: str, name: str, size: Optional[int] = None):
+        """Abre el bloque `name`, o lo crea con `size` bytes si se indica."""
+        create = size is not None
+        self.backend = backend
+        if backend == 'shm':
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1)) if create else _open_shm(name)
+            self.name = self._shm.name
+            self.buf = self._shm.buf
+        else:
+            self.name = name
+            with open(name, 'r+b' if create else 'rb') as f:
+                if create:
+                    f.truncate(max(size, 1))
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if create else mmap.ACCESS_READ)
+            self.buf = memoryview(self._mmap)
+
+    def array(self, spec: _Array, writable: bool = False) -> np.ndarray:
+        array = np.ndarray((spec.length,), dtype=np.dtype(spec.dtype), buffer=self.buf, offset=spec.offset)
+        array.flags.writeable = writable and array.flags.writeable
+        return array
+
+    def close(self):
+        """Deja de proyectar el bloque. Falla si aún hay arrays que lo usan (BufferError)."""
+        self.buf.release()
+        if self.backend == 'shm':
+            self._shm.close()
+        else:
+            self._mmap.close()
+
+    def unlink(self):
+        """Borra el bloque; los procesos que ya lo proyectan pueden seguir usándolo."""
+        if self.backend == 'shm':
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        else:
+            try:
+                os.remove(self.name)
+            except FileNotFoundError:
+                pass
+
+
+def _release(mapping: _Mapping, owner: bool):
+    """Libera un bloque al cerrar, recolectar o terminar el proceso."""
+    if owner:
+        mapping.unlink()
+    try:
+        mapping.close()
+    except BufferError:
+        # Aún hay vistas vivas sobre el bloque; el sistema lo libera al salir el proceso.
+        pass
+
+
+class SharedMonth:
+    """Mes de BiciMad publicado en memoria compartida (ver el módulo).
+
+    Se usa desde el proceso que tiene los datos cargados:
+
+        with SharedMonth.publish(bici) as compartido:
+            resultados = compartido.map(['resume', 'day_time'], workers=4)
+
+    o enviando `compartido.handle` a procesos propios, que llaman a `attach(handle)`."""
+
+    def __init__(self, handle: SharedMonthHandle, mapping: _Mapping):
+        self.handle = handle
+        self._mapping = mapping
+        self._finalizer = weakref.finalize(self, _release, mapping, True)
+
+    @classmethod
+    def publish(cls, bici: BiciMad, directory: Optional[Union[str, Path]] = None) -> "SharedMonth":
+        """
+        Copia las columnas de un mes cargado a un bloque compartido.
+
+        Args:
+            bici (BiciMad): Objeto con los datos del mes (en modo perezoso se cargan todas las columnas).
+            directory (str | Path, optional): Si se indica, el bloque es un fichero proyectado en
+                memoria dentro de este directorio (por ejemplo, en /dev/shm o en un disco local) en
+                lugar de un bloque de memoria compartida del sistema.
+
+        Returns:
+            SharedMonth: El mes publicado, dueño del bloque.
+        """
+        data = bici.data
+        partes: List[Tuple[str, str, str, List[np.ndarray], Optional[tuple], bool]] = []
+        for name, values in [(INDEX, data.index)] + list(data.items()):
+            partes.append((name,) + _encode(values))
+        extras = [(name, array) for name, array in (('hours', bici._hours), ('times', bici._times))
+                  if array is not None]
+
+        offset = 0
+        specs: List[_Array] = []
+        for array in [a for parte in partes for a in parte[3]] + [a for _, a in extras]:
+            offset = _align(offset)
+            specs.append(_Array(offset, array.dtype.str, len(array)))
+            offset += array.nbytes
+
+        columnas, i = [], 0
+        for name, kind, dtype, arrays, categories, ordered in partes:
+            columnas.append((name, _Column(kind, dtype, tuple(specs[i:i + len(arrays)]), categories, ordered)))
+            i += len(arrays)
+        if directory is not None:
+            fd, path = tempfile.mkstemp(dir=directory, prefix=f'bicimad_{bici._year:02d}_{bici._month:02d}_')
+            os.close(fd)
+            backend, name = 'file', path
+        else:
+            backend, name = 'shm', ''
+        mapping = _Mapping(backend, name, size=offset)
+        handle = SharedMonthHandle(mapping.name, backend, offset, bici._month, bici._year, tuple(columnas),
+                                   data.index.name, tuple((n, s) for (n, _), s in zip(extras, specs[i:])))
+
+        arrays = [a for parte in partes for a in parte[3]] + [a for _, a in extras]
+        for spec, array in zip(specs, arrays):
+            mapping.array(spec, writable=True)[:] = array
+        return cls(handle, mapping)
+
+    def attach(self) -> BiciMad:
+        """Objeto BiciMad sobre el bloque, en este mismo proceso y sin copiar los datos."""
+        return _build(self.handle, self._mapping)
+
+    def map(self, queries: Sequence[Union[str, Tuple[str, tuple]]], workers: Optional[int] = None) -> List[Any]:
+        """
+        Ejecuta consultas de BiciMad sobre el mes en un pool de procesos. Cada proceso se conecta
+        al bloque una sola vez, sin recibir los datos.
+
+        Args:
+            queries (Sequence): Nombres de métodos de BiciMad, o tuplas (nombre, argumentos).
+            workers (int, optional): Número de procesos. Por defecto, uno por núcleo.
+
+        Returns:
+            List: Resultado de cada consulta, en el mismo orden.
+        """
+        consultas = [(q, ()) if isinstance(q, str) else (q[0], tuple(q[1])) for q in queries]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run_query, [self.handle] * len(consultas), *zip(*consultas)))
+
+    def close(self):
+        """Borra el bloque compartido. Los procesos que ya lo usan siguen teniéndolo hasta terminar."""
+        self._finalizer()
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    def __enter__(self) -> "SharedMonth":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _build(handle: SharedMonthHandle, mapping: _Mapping) -> BiciMad:
+    """Reconstruye el objeto BiciMad sobre un bloque ya abierto."""
+    columnas = {}
+    for name, column in handle.columns:
+        columnas[name] = _decode(column, [mapping.array(spec) for spec in column.arrays])
+    index = pd.Index(columnas.pop(INDEX), name=handle.index_name, copy=False)
+    data = pd.DataFrame(columnas, index=index, copy=False)
+    bici = BiciMad.from_data(data, handle.month, handle.year)
+    extras = {name: mapping.array(spec) for name, spec in handle.extras}
+    bici._hours = extras.get('hours')
+    bici._times = extras.get('times')
+    # El objeto mantiene abierto el bloque mientras viva.
+    bici._shared = mapping
+    return bici
+
+
+_attached: Dict[str, Tuple[BiciMad, _Mapping]] = {}
+"""Meses ya conectados en este proceso, con su bloque proyectado, por nombre de bloque."""
+
+
+def attach(handle: SharedMonthHandle) -> BiciMad:
+    """
+    Conecta este proceso a un mes publicado y devuelve un objeto BiciMad sobre él, sin copiar los
+    datos. Las columnas son de solo lectura. Cada bloque se conecta una sola vez por proceso, y
+    se desconecta con `detach` o al terminar el proceso.
+
+    Args:
+        handle (SharedMonthHandle): Descriptor del mes (`SharedMonth.handle`).
+
+    Returns:
+        BiciMad: Objeto con los datos del mes.
+    """
+    entry = _attached.get(handle.name)
+    if entry is None:
+        mapping = _Mapping(handle.backend, handle.name)
+        entry = _attached[handle.name] = (_build(handle, mapping), mapping)
+    return entry[0]
+
+
+def detach(handle: SharedMonthHandle):
+    """
+    Desconecta este proceso de un mes conectado con `attach`; el siguiente `attach` crea otro
+    objeto. El bloque se deja de proyectar en el acto si ya no quedan vistas sobre él y, si no,
+    en cuanto desaparece la última. No se borra, porque pertenece a quien lo publicó.
+    """
+    entry = _attached.pop(handle.name, None)
+    if entry is not None:
+        mapping = entry[1]
+        del entry
+        _release(mapping, False)
+
+
+def _detach_all():
+    """Desconecta al terminar el proceso los meses que sigan conectados."""
+    while _attached:
+        _, mapping = _attached.popitem()[1]
+        _release(mapping, False)
+
+
+def run_query(handle: SharedMonthHandle, query: str, args: tuple = ()) -> Any:
+    """Ejecuta una consulta de BiciMad sobre un mes publicado. Pensada para procesos hijos."""
+    return getattr(attach(handle), query)(*args)
+
+
+atexit.register(_detach_all)
@@ -0,0 +1,558 @@
+"""
+Resúmenes aproximados (sketches) de tamaño fijo para consultas de popularidad sobre muchos meses.
+
+Cada resumen se alimenta por bloques con `update`, se combina con otro del mismo tipo y tamaño
+con `merge` y se serializa con `to_bytes` / `from_bytes`. Su memoria no depende del número de
+viajes, así que un ranking de varios años se obtiene combinando los resúmenes guardados de cada
+mes (ver `bicimad.ingest.AggregateStore.sketch`) sin volver a leer ningún CSV.
+
+- SpaceSaving: elementos más frecuentes (estaciones y rutas), con una cota de error por elemento.
+- CountMinSketch: frecuencia aproximada de cualquier elemento, nunca por debajo de la real.
+- HyperLogLog: número aproximado de elementos distintos (bicicletas).
+"""
+import io
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _hash64(values) -> np.ndarray:
+    """Hash de 64 bits, estable entre ejecuciones, de cada valor (textos o números)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Número de bits significativos de cada entero sin signo de 64 bits (0 para el 0)."""
+    def bits32(x):
+        # frexp es exacto para enteros de hasta 53 bits.
+        return np.where(x > 0, np.frexp(x.astype(np.float64))[1], 0)
+
+    high = values >> np.uint64(32)
+    low = values & np.uint64(0xFFFFFFFF)
+    return np.where(high > 0, 32 + bits32(high), bits32(low))
+
+
+def _dump(arrays: Dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _load(data: bytes) -> Dict[str, np.ndarray]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+def _label_codes(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Etiqueta de texto de cada identificador, independiente del tipo con que se haya leído la
+    columna en cada bloque: los números enteros se escriben sin decimales ('12', no '12.0').
+    Se calcula sobre los valores distintos y se devuelve como (código de cada fila, etiquetas),
+    con -1 para los nulos.
+    """
+    codes, uniques = pd.factorize(pd.Series(values))
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    numeric = pd.to_numeric(uniques, errors='coerce')
+    entero = numeric.notna() & (numeric == np.floor(numeric))
+    texto = uniques.astype(str)
+    texto[entero] = numeric[entero].astype('int64').astype(str)
+    texto[uniques.isna() | (texto == '')] = np.nan
+    # Valores distintos pueden compartir etiqueta ('5' y 5.0).
+    merged, labels = pd.factorize(texto)
+    merged = np.append(merged, -1)
+    return merged[codes], np.asarray(labels, dtype=object)
+
+
+class SpaceSaving:
+    """Elementos más frecuentes con el algoritmo Space-Saving, en versión combinable.
+
+    Mantiene como mucho `capacity` contadores. Cada contador sobrestima la frecuencia real de
+    su elemento como mucho en `error`, y cualquier elemento no vigilado aparece como mucho
+    `error_bound` veces, que a su vez no supera total / capacity. Un bloque se incorpora como un
+    resumen exacto y dos resúmenes se combinan sumando los contadores comunes y asignando a los
+    elementos que solo vigila uno de ellos el mínimo del otro (su frecuencia máxima posible);
+    después se conservan los `capacity` contadores mayores."""
+
+    def __init__(self, capacity: int = 256):
+        """
+        Args:
+            capacity (int): Número máximo de contadores.
+        """
+        if capacity < 1:
+            raise ValueError("capacity debe ser positivo")
+        self.capacity = capacity
+        self.total = 0
+        self._counts = pd.Series(dtype='int64')
+        self._errors = pd.Series(dtype='int64')
+
+    @property
+    def error_bound(self) -> int:
+        """Frecuencia máxima de un elemento no vigilado, y sobrestimación máxima de cualquiera."""
+        return int(self._counts.min()) if len(self._counts) >= self.capacity else 0
+
+    def _absorb(self, counts: pd.Series, errors: pd.Series, floor: int, total: int):
+        """Combina con otro resumen cuyos elementos no vigilados aparecen como mucho `floor` veces."""
+        mine = self.error_bound
+        union = self._counts.index.union(counts.index)
+        self._counts = (self._counts.reindex(union, fill_value=mine)
+                        + counts.reindex(union, fill_value=floor)).astype('int64')
+        self._errors = (self._errors.reindex(union, fill_value=mine)
+                        + errors.reindex(union, fill_value=floor)).astype('int64')
+        self.total += total
+        if len(self._counts) > self.capacity:
+            keep = np.argsort(-self._counts.to_numpy(), kind='stable')[:self.capacity]
+            self._counts = self._counts.iloc[keep]
+            self._errors = self._errors.iloc[keep]
+
+    def update(self, values):
+        """
+        Incorpora un bloque de elementos; los valores nulos se ignoran.
+
+        Args:
+            values (array-like): Elementos del bloque, uno por aparición.
+        """
+        self.update_counts(pd.Series(values).value_counts(dropna=True))
+
+    def update_counts(self, counts: pd.Series):
+        """
+        Incorpora un bloque ya contado.
+
+        Args:
+            counts (pd.Series): Número de apariciones de cada elemento del bloque.
+        """
+        counts = counts.astype('int64')
+        total, floor = int(counts.sum()), 0
+        if len(counts) > self.capacity:
+            # El bloque se reduce antes a un resumen de la misma capacidad: los elementos que se
+            # descartan aparecen como mucho tantas veces como el primero de ellos.
+            counts = counts.iloc[np.argsort(-counts.to_numpy(), kind='stable')]
+            floor = int(counts.iloc[self.capacity])
+            counts = counts.iloc[:self.capacity]
+        self._absorb(counts, pd.Series(0, index=counts.index, dtype='int64'), floor, total)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Combina en este resumen otro de la misma capacidad.
+
+        Returns:
+            SpaceSaving: Este mismo resumen.
+        """
+        if other.capacity != self.capacity:
+            raise ValueError("Solo se pueden combinar resúmenes SpaceSaving de la misma capacidad")
+        self._absorb(other._counts, other._errors, other.error_bound, other.total)
+        return self
+
+    def top(self, k: Optional[int] = None) -> pd.DataFrame:
+        """
+        Los `k` elementos con mayor frecuencia estimada, de mayor a menor.
+
+        Args:
+            k (int, optional): Número de elementos; por defecto, todos los vigilados.
+
+        Returns:
+            pd.DataFrame: Índice = elementos; columnas 'count' (estimación, nunca por debajo de
+            la real), 'error' (sobrestimación máxima), 'lower' (frecuencia mínima garantizada) y
+            'guaranteed' (True si el elemento está seguro entre los `k` más frecuentes).
+        """
+        order = np.argsort(-self._counts.to_numpy(), kind='stable')
+        counts, errors = self._counts.iloc[order], self._errors.iloc[order]
+        k = len(counts) if k is None else k
+        lower = counts - errors
+        # Un elemento está seguro entre los k primeros si su mínimo supera el máximo posible de
+        # cualquier elemento fuera de ellos, vigilado o no.
+        outside = max(int(counts.iloc[k]) if len(counts) > k else 0, self.error_bound)
+        top = pd.DataFrame({'count': counts, 'error': errors, 'lower': lower, 'guaranteed': lower >= outside})
+        return top.head(k)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {'keys': self._counts.index.to_numpy(dtype=str), 'counts': self._counts.to_numpy(),
+                'errors': self._errors.to_numpy(), 'params': np.array([self.capacity, self.total])}
+
+    @classmethod
+    def _from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "SpaceSaving":
+        capacity, total = (int(v) for v in arrays['params'])
+        sketch = cls(capacity)
+        sketch.total = total
+        index = pd.Index(arrays['keys'].astype(object))
+        sketch._counts = pd.Series(arrays['counts'], index=index, dtype='int64')
+        sketch._errors = pd.Series(arrays['errors'], index=index, dtype='int64')
+        return sketch
+
+    def to_bytes(self) -> bytes:
+        """Serializa el resumen (ver `from_bytes`)."""
+        return _dump(self._arrays())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpaceSaving":
+        """Reconstruye un resumen serializado con `to_bytes`."""
+        return cls._from_arrays(_load(data))
+
+
+class CountMinSketch:
+    """Frecuencia aproximada de cualquier elemento con un Count-Min sketch.
+
+    Una tabla de `depth` filas por `width` columnas; cada elemento suma en una columna de cada
+    fila y su estimación es el mínimo de esas celdas. Nunca queda por debajo de la frecuencia
+    real y, con probabilidad al menos 1 - exp(-depth), la supera como mucho en
+    e / width * total (`error_bound`)."""
+
+    def __init__(self, width: int = 2719, depth: int = 5):
+        """
+        Args:
+            width (int): Columnas de la tabla; el error relativo es e / width.
+            depth (int): Filas de la tabla; la probabilidad de superar la cota es exp(-depth).
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width y depth deben ser positivos")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    @classmethod
+    def from_error(cls, epsilon: float, delta: float) -> "CountMinSketch":
+        """Sketch con error relativo `epsilon` y probabilidad de superarlo `delta`."""
+        return cls(int(np.ceil(np.e / epsilon)), int(np.ceil(np.log(1 / delta))))
+
+    @property
+    def error_bound(self) -> float:
+        """Sobrestimación máxima con probabilidad 1 - exp(-depth)."""
+        return np.e / self.width * self.total
+
+    def _columns(self, keys) -> np.ndarray:
+        """Columna de cada elemento en cada fila, de forma (depth, elementos), por doble hash."""
+        h = _hash64(keys)
+        h1 = h & np.uint64(0xFFFFFFFF)
+        h2 = (h >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, values):
+        """
+        Incorpora un bloque de elementos; los valores nulos se ignoran.
+
+        Args:
+            values (array-like): Elementos del bloque, uno por aparición.
+        """
+        self.update_counts(pd.Series(values).value_counts(dropna=True))
+
+    def update_counts(self, counts: pd.Series):
+        """
+        Incorpora un bloque ya contado.
+
+        Args:
+            counts (pd.Series): Número de apariciones de cada elemento del bloque.
+        """
+        columns = self._columns(counts.index)
+        weights = counts.to_numpy(dtype=np.int64)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=weights, minlength=self.width).astype(np.int64)
+        self.total += int(weights.sum())
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """Combina en este sketch otro de las mismas dimensiones. Devuelve este mismo sketch."""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Solo se pueden combinar sketches Count-Min de las mismas dimensiones")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def estimate(self, keys) -> np.ndarray:
+        """
+        Frecuencia estimada de cada elemento.
+
+        Args:
+            keys (array-like): Elementos a consultar.
+
+        Returns:
+            np.ndarray: Estimaciones, en el mismo orden.
+        """
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {'table': self.table, 'params': np.array([self.total])}
+
+    @classmethod
+    def _from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "CountMinSketch":
+        depth, width = arrays['table'].shape
+        sketch = cls(width, depth)
+        sketch.table = arrays['table'].astype(np.int64)
+        sketch.total = int(arrays['params'][0])
+        return sketch
+
+    def to_bytes(self) -> bytes:
+        """Serializa el sketch (ver `from_bytes`)."""
+        return _dump(self._arrays())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        """Reconstruye un sketch serializado con `to_bytes`."""
+        return cls._from_arrays(_load(data))
+
+
+class HyperLogLog:
+    """Número aproximado de elementos distintos con HyperLogLog.
+
+    Guarda 2 ** precision registros de un byte con el máximo número de ceros iniciales visto en
+    los hashes de cada registro. El error relativo típico es 1.04 / sqrt(2 ** precision)
+    (`relative_error`), un 0.8 % con la precisión por defecto, en 16 KiB."""
+
+    def __init__(self, precision: int = 14):
+        """
+        Args:
+            precision (int): Bits del hash que eligen el registro, entre 4 y 18.
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError("precision debe estar entre 4 y 18")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Error relativo típico (una desviación estándar) de `count`."""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        """
+        Incorpora un bloque de elementos; los valores nulos se ignoran.
+
+        Args:
+            values (array-like): Elementos del bloque, repetidos o no.
+        """
+        uniques = pd.Series(pd.unique(pd.Series(values).dropna().to_numpy()))
+        if not len(uniques):
+            return
+        h = _hash64(uniques)
+        rest_bits = 64 - self.precision
+        index = (h >> np.uint64(rest_bits)).astype(np.int64)
+        rest = h & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Combina en este sketch otro de la misma precisión. Devuelve este mismo sketch."""
+        if other.precision != self.precision:
+            raise ValueError("Solo se pueden combinar sketches HyperLogLog de la misma precisión")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        """Estimación del número de elementos distintos vistos."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para cardinalidades pequeñas: conteo lineal de registros vacíos.
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {'registers': self.registers}
+
+    @classmethod
+    def _from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "HyperLogLog":
+        registers = arrays['registers']
+        sketch = cls(int(np.log2(len(registers))))
+        sketch.registers = registers.astype(np.uint8)
+        return sketch
+
+    def to_bytes(self) -> bytes:
+        """Serializa el sketch (ver `from_bytes`)."""
+        return _dump(self._arrays())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Reconstruye un sketch serializado con `to_bytes`."""
+        return cls._from_arrays(_load(data))
+
+
+class MonthSketch:
+    """Resúmenes aproximados de uno o varios meses, de tamaño fijo y combinables.
+
+    Es la versión aproximada de `MonthAccumulator` para las consultas de popularidad: se alimenta
+    con los mismos bloques (ver `BiciMad.aggregate`) y mantiene los totales exactos, un
+    SpaceSaving de direcciones de desbloqueo y otro de rutas (estación de desbloqueo, estación de
+    bloqueo), un Count-Min de rutas para consultar cualquier ruta y un HyperLogLog de bicicletas.
+    Su tamaño es el mismo para un mes que para varios años, de modo que un ranking plurianual se
+    obtiene combinando los resúmenes de cada mes con `merge`.
+
+    Las estaciones de las rutas se etiquetan con su número sin decimales ('12')."""
+
+    ROUTE_SEPARATOR = '→'
+
+    def __init__(self, month: Optional[int] = None, year: Optional[int] = None, capacity: int = 256,
+                 route_capacity: int = 1024, width: int = 2719, depth: int = 5, precision: int = 14):
+        """
+        Inicializa unos resúmenes vacíos.
+
+        Args:
+            month (int, optional): Mes de los datos, para `resume`.
+            year (int, optional): Año de los datos, para `resume`.
+            capacity (int): Contadores del SpaceSaving de direcciones.
+            route_capacity (int): Contadores del SpaceSaving de rutas.
+            width (int): Columnas del Count-Min de rutas.
+            depth (int): Filas del Count-Min de rutas.
+            precision (int): Precisión del HyperLogLog de bicicletas.
+        """
+        self.month = month
+        self.year = year
+        self.total_uses = 0
+        self.total_minutes = 0.0
+        self.stations = SpaceSaving(capacity)
+        self.routes = SpaceSaving(route_capacity)
+        self.route_counts = CountMinSketch(width, depth)
+        self.bikes = HyperLogLog(precision)
+
+    def _route_counts(self, unlock, lock) -> pd.Series:
+        """Viajes de cada ruta, contados sobre códigos enteros y etiquetados solo al final."""
+        code_unlock, labels_unlock = _label_codes(unlock)
+        code_lock, labels_lock = _label_codes(lock)
+        valid = (code_unlock >= 0) & (code_lock >= 0)
+        pairs = pd.Series(code_unlock[valid] * len(labels_lock) + code_lock[valid]).value_counts()
+        origen, destino = np.divmod(pairs.index.to_numpy(), len(labels_lock))
+        keys = pd.Index(labels_unlock[origen] + self.ROUTE_SEPARATOR + labels_lock[destino])
+        return pd.Series(pairs.to_numpy(), index=keys)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Incorpora un bloque de filas.
+
+        Args:
+            chunk (pd.DataFrame): Bloque con índice unlock_date y las columnas de BiciMad.COLUMNS.
+        """
+        chunk = chunk.dropna(how='all')
+        self.total_uses += len(chunk)
+        self.total_minutes += float(chunk['trip_minutes'].astype('float64').sum())
+        self.stations.update(chunk['address_unlock'])
+        routes = self._route_counts(chunk['station_unlock'], chunk['station_lock'])
+        self.routes.update_counts(routes)
+        self.route_counts.update_counts(routes)
+        self.bikes.update(_label_codes(chunk['idBike'])[1])
+
+    def merge(self, other: "MonthSketch") -> "MonthSketch":
+        """
+        Combina en estos resúmenes los de otro con los mismos tamaños.
+
+        Returns:
+            MonthSketch: Estos mismos resúmenes.
+        """
+        if (self.month, self.year) != (other.month, other.year):
+            self.month = self.year = None
+        self.total_uses += other.total_uses
+        self.total_minutes += other.total_minutes
+        self.stations.merge(other.stations)
+        self.routes.merge(other.routes)
+        self.route_counts.merge(other.route_counts)
+        self.bikes.merge(other.bikes)
+        return self
+
+    def _popular(self) -> pd.Series:
+        counts = self.stations.top(3)['count']
+        counts.index.name = 'address_unlock'
+        counts.name = 'count'
+        return counts
+
+    def resume(self) -> pd.Series:
+        """Equivalente aproximado a BiciMad.resume: los totales son exactos y la estación más popular, aproximada."""
+        top = self.stations.top()
+        max_count = int(top['count'].iloc[0])
+        return pd.Series({
+            'year': self.year,
+            'month': self.month,
+            'total_uses': self.total_uses,
+            'total_time': self.total_minutes / 60,
+            'most_popular_station': set(top.index[top['count'] == max_count]),
+            'uses_from_most_popular': max_count
+        })
+
+    def most_popular_stations(self) -> set:
+        """Equivalente aproximado a BiciMad.most_popular_stations."""
+        return set(self._popular().index)
+
+    def usage_from_most_popular_station(self) -> pd.Series:
+        """Equivalente aproximado a BiciMad.usage_from_most_popular_station (cotas en `top_stations`)."""
+        return self._popular()
+
+    def top_stations(self, k: int = 10) -> pd.DataFrame:
+        """
+        Direcciones de desbloqueo más usadas, con sus cotas de error (ver `SpaceSaving.top`).
+
+        Returns:
+            pd.DataFrame: Índice = address_unlock; columnas 'count', 'error', 'lower' y 'guaranteed'.
+        """
+        top = self.stations.top(k)
+        top.index.name = 'address_unlock'
+        return top
+
+    def top_routes(self, k: int = 10) -> pd.DataFrame:
+        """
+        Rutas más frecuentes, con sus cotas de error (ver `SpaceSaving.top`).
+
+        Returns:
+            pd.DataFrame: Índice = (station_unlock, station_lock); columnas 'count', 'error',
+            'lower' y 'guaranteed'.
+        """
+        top = self.routes.top(k)
+        pairs = [key.split(self.ROUTE_SEPARATOR, 1) for key in top.index]
+        top.index = pd.MultiIndex.from_tuples(pairs, names=['station_unlock', 'station_lock']) if pairs else \
+            pd.MultiIndex.from_arrays([[], []], names=['station_unlock', 'station_lock'])
+        return top
+
+    def route_count(self, station_unlock, station_lock) -> Tuple[int, float]:
+        """
+        Viajes aproximados de una ruta cualquiera, esté o no entre las más frecuentes.
+
+        Returns:
+            Tuple[int, float]: Estimación (nunca por debajo del valor real) y sobrestimación
+            máxima con probabilidad 1 - exp(-depth).
+        """
+        key = self._route_counts([station_unlock], [station_lock]).index
+        return int(self.route_counts.estimate(key)[0]) if len(key) else 0, self.route_counts.error_bound
+
+    def distinct_bikes(self) -> int:
+        """Número aproximado de bicicletas distintas (error relativo típico en `error_bounds`)."""
+        return int(round(self.bikes.count()))
+
+    def error_bounds(self) -> pd.Series:
+        """
+        Cotas de error de las estimaciones.
+
+        Returns:
+            pd.Series: 'station_error' y 'route_error' (sobrestimación máxima de cualquier
+            dirección o ruta en los rankings), 'route_count_error' (la de `route_count`, con
+            probabilidad 'route_count_confidence') y 'bikes_relative_error'.
+        """
+        return pd.Series({
+            'station_error': self.stations.error_bound,
+            'route_error': self.routes.error_bound,
+            'route_count_error': self.route_counts.error_bound,
+            'route_count_confidence': 1 - np.exp(-self.route_counts.depth),
+            'bikes_relative_error': self.bikes.relative_error,
+        })
+
+    def to_bytes(self) -> bytes:
+        """Serializa los resúmenes en un único bloque de bytes (ver `from_bytes`)."""
+        arrays = {'totals': np.array([self.total_uses, self.total_minutes], dtype=np.float64),
+                  'period': np.array([-1 if v is None else v for v in (self.month, self.year)])}
+        for name in ('stations', 'routes', 'route_counts', 'bikes'):
+            for key, value in getattr(self, name)._arrays().items():
+                arrays[f'{name}.{key}'] = value
+        return _dump(arrays)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MonthSketch":
+        """Reconstruye unos resúmenes serializados con `to_bytes`."""
+        arrays = _load(data)
+        month, year = (None if v < 0 else int(v) for v in arrays['period'])
+        sketch = cls(month, year)
+        sketch.total_uses = int(arrays['totals'][0])
+        sketch.total_minutes = float(arrays['totals'][1])
+        for name, kind in (('stations', SpaceSaving), ('routes', SpaceSaving),
+                           ('route_counts', CountMinSketch), ('bikes', HyperLogLog)):
+            prefix = f'{name}.'
+            parts = {k[len(prefix):]: v for k, v in arrays.items() if k.startswith(prefix)}
+            setattr(sketch, name, kind._from_arrays(parts))
+        return sketch
@@ -0,0 +1,273 @@
+import hashlib
+import io
+import mmap
+import os
+import re
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+import requests
+
+from . import instrument
+from .UrlEMT import UrlEMT
+from .cache import ZipCache
+from .catalog import MonthCatalog
+from .transport import get_transport
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def open_csv_member(zip_file: Union[str, Path, BinaryIO]) -> BinaryIO:
+    """
+    Abre en binario el primer CSV de un ZIP. El resultado se descomprime a medida que se lee y
+    puede pasarse directamente a `pd.read_csv`, que decodifica el texto por su cuenta.
+
+    Args:
+        zip_file (str | Path | BinaryIO): Ruta del ZIP o fichero binario con su contenido.
+
+    Returns:
+        BinaryIO: El CSV sin descomprimir por adelantado.
+
+    Raises:
+        ValueError: Si el archivo ZIP no contiene un CSV.
+    """
+    archive = zipfile.ZipFile(zip_file)
+    csv_files = [f for f in archive.namelist() if f.lower().endswith('.csv')]
+    if not csv_files:
+        archive.close()
+        raise ValueError("El ZIP no contiene archivos CSV")
+    return archive.open(csv_files[0])
+
+
+def map_file(path: Union[str, Path]) -> BinaryIO:
+    """
+    Proyecta un fichero en memoria (mmap) en modo lectura, de modo que el parser lee
+    directamente de la caché de páginas del sistema sin copiarlo. Los ficheros vacíos se
+    abren normalmente, porque no se pueden proyectar.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return io.BytesIO(b"")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _MemoryReader(io.RawIOBase):
+    """Fichero binario de solo lectura sobre un búfer en memoria, sin copiarlo."""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def _open_bytes(data: Union[bytes, bytearray, memoryview]) -> BinaryIO:
+    """Abre un ZIP o un CSV en memoria sin copiar su contenido."""
+    # BytesIO comparte el objeto bytes mientras no se escriba en él; el resto de búferes se leen
+    # a través de una memoryview.
+    buffer = io.BytesIO(data) if isinstance(data, bytes) else io.BufferedReader(_MemoryReader(data))
+    if bytes(memoryview(data)[:4]) == ZIP_MAGIC:
+        return open_csv_member(buffer)
+    return buffer
+
+
+class DataSource(ABC):
+    """Origen de los ficheros mensuales de viajes de la EMT.
+
+    `open` devuelve siempre un flujo binario con el texto del CSV, listo para `pd.read_csv`,
+    sin pasar por una cadena de Python intermedia. Las fuentes de un solo fichero (una URL, un
+    ZIP o CSV local, un búfer en memoria) ignoran el mes y el año; las de un archivo completo
+    (el portal de la EMT, un directorio espejo) eligen el fichero del mes pedido."""
+
+    @abstractmethod
+    def open(self, month: Optional[int] = None, year: Optional[int] = None) -> BinaryIO:
+        """
+        Abre el CSV de viajes del mes indicado.
+
+        Args:
+            month (int, optional): Mes (1 a 12).
+            year (int, optional): Año con dos cifras.
+
+        Returns:
+            BinaryIO: El CSV en binario.
+        """
+
+    def check(self, month: Optional[int] = None, year: Optional[int] = None):
+        """
+        Comprueba, sin leer los datos, que la fuente tiene el mes indicado. Lanza ValueError si no
+        lo tiene; por defecto no comprueba nada.
+        """
+
+    @abstractmethod
+    def identity(self, month: Optional[int] = None, year: Optional[int] = None) -> str:
+        """
+        Identidad del fichero de origen del mes, que cambia si cambia su contenido. La usa
+        ColumnarStore para saber si un mes guardado sigue vigente.
+        """
+
+    def months(self) -> List[Tuple[int, int]]:
+        """Meses disponibles como (año, mes), si la fuente los conoce; por defecto, ninguno."""
+        return []
+
+
+class RemoteSource(DataSource):
+    """Portal de datos abiertos de la EMT, a través de UrlEMT (y de su caché, si se indica)."""
+
+    def __init__(self, cache: Optional[ZipCache] = None, stream: bool = False):
+        """
+        Args:
+            cache (ZipCache, optional): Caché en disco de los ZIP.
+            stream (bool): Si True, sin caché los ZIP se descargan por bloques a un fichero temporal.
+        """
+        self.cache = cache
+        self.stream = stream
+
+    def open(self, month: Optional[int] = None, year: Optional[int] = None) -> BinaryIO:
+        enlaces = UrlEMT(self.cache)
+        with instrument.stage('get_csv') as etapa:
+            zip_file = enlaces.get_zip(month, year, stream=self.stream)
+            etapa.bytes = enlaces.bytes_downloaded
+        return open_csv_member(zip_file)
+
+    def check(self, month: Optional[int] = None, year: Optional[int] = None):
+        UrlEMT(self.cache).get_url(month, year)
+
+    def identity(self, month: Optional[int] = None, year: Optional[int] = None) -> str:
+        return UrlEMT(self.cache).source_id(month, year)
+
+    def months(self) -> List[Tuple[int, int]]:
+        return UrlEMT(self.cache).available_months()
+
+
+class UrlSource(DataSource):
+    """Un único ZIP o CSV remoto, dado por su URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def open(self, month: Optional[int] = None, year: Optional[int] = None) -> BinaryIO:
+        try:
+            with instrument.stage('get_csv') as etapa:
+                response = get_transport().get(self.url)
+                response.raise_for_status()
+                etapa.bytes = len(response.content)
+        except requests.RequestException as e:
+            raise ConnectionError(f"Error al conectar con el servidor de la EMT: {e}")
+        return _open_bytes(response.content)
+
+    def identity(self, month: Optional[int] = None, year: Optional[int] = None) -> str:
+        return self.url
+
+
+def _file_identity(path: Path) -> str:
+    stat = path.stat()
+    return f"file:{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class FileSource(DataSource):
+    """Un único fichero local, ZIP o CSV. Los CSV se leen proyectados en memoria (mmap)."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def open(self, month: Optional[int] = None, year: Optional[int] = None) -> BinaryIO:
+        if zipfile.is_zipfile(self.path):
+            return open_csv_member(self.path)
+        return map_file(self.path)
+
+    def identity(self, month: Optional[int] = None, year: Optional[int] = None) -> str:
+        return _file_identity(self.path)
+
+
+class MirrorSource(DataSource):
+    """Directorio espejo con los ficheros mensuales de la EMT.
+
+    Reconoce los nombres de la EMT (trips_AA_MM_Mes-csv.zip) y sus CSV ya descomprimidos
+    (trips_AA_MM_Mes.csv), en el directorio o en sus subdirectorios. Si un mes está de las dos
+    formas, se prefiere el CSV, que se lee proyectado en memoria a velocidad de disco."""
+
+    CSV_PATTERN = re.compile(r'trips_(\d{2})_(\d{2})_[A-Za-z]+\.csv$')
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def _files(self) -> Dict[Tuple[int, int], Path]:
+        zips = MonthCatalog.parse(str(p) for p in self.directory.rglob("*.zip"))
+        csvs = {}
+        for path in self.directory.rglob("*.csv"):
+            match = self.CSV_PATTERN.search(path.name)
+            if match:
+                csvs[(int(match.group(1)), int(match.group(2)))] = str(path)
+        return {key: Path(p) for key, p in {**zips, **csvs}.items()}
+
+    def path(self, month: int, year: int) -> Path:
+        """
+        Devuelve el fichero del mes indicado.
+
+        Raises:
+            ValueError: Si el mes no está en el directorio.
+        """
+        path = self._files().get((year, month))
+        if path is None:
+            raise ValueError(f"No hay datos de {month:02d}/{year:02d} en {self.directory}")
+        return path
+
+    def open(self, month: Optional[int] = None, year: Optional[int] = None) -> BinaryIO:
+        return FileSource(self.path(month, year)).open()
+
+    def check(self, month: Optional[int] = None, year: Optional[int] = None):
+        self.path(month, year)
+
+    def identity(self, month: Optional[int] = None, year: Optional[int] = None) -> str:
+        return _file_identity(self.path(month, year))
+
+    def months(self) -> List[Tuple[int, int]]:
+        return sorted(self._files())
+
+
+class BufferSource(DataSource):
+    """Un ZIP o CSV ya cargado en memoria (bytes, bytearray o memoryview), que no se copia."""
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self.data = data
+
+    def open(self, month: Optional[int] = None, year: Optional[int] = None) -> BinaryIO:
+        return _open_bytes(self.data)
+
+    def identity(self, month: Optional[int] = None, year: Optional[int] = None) -> str:
+        return "sha256:" + hashlib.sha256(self.data).hexdigest()
+
+
+def as_source(source: Union[DataSource, str, Path, bytes, bytearray, memoryview]) -> DataSource:
+    """
+    Convierte en DataSource lo que se pase como origen de datos: una fuente ya construida, una
+    URL http(s), la ruta de un fichero ZIP o CSV, la de un directorio espejo o un búfer en memoria.
+    """
+    if isinstance(source, DataSource):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BufferSource(source)
+    if isinstance(source, str) and source.startswith(("http://", "https://")):
+        return UrlSource(source)
+    path = Path(source)
+    return MirrorSource(path) if path.is_dir() else FileSource(path)
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnarStore:
+    """Almacén en disco de meses ya limpios en formato columnar binario (Parquet o Feather).
+
+    Cada mes se guarda en un fichero `trips_YY_MM.<formato>` junto a un fichero JSON con la
+    identidad del ZIP de origen y, si se indican, arrays auxiliares alineados con las filas
+    (como las horas de desbloqueo que BiciMad conserva al limpiar) en ficheros `.npy`. Al cargar, si la identidad no coincide con la del ZIP actual
+    el fichero se considera obsoleto y se ignora. Ambos formatos conservan los tipos de las
+    columnas y el índice, y permiten leer solo un subconjunto de columnas.
+
+    Requiere el paquete opcional `pyarrow`."""
+
+    FORMATS = ("parquet", "feather")
+
+    def __init__(self, directory: Union[str, Path], format: str = "parquet"):
+        """
+        Inicializa el almacén en el directorio indicado, creándolo si no existe.
+
+        Args:
+            directory (str | Path): Directorio del almacén.
+            format (str): "parquet" o "feather".
+
+        Raises:
+            ValueError: Si el formato no está soportado.
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"Formato no soportado: {format}")
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self.format = format
+
+    def path(self, month: int, year: int) -> Path:
+        """Ruta del fichero de datos del mes y año indicados."""
+        return self._dir / f"trips_{year:02d}_{month:02d}.{self.format}"
+
+    def _meta_path(self, month: int, year: int) -> Path:
+        return self._dir / f"trips_{year:02d}_{month:02d}.json"
+
+    def source(self, month: int, year: int) -> Optional[str]:
+        """
+        Devuelve la identidad del ZIP de origen con la que se guardó el mes, o None si no está.
+        """
+        try:
+            with open(self._meta_path(month, year), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("format") != self.format or not self.path(month, year).exists():
+            return None
+        return meta["source"]
+
+    def _extra_path(self, month: int, year: int, name: str) -> Path:
+        return self._dir / f"trips_{year:02d}_{month:02d}.{name}.npy"
+
+    def save(self, df: pd.DataFrame, month: int, year: int, source: str,
+             extras: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Guarda el DataFrame del mes indicado junto con la identidad de su ZIP de origen.
+
+        Args:
+            df (pd.DataFrame): Datos del mes, normalmente ya limpios.
+            month (int): Mes de los datos.
+            year (int): Año de los datos.
+            source (str): Identidad del ZIP de origen (ver UrlEMT.source_id).
+            extras (Dict[str, np.ndarray], optional): Arrays auxiliares, uno por fila de `df`, que
+                se guardan aparte y se recuperan con `extras`.
+        """
+        path = self.path(month, year)
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=f".{self.format}")
+        os.close(fd)
+        if self.format == "parquet":
+            df.to_parquet(tmp)
+        else:
+            # Feather no guarda el índice: se guarda como una columna más
+            df.reset_index().to_feather(tmp)
+        os.replace(tmp, path)
+
+        extras = extras or {}
+        for name, array in extras.items():
+            fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.asarray(array))
+            os.replace(tmp, self._extra_path(month, year, name))
+
+        meta = {"source": source, "format": self.format, "index": df.index.name, "extras": sorted(extras)}
+        with open(self._meta_path(month, year), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def extras(self, month: int, year: int) -> Dict[str, np.ndarray]:
+        """
+        Devuelve los arrays auxiliares guardados con el mes (ver `save`); {} si no hay o el mes no está.
+        """
+        if self.source(month, year) is None:
+            return {}
+        with open(self._meta_path(month, year), encoding="utf-8") as f:
+            names = json.load(f).get("extras", [])
+        return {name: np.load(self._extra_path(month, year, name)) for name in names}
+
+    def load(self, month: int, year: int, source: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Carga el mes indicado si está guardado y su identidad de origen coincide.
+
+        Args:
+            month (int): Mes de los datos.
+            year (int): Año de los datos.
+            source (str, optional): Identidad esperada del ZIP de origen. Si es None no se comprueba.
+            columns (List[str], optional): Columnas a leer. El índice se lee siempre.
+
+        Returns:
+            pd.DataFrame | None: Los datos del mes, o None si no están o han quedado obsoletos.
+        """
+        stored = self.source(month, year)
+        if stored is None or (source is not None and stored != source):
+            return None
+
+        path = self.path(month, year)
+        if self.format == "parquet":
+            return pd.read_parquet(path, columns=columns)
+
+        with open(self._meta_path(month, year), encoding="utf-8") as f:
+            name = json.load(f)["index"]
+        index = name or "index"
+        if columns is not None:
+            columns = [index] + [c for c in columns if c != index]
+        df = pd.read_feather(path, columns=columns).set_index(index)
+        df.index.name = name
+        return df
@@ -0,0 +1,223 @@
+import threading
+import time
+from typing import BinaryIO, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .download import ProgressCallback, iter_chunks
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_ssl_ready = False
+
+
+def _setup_ssl():
+    """
+    Hace que las conexiones HTTPS usen los certificados del sistema (truststore), si está
+    instalado. Se ejecuta una sola vez, al crear la primera sesión propia, y no al importar el
+    paquete, para que los procesos que no usan la red no paguen su coste.
+    """
+    global _ssl_ready
+    if _ssl_ready:
+        return
+    _ssl_ready = True
+    try:
+        import truststore
+    except ImportError:
+        return
+    truststore.inject_into_ssl()
+
+
+class Transport:
+    """Capa de transporte HTTP que usan UrlEMT, ZipCache y BiciEMT.
+
+    Comparte una única sesión de requests con un pool de conexiones, aplica un timeout a cada
+    petición, reintenta con espera exponencial los fallos de red y las respuestas 429/5xx,
+    reanuda las descargas interrumpidas con cabeceras Range y limita el número de descargas
+    simultáneas. Se puede sustituir con `set_transport`, por ejemplo para apuntar los tests a
+    un servidor local o a una sesión simulada."""
+
+    def __init__(self, session: Optional[requests.Session] = None, timeout=(10, 60), retries: int = 5,
+                 backoff: float = 0.5, max_concurrent: int = 4, pool_size: int = 16):
+        """
+        Inicializa el transporte.
+
+        Args:
+            session (requests.Session, optional): Sesión a usar. Por defecto se crea una con un pool
+                de `pool_size` conexiones por servidor.
+            timeout (float | Tuple[float, float]): Timeout de conexión y de lectura de cada petición.
+            retries (int): Número de reintentos tras el primer intento fallido.
+            backoff (float): Espera inicial entre reintentos en segundos; se duplica en cada uno.
+            max_concurrent (int): Número máximo de descargas simultáneas.
+            pool_size (int): Conexiones que se mantienen abiertas por servidor.
+        """
+        if session is None:
+            _setup_ssl()
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _wait(self, attempt: int):
+        time.sleep(self.backoff * 2 ** attempt)
+
+    @staticmethod
+    def _retryable(error: requests.RequestException) -> bool:
+        return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                                  requests.exceptions.ChunkedEncodingError))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Hace una petición GET con timeout y reintentos. Las respuestas 429/5xx se reintentan; el
+        resto de respuestas, incluidos otros errores HTTP, se devuelven tal cual.
+
+        Args:
+            url (str): URL a pedir.
+            **kwargs: Argumentos adicionales de `requests.Session.get` (headers, stream...).
+
+        Returns:
+            requests.Response: La respuesta del servidor.
+
+        Raises:
+            requests.RequestException: Si se agotan los reintentos.
+        """
+        return self._request("get", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        """
+        Hace una petición HEAD, con el mismo timeout y los mismos reintentos que `get`, para
+        consultar las cabeceras de un fichero sin descargarlo.
+
+        Args:
+            url (str): URL a consultar.
+            **kwargs: Argumentos adicionales de `requests.Session.head`.
+
+        Returns:
+            requests.Response: La respuesta del servidor, sin cuerpo.
+
+        Raises:
+            requests.RequestException: Si se agotan los reintentos.
+        """
+        kwargs.setdefault("allow_redirects", True)
+        return self._request("head", url, **kwargs)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Un único intento de la petición, sin reintentos."""
+        kwargs.setdefault("timeout", self.timeout)
+        return getattr(self.session, method)(url, **kwargs)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._send(method, url, **kwargs)
+            except requests.RequestException as e:
+                if attempt == self.retries or not self._retryable(e):
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                if attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+            self._wait(attempt)
+
+    def download(self, url: str, fileobj: BinaryIO, headers: Optional[dict] = None,
+                 progress: Optional[ProgressCallback] = None) -> requests.Response:
+        """
+        Descarga por bloques el contenido de una URL en un fichero binario vacío. Si la conexión se
+        corta a mitad, se reintenta pidiendo solo los bytes que faltan (Range), condicionado con
+        If-Range al ETag o Last-Modified de la primera respuesta para no mezclar dos versiones del
+        fichero; si el servidor no admite rangos, el fichero ha cambiado o no hay con qué validarlo,
+        la descarga vuelve a empezar desde cero. Los fallos de red y las respuestas 429/5xx
+        comparten el mismo presupuesto de `retries` reintentos.
+
+        Args:
+            url (str): URL a descargar.
+            fileobj (BinaryIO): Fichero de destino, vacío y posicionado al principio.
+            headers (dict, optional): Cabeceras adicionales, por ejemplo de revalidación.
+            progress (ProgressCallback, optional): Función que recibe (bytes descargados, total esperado).
+
+        Returns:
+            requests.Response: La respuesta con la que empezó el contenido descargado (su estado
+                puede ser 304 si se han enviado cabeceras de revalidación y el contenido no ha cambiado).
+
+        Raises:
+            requests.RequestException: Si se agotan los reintentos o el servidor responde con error.
+        """
+        written = 0
+        first = None
+        with self._slots:
+            for attempt in range(self.retries + 1):
+                request_headers = dict(headers or {})
+                validator = _validator(first) if first is not None else None
+                if written and validator:
+                    request_headers["Range"] = f"bytes={written}-"
+                    request_headers["If-Range"] = validator
+                response = None
+                try:
+                    response = self._send("get", url, headers=request_headers, stream=True)
+                    if response.status_code == 304:
+                        return response
+                    if response.status_code in RETRYABLE_STATUS and attempt < self.retries:
+                        response.close()
+                        self._wait(attempt)
+                        continue
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        # Respuesta completa: a partir de ella se valida cualquier reanudación.
+                        first = response
+                    if written and response.status_code != 206:
+                        fileobj.seek(0)
+                        fileobj.truncate()
+                        written = 0
+
+                    def report(done, total, offset=written):
+                        progress(offset + done, offset + total if total is not None else None)
+
+                    for chunk in iter_chunks(response, report if progress is not None else None):
+                        fileobj.write(chunk)
+                        written += len(chunk)
+                    return first
+                except requests.RequestException as e:
+                    if response is not None:
+                        response.close()
+                    if attempt == self.retries or not self._retryable(e):
+                        raise
+                    self._wait(attempt)
+
+
+def _validator(response: requests.Response) -> Optional[str]:
+    """Valor de If-Range para reanudar la descarga de `response`: su ETag fuerte o su Last-Modified."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+_default: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Devuelve el transporte compartido del proceso, creándolo la primera vez."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Transport()
+        return _default
+
+
+def set_transport(transport: Optional[Transport]):
+    """
+    Sustituye el transporte compartido del proceso. Con None se vuelve a crear uno por defecto
+    la próxima vez que se necesite.
+    """
+    global _default
+    with _default_lock:
+        _default = transport
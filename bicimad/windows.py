@@ -0,0 +1,204 @@
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _bounds(times: np.ndarray, start, end) -> Tuple[int, int]:
+    """Posiciones de los viajes con start <= hora < end en un array de horas ordenado."""
+    lo = 0 if start is None else np.searchsorted(times, np.datetime64(pd.Timestamp(start)), 'left')
+    hi = len(times) if end is None else np.searchsorted(times, np.datetime64(pd.Timestamp(end)), 'left')
+    return int(lo), int(max(lo, hi))
+
+
+class TripTimeline:
+    """Índice temporal ordenado de los viajes para consultas sobre ventanas de tiempo arbitrarias.
+
+    Guarda las horas de desbloqueo ordenadas y la suma acumulada de los minutos de uso en ese
+    orden, globalmente y por estación de desbloqueo (cada estación ocupa un tramo contiguo). El
+    número de viajes y los minutos de cualquier intervalo [inicio, fin) se obtienen con dos
+    búsquedas binarias y una resta, en O(log n), sin recorrer ni enmascarar la tabla de viajes.
+    Los viajes sin hora de desbloqueo no se indexan; los que no tienen estación solo cuentan en
+    las consultas globales."""
+
+    def __init__(self, times: np.ndarray, minutes: np.ndarray, stations: pd.Index,
+                 station_times: np.ndarray, station_minutes: np.ndarray, offsets: np.ndarray):
+        """
+        Inicializa el índice a partir de sus arrays (ver `from_frame`).
+
+        Args:
+            times (np.ndarray): Horas de desbloqueo ordenadas (datetime64).
+            minutes (np.ndarray): Suma acumulada de minutos en ese orden, con un 0 inicial.
+            stations (pd.Index): Estaciones de desbloqueo.
+            station_times (np.ndarray): Horas ordenadas por (estación, hora).
+            station_minutes (np.ndarray): Suma acumulada de minutos en ese orden, con un 0 inicial.
+            offsets (np.ndarray): Inicio del tramo de cada estación, más el final del último.
+        """
+        self.times = times
+        self._minutes = minutes
+        self.stations = stations
+        self._station_times = station_times
+        self._station_minutes = station_minutes
+        self._offsets = offsets
+        self._positions = {s: i for i, s in enumerate(stations)}
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, times: Optional[np.ndarray] = None) -> "TripTimeline":
+        """
+        Construye el índice a partir de un DataFrame con el formato de BiciMad.
+
+        Args:
+            data (pd.DataFrame): Viajes con columnas 'trip_minutes' y 'station_unlock'.
+            times (np.ndarray, optional): Hora de desbloqueo de cada fila. Por defecto se toma del
+                índice, que debe conservar la hora (es decir, no estar normalizado).
+
+        Returns:
+            TripTimeline: El índice construido.
+        """
+        times = np.asarray(data.index if times is None else times, dtype='datetime64[ns]')
+        minutes = np.nan_to_num(data['trip_minutes'].to_numpy(dtype=np.float64, na_value=np.nan))
+        valid = ~np.isnat(times)
+        times, minutes = times[valid], minutes[valid]
+        codes, stations = pd.factorize(data['station_unlock'][valid], sort=True)
+
+        order = np.argsort(times, kind='stable')
+        by_station = np.lexsort((times, codes))
+        by_station = by_station[codes[by_station] >= 0]
+        offsets = np.searchsorted(codes[by_station], np.arange(len(stations) + 1))
+        return cls(times[order], np.concatenate([[0.0], np.cumsum(minutes[order])]),
+                   pd.Index(stations, name='station_unlock'), times[by_station],
+                   np.concatenate([[0.0], np.cumsum(minutes[by_station])]), offsets)
+
+    def _segment(self, station) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Horas, minutos acumulados y posición inicial de una estación, o de todos los viajes."""
+        if station is None:
+            return self.times, self._minutes, 0
+        i = self._positions.get(station)
+        if i is None:
+            raise ValueError(f"Estación desconocida: {station}")
+        lo, hi = self._offsets[i], self._offsets[i + 1]
+        return self._station_times[lo:hi], self._station_minutes, int(lo)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def trips(self, start=None, end=None, station=None) -> int:
+        """
+        Número de viajes desbloqueados en [start, end).
+
+        Args:
+            start (optional): Inicio del intervalo (Timestamp o texto); por defecto, sin límite.
+            end (optional): Fin del intervalo, excluido; por defecto, sin límite.
+            station (optional): Estación de desbloqueo; por defecto, todas.
+
+        Returns:
+            int: Número de viajes.
+        """
+        times, _, _ = self._segment(station)
+        lo, hi = _bounds(times, start, end)
+        return int(hi - lo)
+
+    def minutes(self, start=None, end=None, station=None) -> float:
+        """Minutos de uso de los viajes desbloqueados en [start, end) (mismos argumentos que `trips`)."""
+        times, cum, base = self._segment(station)
+        lo, hi = _bounds(times, start, end)
+        return float(cum[base + hi] - cum[base + lo])
+
+    def window(self, start=None, end=None, station=None) -> pd.Series:
+        """
+        Resumen de los viajes desbloqueados en [start, end).
+
+        Returns:
+            pd.Series: Serie de tipo object con 'trips' (número de viajes, entero) y 'hours'
+            (horas de uso).
+        """
+        return pd.Series({'trips': self.trips(start, end, station),
+                          'hours': self.minutes(start, end, station) / 60}, dtype=object)
+
+    def rolling(self, window='60min', freq='15min', start=None, end=None, station=None) -> pd.DataFrame:
+        """
+        Demanda en una ventana deslizante: para cada instante t de una rejilla regular, los viajes
+        y minutos de uso desbloqueados en [t - window, t).
+
+        Args:
+            window (str | Timedelta): Longitud de la ventana (por ejemplo, '30min').
+            freq (str | Timedelta): Separación entre instantes de la rejilla.
+            start (optional): Primer instante; por defecto, el del primer viaje redondeado a `freq`.
+            end (optional): Último instante; por defecto, el del último viaje redondeado a `freq`.
+            station (optional): Estación de desbloqueo; por defecto, todas.
+
+        Returns:
+            pd.DataFrame: DataFrame con índice = instantes y columnas 'trips' y 'minutes'.
+        """
+        times, cum, base = self._segment(station)
+        window = pd.Timedelta(window)
+        if start is None:
+            start = pd.Timestamp(times[0]).floor(freq) if len(times) else pd.Timestamp(0)
+        if end is None:
+            end = pd.Timestamp(times[-1]).ceil(freq) if len(times) else pd.Timestamp(start)
+        grid = pd.date_range(start, end, freq=freq, name='hora')
+        hi = np.searchsorted(times, grid.to_numpy(dtype='datetime64[ns]'), 'left')
+        lo = np.searchsorted(times, (grid - window).to_numpy(dtype='datetime64[ns]'), 'left')
+        return pd.DataFrame({'trips': hi - lo, 'minutes': cum[base + hi] - cum[base + lo]}, index=grid)
+
+    @staticmethod
+    def _peak(times: np.ndarray, window: np.timedelta64, limit: Optional[np.ndarray] = None) -> Tuple[int, int]:
+        """
+        Ventana de longitud `window` con más viajes en un tramo ordenado. Basta con considerar
+        las ventanas que empiezan en un viaje. Devuelve (posición del primer viaje, número de viajes).
+        """
+        if not len(times):
+            return -1, 0
+        ends = times + window
+        if limit is not None:
+            ends = np.minimum(ends, limit)
+        counts = np.searchsorted(times, ends, 'left') - np.arange(len(times))
+        i = int(np.argmax(counts))
+        return i, int(counts[i])
+
+    def peak_windows(self, window='60min', by: Optional[str] = 'day') -> pd.DataFrame:
+        """
+        Ventana de longitud `window` con más viajes desbloqueados, por día, por estación o en
+        todo el periodo. Las ventanas por día no pasan de la medianoche. En caso de empate se
+        devuelve la más temprana.
+
+        Args:
+            window (str | Timedelta): Longitud de la ventana (por ejemplo, '15min').
+            by (str, optional): 'day', 'station' o None para el periodo completo.
+
+        Returns:
+            pd.DataFrame: DataFrame con índice = días, estaciones o una sola fila, y columnas
+            'start', 'end' y 'trips'.
+        """
+        if by not in ('day', 'station', None):
+            raise ValueError("by debe ser 'day', 'station' o None")
+        delta = pd.Timedelta(window).to_timedelta64()
+        filas = []
+
+        def pico(tramo, limit=None):
+            i, n = self._peak(tramo, delta, limit)
+            if i < 0:
+                return pd.NaT, pd.NaT, 0
+            end = tramo[i] + delta if limit is None else min(tramo[i] + delta, limit)
+            return pd.Timestamp(tramo[i]), pd.Timestamp(end), n
+
+        if by == 'station':
+            index = self.stations
+            for i in range(len(self.stations)):
+                filas.append(pico(self._station_times[self._offsets[i]:self._offsets[i + 1]]))
+        elif by == 'day':
+            days = self.times.astype('datetime64[D]')
+            index = pd.DatetimeIndex(np.unique(days), name='fecha')
+            bounds = np.searchsorted(days, index.to_numpy(dtype='datetime64[D]'), 'left').tolist() + [len(days)]
+            for lo, hi, day in zip(bounds[:-1], bounds[1:], index):
+                filas.append(pico(self.times[lo:hi], (day + pd.Timedelta(days=1)).to_datetime64()))
+        else:
+            index = pd.Index(['total'])
+            filas.append(pico(self.times))
+
+        starts, ends, trips = zip(*filas) if filas else ((), (), ())
+        return pd.DataFrame({
+            'start': pd.DatetimeIndex(starts),
+            'end': pd.DatetimeIndex(ends),
+            'trips': np.array(trips, dtype=np.int64),
+        }, index=index)
@@ -1,10 +1,55 @@
 # tests/conftest.py
 
+import hashlib
+
 import pytest
 import truststore
 
+from tests.helpers import FakeResponse, make_zip
+
 
 @pytest.fixture(scope="session", autouse=True)
 def activate_ssl_truststore():
     """Activa truststore para todo el entorno de tests antes de que se ejecuten."""
     truststore.inject_into_ssl()
+
+
+class FakeEMT:
+    """Servidor de la EMT simulado: sirve ZIPs registrados en memoria y cuenta las descargas."""
+
+    BASE = "https://emt.test/luis/bicimad/"
+
+    def __init__(self):
+        self.files = {}
+        self.downloads = 0
+
+    def add(self, month: int, year: int, csv_text: str) -> str:
+        url = f"{self.BASE}trips_{year:02d}_{month:02d}_Month-csv.zip"
+        self.files[url] = make_zip(csv_text)
+        return url
+
+    def _response(self, url):
+        content = self.files[url]
+        return FakeResponse(content, etag=f'"{hashlib.sha256(content).hexdigest()[:16]}"')
+
+    def get(self, url, headers=None, **kwargs):
+        self.downloads += 1
+        return self._response(url)
+
+    def head(self, url, **kwargs):
+        response = self._response(url)
+        response.content = b""
+        return response
+
+
+@pytest.fixture
+def fake_emt(monkeypatch):
+    """Sustituye la red por un servidor de la EMT simulado."""
+    from bicimad import transport
+    from bicimad.UrlEMT import UrlEMT
+    from bicimad.catalog import MonthCatalog
+
+    emt = FakeEMT()
+    monkeypatch.setattr(UrlEMT, "_shared_catalog", MonthCatalog(lambda: set(emt.files)))
+    monkeypatch.setattr(transport, "_default", transport.Transport(session=emt, retries=0))
+    return emt
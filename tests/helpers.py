@@ -0,0 +1,94 @@
+"""Utilidades compartidas por los tests que simulan el servidor de la EMT."""
+import io
+import zipfile
+
+import requests
+
+
+def make_zip(text: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("trips_23_01_January.csv", text)
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, content: bytes, status_code: int = 200, etag: str = '"v1"'):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {"ETag": etag, "Content-Length": str(len(content))}
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+
+class FakeSession:
+    """Sesión HTTP simulada para `Transport`: delega cada GET en una función."""
+
+    def __init__(self, get):
+        self.get = get
+
+
+STATIONS = [
+    ("1", "Puerta del Sol", "Calle Alcalá nº 2", -3.7018, 40.4172),
+    ("2", "Miguel Moya", "Calle Miguel Moya nº 1", -3.7058, 40.4205),
+    ("3", "Plaza Conde Suchil", "Plaza del Conde del Valle de Súchil nº 3", -3.7069, 40.4302),
+    ("4", "Malasaña", "Calle Manuela Malasaña nº 5", -3.7025, 40.4285),
+    ("5", "Fuencarral", "Calle Fuencarral nº 108", -3.7020, 40.4283),
+]
+
+HEADER = [
+    "date", "idBike", "fleet", "trip_minutes", "geolocation_unlock", "address_unlock",
+    "unlock_date", "locktype", "unlocktype", "geolocation_lock", "address_lock", "lock_date",
+    "station_unlock", "dock_unlock", "unlock_station_name", "station_lock", "dock_lock",
+    "lock_station_name",
+]
+
+
+def trips_csv(rows: int = 60, seed: int = 0, year: int = 2023, month: int = 1) -> str:
+    """Genera un CSV sintético con el esquema de los ficheros de viajes de la EMT."""
+    import random
+
+    rng = random.Random(seed)
+    lines = [";".join(HEADER)]
+    for i in range(rows):
+        origin = STATIONS[rng.randrange(len(STATIONS))]
+        dest = STATIONS[rng.randrange(len(STATIONS))]
+        day = rng.randint(1, 28)
+        hour, minute = rng.randrange(24), rng.randrange(60)
+        minutes = round(rng.uniform(1, 40), 2)
+        end_minute = minute + int(minutes)
+        unlock = f"{year}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:00"
+        lock = f"{year}-{month:02d}-{day:02d}T{hour:02d}:{min(end_minute, 59):02d}:30"
+        no_station = i % 17 == 5
+        lines.append(";".join([
+            f"{year}-{month:02d}-{day:02d}",
+            str(rng.randint(1000, 1010)),
+            str(rng.choice([1, 2])),
+            str(minutes),
+            "{'type': 'Point', 'coordinates': [%s, %s]}" % (origin[3], origin[4]),
+            origin[2],
+            unlock,
+            "STATION",
+            "STATION",
+            "{'type': 'Point', 'coordinates': [%s, %s]}" % (dest[3], dest[4]),
+            dest[2],
+            lock,
+            "" if no_station else origin[0],
+            "1",
+            origin[1],
+            dest[0],
+            "2",
+            dest[1],
+        ]))
+    return "\n".join(lines) + "\n"
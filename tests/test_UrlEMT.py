@@ -1,6 +1,9 @@
 import pytest
 
+from bicimad import transport
 from bicimad.UrlEMT import UrlEMT
+from bicimad.catalog import MonthCatalog
+from tests.helpers import FakeResponse, FakeSession, make_zip
 
 
 # HTML de prueba simulado
@@ -52,3 +55,19 @@ def test_get_csv_real():
     assert isinstance(content, str)
     assert len(content) > 0
     assert "start_date" in content or "id" in content.lower()
+
+
+def test_get_csv_stream(monkeypatch):
+    url = "https://emt/luis/bicimad/trips_23_01_January-csv.zip"
+    content = make_zip("idBike;fleet\n1;1\n" * 1000)
+    monkeypatch.setattr(UrlEMT, "_shared_catalog", MonthCatalog(lambda: {url}))
+    session = FakeSession(lambda *a, **k: FakeResponse(content))
+    monkeypatch.setattr(transport, "_default", transport.Transport(session=session, retries=0))
+
+    progress = []
+    url_emt = UrlEMT()
+    csv_file = url_emt.get_csv(1, 23, stream=True, progress=lambda done, total: progress.append((done, total)))
+
+    assert csv_file.readline() == "idBike;fleet\n"
+    assert url_emt.bytes_downloaded == len(content)
+    assert progress[-1] == (len(content), len(content))
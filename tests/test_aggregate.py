@@ -0,0 +1,57 @@
+import io
+
+import pandas as pd
+import pytest
+
+from bicimad.aggregate import MonthAccumulator
+from bicimad.bicimad import BiciMad
+from tests.helpers import trips_csv
+
+QUERIES = [
+    "day_time", "weekday_time", "total_usage_day", "total_usage_by_station_day",
+    "usage_from_most_popular_station",
+]
+
+
+@pytest.fixture
+def month(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=500))
+    bici = BiciMad(1, 23)
+    bici.clean()
+    return bici
+
+
+@pytest.mark.parametrize("chunksize", [7, 100, 10_000])
+def test_chunked_matches_in_memory(month, chunksize):
+    acc = BiciMad.aggregate(1, 23, chunksize=chunksize)
+
+    for query in QUERIES:
+        result, expected = getattr(acc, query)(), getattr(month, query)()
+        pd.testing.assert_series_equal(result, expected)
+    pd.testing.assert_series_equal(acc.resume(), month.resume())
+    assert acc.most_popular_stations() == month.most_popular_stations()
+
+
+def test_merge_is_equivalent_to_single_pass(month):
+    whole = BiciMad.aggregate(1, 23)
+    chunks = pd.read_csv(io.StringIO(trips_csv(rows=500)), sep=";", usecols=BiciMad.COLUMNS,
+                         index_col="unlock_date", parse_dates=["unlock_date"],
+                         dtype={"station_unlock": str}, chunksize=200)
+    merged = MonthAccumulator(1, 23)
+    for chunk in chunks:
+        part = MonthAccumulator(1, 23)
+        part.update(chunk)
+        merged.merge(part)
+
+    assert merged.total_uses == whole.total_uses
+    pd.testing.assert_series_equal(merged.total_usage_by_station_day(), whole.total_usage_by_station_day())
+    pd.testing.assert_series_equal(merged.weekday_time(), whole.weekday_time())
+
+
+def test_empty_accumulator_returns_empty_series(month):
+    empty = MonthAccumulator(1, 23)
+
+    for query in ["day_time", "weekday_time", "total_usage_day", "total_usage_by_station_day"]:
+        result, expected = getattr(empty, query)(), getattr(month, query)()
+        pd.testing.assert_series_equal(result, expected.iloc[:0] if query != "weekday_time" else expected * 0,
+                                       check_index_type=False)
@@ -0,0 +1,42 @@
+import io
+import zipfile
+
+import pandas as pd
+
+from benchmarks.run import QUERIES, bench_size
+from benchmarks.server import LocalEMT
+from benchmarks.synthetic import HEADER, generate_trips, write_month_zip
+from bicimad.UrlEMT import UrlEMT
+from bicimad.bicimad import BiciMad
+
+
+def test_generate_trips_schema_and_determinism():
+    text = "".join(generate_trips(1000, month=2, year=2023, seed=1, chunk_rows=300))
+
+    assert text.splitlines()[0].split(";") == HEADER
+    assert text == "".join(generate_trips(1000, month=2, year=2023, seed=1, chunk_rows=300))
+    df = BiciMad.read_csv(io.StringIO(text))
+    assert len(df) == 1000
+    assert df.index.min() >= pd.Timestamp("2023-02-01")
+    assert df.index.max() < pd.Timestamp("2023-03-01")
+
+
+def test_local_emt_serves_months(tmp_path):
+    original = UrlEMT.EMT
+    with LocalEMT(tmp_path) as server:
+        path = write_month_zip(server.files, 500, month=3, year=2023)
+        server.write_index()
+        assert zipfile.ZipFile(path).namelist() == ["trips_23_03_March.csv"]
+
+        bici = BiciMad(3, 23)
+        assert len(bici.data) == 500
+    assert UrlEMT.EMT == original
+
+
+def test_bench_size_measures_every_stage(tmp_path):
+    results = bench_size(2000, tmp_path, memory=False)
+    stages = [r.stage for r in results]
+
+    assert {"get_links", "get_csv", "get_data", "clean"} <= set(stages)
+    assert set(QUERIES) <= set(stages)
+    assert all(r.seconds >= 0 and r.peak_mb is None for r in results)
@@ -1,10 +1,13 @@
+import io
+
 import pandas as pd
 import pytest
 
 from bicimad.bicimad import BiciMad
+from tests.helpers import trips_csv
 
 
-def test_constructor_invalid_month_year():
+def test_constructor_invalid_month_year(fake_emt):
     with pytest.raises(ValueError):
         BiciMad(0, 22)
     with pytest.raises(ValueError):
@@ -15,6 +18,12 @@ def test_constructor_invalid_month_year():
         BiciMad(5, 24)
 
 
+def test_constructor_accepts_any_published_year(fake_emt):
+    fake_emt.add(1, 24, trips_csv(rows=10, year=2024))
+    assert len(BiciMad(1, 24).data) == 10
+    assert len(BiciMad(1, 24, lazy=True).data) == 10
+
+
 def test_get_data_structure():
     bici = BiciMad(7, 21)  # Julio 2021 (usa un mes con datos seguros)
     df = bici.data
@@ -124,3 +133,83 @@ def test_usage_from_most_popular_station(sample_bicimad):
     result = sample_bicimad.usage_from_most_popular_station()
     assert isinstance(result, pd.Series)
     assert result.iloc[0] == 3  # Estación A tiene 3 usos
+
+
+def test_compact_dtypes_keep_query_results(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=300))
+    plain = BiciMad(1, 23)
+    compact = BiciMad(1, 23, compact=True)
+    assert compact.data.memory_usage(deep=True).sum() < plain.data.memory_usage(deep=True).sum() / 2
+    assert compact.data['address_unlock'].dtype == 'category'
+    assert compact.data['lat_unlock'].between(40, 41).all()
+    plain.clean()
+    compact.clean()
+
+    for col in ['fleet', 'idBike', 'station_lock', 'station_unlock']:
+        assert list(compact.data[col].astype(str)) == list(plain.data[col])
+    pd.testing.assert_series_equal(compact.resume(), plain.resume())
+    assert compact.most_popular_stations() == plain.most_popular_stations()
+    pd.testing.assert_series_equal(compact.usage_from_most_popular_station(), plain.usage_from_most_popular_station())
+    pd.testing.assert_series_equal(compact.day_time(), plain.day_time(), rtol=1e-6)
+    pd.testing.assert_series_equal(compact.weekday_time(), plain.weekday_time(), rtol=1e-6)
+    pd.testing.assert_series_equal(compact.total_usage_day(), plain.total_usage_day())
+    pd.testing.assert_series_equal(compact.total_usage_by_station_day(), plain.total_usage_by_station_day())
+
+
+def test_queries_reuse_memoized_aggregates(monkeypatch):
+    df = BiciMad.read_csv(io.StringIO(trips_csv(rows=200)))
+    bici = BiciMad.from_data(df, 1, 23)
+    bici.clean()
+
+    calls = []
+    original = pd.Series.value_counts
+    monkeypatch.setattr(pd.Series, "value_counts", lambda *a, **k: calls.append(1) or original(*a, **k))
+    first = bici.resume()
+    bici.most_popular_stations()
+    bici.usage_from_most_popular_station()
+    pd.testing.assert_series_equal(bici.resume(), first)
+    assert len(calls) == 1
+
+    usos = bici.total_usage_day()
+    usos.iloc[0] = -1  # modificar el resultado no altera la caché
+    assert (bici.total_usage_day() > 0).all()
+
+    bici._data = bici.data.iloc[:10]
+    assert bici.resume()['total_uses'] == 10
+    assert len(calls) == 2
+
+
+def _csv_with_empty_rows(rows):
+    vacia = [""] * 18
+    solo_fecha = list(vacia)
+    solo_fecha[6] = "2023-01-15T10:00:00"
+    return trips_csv(rows=rows) + ";".join(vacia) + "\n" + ";".join(solo_fecha) + "\n"
+
+
+def test_lazy_loads_only_needed_columns(fake_emt):
+    fake_emt.add(1, 23, _csv_with_empty_rows(200))
+    lazy = BiciMad(1, 23, lazy=True)
+    assert fake_emt.downloads == 0
+
+    lazy.clean()
+    horas = lazy.day_time()
+    assert lazy.loaded_columns == ['trip_minutes']
+    assert fake_emt.downloads == 1
+
+    eager = BiciMad(1, 23)
+    eager.clean()
+    pd.testing.assert_series_equal(horas, eager.day_time())
+    pd.testing.assert_series_equal(lazy.total_usage_day(), eager.total_usage_day())
+    assert lazy.most_popular_stations() == eager.most_popular_stations()
+    pd.testing.assert_series_equal(lazy.total_usage_by_station_day(), eager.total_usage_by_station_day())
+    assert lazy.loaded_columns == ['trip_minutes', 'address_unlock', 'station_unlock']
+    pd.testing.assert_series_equal(lazy.resume(), eager.resume())
+
+    pd.testing.assert_frame_equal(lazy.data, eager.data)
+    assert fake_emt.downloads == 2
+
+
+def test_lazy_validates_month_on_construction(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=10))
+    with pytest.raises(ValueError):
+        BiciMad(2, 23, lazy=True)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.bicimad_range import BiciMadRange, _concat, month_span
+from tests.helpers import trips_csv
+
+
+def test_month_span():
+    assert month_span((11, 22), (2, 23)) == [(11, 22), (12, 22), (1, 23), (2, 23)]
+    with pytest.raises(ValueError):
+        month_span((2, 23), (1, 23))
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_range_combines_months(fake_emt, tmp_path, parse_workers):
+    for seed, (month, year) in enumerate(month_span((11, 22), (1, 23))):
+        fake_emt.add(month, year, trips_csv(rows=80, seed=seed, year=2000 + year, month=month))
+
+    rango = BiciMadRange((11, 22), (1, 23), parse_workers=parse_workers)
+
+    assert rango.months == [(11, 22), (12, 22), (1, 23)]
+    enero = BiciMad(1, 23)
+    enero.clean()
+    pd.testing.assert_series_equal(rango[(1, 23)].total_usage_day(), enero.total_usage_day())
+    pd.testing.assert_series_equal(rango[(1, 23)].hourly_usage(), enero.hourly_usage())
+
+    por_mes = rango.per_month("total_usage_day")
+    assert rango.total_usage_day().sum() == sum(s.sum() for s in por_mes.values()) == 240
+    resumen = rango.resume()
+    assert resumen["start"] == (11, 22) and resumen["end"] == (1, 23)
+    assert resumen["total_uses"] == 240
+    assert len(rango.day_time()) == len(rango.total_usage_day())
+
+
+def test_concat_keeps_inputs_and_months_share_memory(fake_emt):
+    for seed, (month, year) in enumerate(month_span((12, 22), (1, 23))):
+        fake_emt.add(month, year, trips_csv(rows=60, seed=seed, year=2000 + year, month=month))
+    a = pd.DataFrame({"x": pd.Categorical(["b", "a"]), "y": [1.0, 2.0]})
+    b = pd.DataFrame({"x": pd.Categorical(["c"]), "y": [3.0]})
+    frames = [a, b]
+
+    combined = _concat(frames)
+    assert len(frames) == 2 and frames[0] is a and frames[1] is b
+    assert list(a["x"].cat.categories) == ["a", "b"] and list(b["x"].cat.categories) == ["c"]
+    assert list(combined["x"].cat.categories) == ["a", "b", "c"]
+    assert combined["x"].tolist() == ["b", "a", "c"]
+
+    rango = BiciMadRange((12, 22), (1, 23), parse_workers=0, compact=True)
+    enero = rango[(1, 23)].data
+    assert np.shares_memory(enero["trip_minutes"].to_numpy(), rango.data["trip_minutes"].to_numpy())
+    solo = BiciMad(1, 23, compact=True)
+    solo.clean()
+    pd.testing.assert_frame_equal(enero, solo.data)
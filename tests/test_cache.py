@@ -0,0 +1,135 @@
+import pytest
+
+from bicimad import transport
+from bicimad.UrlEMT import UrlEMT
+from bicimad.cache import ZipCache
+from tests.helpers import FakeResponse, FakeSession, make_zip
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Simula el servidor de la EMT registrando las peticiones recibidas."""
+    files = {}
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append((url, dict(headers or {})))
+        content, etag = files[url]
+        if headers and headers.get("If-None-Match") == etag:
+            return FakeResponse(b"", status_code=304, etag=etag)
+        return FakeResponse(content, etag=etag)
+
+    monkeypatch.setattr(transport, "_default", transport.Transport(session=FakeSession(fake_get), retries=0))
+    return files, calls
+
+
+def test_fetch_downloads_once_and_revalidates(tmp_path, fake_server):
+    files, calls = fake_server
+    files["http://emt/a.zip"] = (make_zip("a;b\n1;2\n"), '"v1"')
+    cache = ZipCache(tmp_path)
+
+    first = cache.fetch("http://emt/a.zip")
+    second = cache.fetch("http://emt/a.zip")
+
+    assert first == second
+    assert calls[1][1]["If-None-Match"] == '"v1"'
+    assert first.read_bytes() == files["http://emt/a.zip"][0]
+
+
+def test_offline_mode_skips_network(tmp_path, fake_server):
+    files, calls = fake_server
+    files["http://emt/a.zip"] = (make_zip("a;b\n1;2\n"), '"v1"')
+    ZipCache(tmp_path).fetch("http://emt/a.zip")
+
+    offline = ZipCache(tmp_path, offline=True)
+    offline.fetch("http://emt/a.zip")
+    assert len(calls) == 1
+
+    with pytest.raises(ConnectionError):
+        offline.fetch("http://emt/b.zip")
+
+
+def test_lru_eviction_respects_budget(tmp_path, fake_server):
+    files, _ = fake_server
+    for name in "abc":
+        files[f"http://emt/{name}.zip"] = (make_zip(name * 500), f'"{name}"')
+    size = len(files["http://emt/a.zip"][0])
+    cache = ZipCache(tmp_path, max_bytes=2 * size)
+
+    cache.fetch("http://emt/a.zip")
+    cache.fetch("http://emt/b.zip")
+    cache.get("http://emt/a.zip")
+    cache.fetch("http://emt/c.zip")
+
+    assert cache.get("http://emt/b.zip") is None
+    assert cache.get("http://emt/a.zip") is not None
+    assert cache.size <= 2 * size
+
+
+def test_csv_from_cached_zip(tmp_path, fake_server):
+    files, _ = fake_server
+    files["http://emt/a.zip"] = (make_zip("a;b\n1;2\n"), '"v1"')
+    path = ZipCache(tmp_path).fetch("http://emt/a.zip")
+
+    assert UrlEMT.csv_from_zip(path).read() == "a;b\n1;2\n"
+
+
+def test_source_id_does_not_download(tmp_path, fake_emt):
+    fake_emt.add(1, 23, "a;b\n1;2\n")
+    enlaces = UrlEMT(ZipCache(tmp_path))
+
+    identidad = enlaces.source_id(1, 23)
+    assert identidad.startswith("etag:") and fake_emt.downloads == 0
+    with pytest.raises(ConnectionError):
+        UrlEMT(ZipCache(tmp_path, offline=True)).source_id(1, 23)
+
+    enlaces.get_zip(1, 23)
+    assert UrlEMT(ZipCache(tmp_path, offline=True)).source_id(1, 23) == identidad
+    fake_emt.add(1, 23, "a;b\n3;4\n")
+    assert enlaces.source_id(1, 23) != identidad
+    assert fake_emt.downloads == 1
+
+
+def test_source_id_without_cache_uses_head(tmp_path, fake_emt):
+    fake_emt.add(1, 23, "a;b\n1;2\n")
+
+    assert UrlEMT().source_id(1, 23) == UrlEMT(ZipCache(tmp_path)).source_id(1, 23)
+    assert UrlEMT().source_id(1, 23).startswith("etag:")
+    assert fake_emt.downloads == 0
+
+
+def test_identity_matches_offline_without_content_length(tmp_path, monkeypatch):
+    content = make_zip("a;b\n1;2\n")
+
+    def response(body):
+        r = FakeResponse(body)
+        r.headers = {"Last-Modified": "Sun, 01 Jan 2023 00:00:00 GMT"}
+        return r
+
+    session = FakeSession(lambda url, headers=None, **kwargs: response(content))
+    session.head = lambda url, **kwargs: response(b"")
+    monkeypatch.setattr(transport, "_default", transport.Transport(session=session, retries=0))
+
+    cache = ZipCache(tmp_path)
+    cache.fetch("http://emt/a.zip")
+    online = cache.identity("http://emt/a.zip")
+
+    assert online == "modified:Sun, 01 Jan 2023 00:00:00 GMT"
+    assert ZipCache(tmp_path, offline=True).identity("http://emt/a.zip") == online
+
+
+def test_hits_do_not_rewrite_index(tmp_path, fake_server):
+    files, _ = fake_server
+    files["http://emt/a.zip"] = (make_zip("a;b\n1;2\n"), '"a"')
+    files["http://emt/b.zip"] = (make_zip("c;d\n3;4\n"), '"b"')
+    cache = ZipCache(tmp_path)
+    cache.fetch("http://emt/a.zip")
+    saved = (tmp_path / "index.json").read_bytes()
+
+    for _ in range(3):
+        cache.get("http://emt/a.zip")
+    assert (tmp_path / "index.json").read_bytes() == saved
+
+    accessed = cache._index["http://emt/a.zip"]["last_access"]
+    cache.fetch("http://emt/b.zip")
+    assert ZipCache(tmp_path)._index["http://emt/a.zip"]["last_access"] == accessed
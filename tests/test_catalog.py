@@ -0,0 +1,83 @@
+import pytest
+
+from bicimad.UrlEMT import UrlEMT
+from bicimad.catalog import MonthCatalog
+
+URLS = {
+    "https://emt/luis/bicimad/trips_21_07_July-csv.zip",
+    "https://emt/luis/bicimad/trips_23_01_January-csv.zip",
+    "https://emt/luis/bicimad/trips_22_12_December-csv.zip",
+}
+
+
+class CountingFetcher:
+    def __init__(self, urls=URLS):
+        self.urls = urls
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.urls
+
+
+def test_parse_and_lookup():
+    fetcher = CountingFetcher()
+    catalog = MonthCatalog(fetcher)
+
+    assert catalog.months() == [(21, 7), (22, 12), (23, 1)]
+    assert catalog.url(1, 23).endswith("trips_23_01_January-csv.zip")
+    assert catalog.url(2, 23) is None
+    assert fetcher.calls == 1
+
+
+def test_ttl_and_refresh():
+    fetcher = CountingFetcher()
+    catalog = MonthCatalog(fetcher, ttl=0)
+
+    catalog.url(7, 21)
+    catalog.url(7, 21)
+    assert fetcher.calls == 2
+
+    catalog = MonthCatalog(fetcher, ttl=3600)
+    catalog.url(7, 21)
+    catalog.refresh()
+    assert fetcher.calls == 4
+
+
+def test_persisted_catalog_avoids_fetch(tmp_path):
+    path = tmp_path / "catalog.json"
+    MonthCatalog(CountingFetcher(), path=path).refresh()
+
+    cold = CountingFetcher()
+    catalog = MonthCatalog(cold, path=path)
+    assert (22, 12) in catalog
+    assert cold.calls == 0
+
+
+def test_urlemt_instances_share_catalog(monkeypatch):
+    fetcher = CountingFetcher()
+    monkeypatch.setattr(UrlEMT, "_shared_catalog", MonthCatalog(fetcher))
+
+    for _ in range(5):
+        assert "trips_22_12_" in UrlEMT().get_url(12, 22)
+    assert fetcher.calls == 1
+    assert UrlEMT().available_months()[0] == (21, 7)
+    with pytest.raises(ValueError):
+        UrlEMT().get_url(5, 24)
+
+
+def test_offline_catalog_never_refreshes(tmp_path):
+    path = tmp_path / "catalog.json"
+    fetcher = CountingFetcher()
+    catalog = MonthCatalog(fetcher, ttl=0, path=path)
+    catalog.refresh()
+
+    offline = catalog.as_offline()
+    assert offline.url(1, 23) is not None and offline.months() == [(21, 7), (22, 12), (23, 1)]
+    assert MonthCatalog(fetcher, ttl=0, path=path, offline=True).url(12, 22) is not None
+    with pytest.raises(ConnectionError):
+        offline.refresh()
+    assert fetcher.calls == 1
+    with pytest.raises(ConnectionError):
+        MonthCatalog(fetcher, offline=True).months()
+    assert not catalog.offline
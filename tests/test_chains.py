@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.chains import TripChains
+from tests.helpers import trips_csv
+
+
+@pytest.fixture
+def chains():
+    unlock = pd.to_datetime(["2023-01-01 08:00", "2023-01-01 10:00", "2023-01-01 09:00",
+                             "2023-01-02 07:00", "2023-01-01 12:00"])
+    data = pd.DataFrame({
+        "idBike": ["1", "1", "2", "1", "2"],
+        "trip_minutes": [10.0, 20.0, 30.0, 15.0, 6.0],
+        # Etiquetas de clean(): '5.0' en desbloqueo (columna con huecos) y '5' en bloqueo.
+        "station_unlock": ["3.0", "5.0", "4.0", "7.0", "9.0"],
+        "station_lock": ["5", "6", "9", "8", "4"],
+        "lock_date": unlock + pd.to_timedelta([10, 20, 30, 15, 6], unit="min"),
+    }, index=unlock)
+    return TripChains.from_frame(data)
+
+
+def test_chains_follow_each_bike(chains):
+    assert chains.trips["idBike"].tolist() == ["1", "1", "1", "2", "2"]
+    assert chains.idle_times().tolist() == [110.0, 20 * 60 + 40, 150.0]
+    assert chains.trips["teleport"].tolist() == [False, False, True, False, False]
+
+    teleports = chains.teleports()
+    assert teleports[["from_station", "to_station"]].values.tolist() == [["6", "7.0"]]
+
+
+def test_summaries(chains):
+    by_day = chains.by_day()
+    assert by_day["trips"].tolist() == [4, 1]
+    assert by_day["bikes"].tolist() == [2, 1]
+    assert by_day["utilisation"].iloc[0] == pytest.approx((66 / 60) / 48)
+    assert by_day["teleports"].tolist() == [0, 1]
+
+    by_station = chains.by_station()
+    assert by_station.loc["7.0", "rebalance_in"] == 1
+    assert by_station.loc["6", "net_rebalance"] == -1
+    assert by_station.loc["5.0", "idle_hours"] == pytest.approx(110 / 60)
+
+    assert chains.by_bike()["teleports"].to_dict() == {"1": 1, "2": 0}
+
+
+def test_bicimad_rebalancing_matches_loop(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=300))
+    bici = BiciMad(1, 23)
+    bici.clean(keep_time=True)
+    raw = BiciMad(1, 23).data.dropna(how="all")
+
+    teleports = 0
+    for _, viajes in raw.sort_index(kind="stable").groupby("idBike"):
+        estaciones = viajes[["station_unlock", "station_lock"]].to_numpy()
+        for (_, anterior), (siguiente, _) in zip(estaciones[:-1], estaciones[1:]):
+            teleports += bool(pd.notna(anterior) and pd.notna(siguiente) and anterior != siguiente)
+    assert bici.rebalancing("bike")["teleports"].sum() == teleports
+    assert bici.rebalancing("station")["net_rebalance"].sum() == 0
+    assert bici.rebalancing("day")["trips"].sum() == len(raw)
@@ -0,0 +1,120 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from bicimad import cli, transport
+from bicimad.UrlEMT import UrlEMT
+from bicimad.catalog import MonthCatalog
+from bicimad.ingest import AggregateStore
+from tests.helpers import FakeSession, trips_csv
+
+def _run_python(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+
+
+def test_cli_import_is_light():
+    out = _run_python(
+        "import sys\n"
+        "import bicimad.cli\n"
+        "print(','.join(m for m in ('pandas', 'numpy', 'requests', 'pyarrow', 'matplotlib') if m in sys.modules))\n"
+    )
+    assert out.strip() == ""
+
+
+def test_library_import_defers_plotting_and_ssl():
+    out = _run_python(
+        "import sys\n"
+        "import bicimad.bicimad\n"
+        "print(','.join(m for m in ('matplotlib', 'truststore') if m in sys.modules))\n"
+    )
+    assert out.strip() == ""
+
+
+@pytest.mark.parametrize("extra", [["--aggregates", "agregados"], ["--approximate"],
+                                   ["--approximate", "--aggregates", "agregados"]])
+def test_aggregate_options_require_until(extra, capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["resume", "1", "23", *extra])
+    assert "--until" in capsys.readouterr().err
+
+
+def test_single_month_json(fake_emt, tmp_path, capsys):
+    fake_emt.add(1, 23, trips_csv(rows=100))
+    assert cli.main(["resume", "1", "23", "--cache-dir", str(tmp_path)]) == 0
+
+    resumen = json.loads(capsys.readouterr().out)
+    assert resumen["total_uses"] == 100
+    assert isinstance(resumen["most_popular_station"], list)
+
+
+def test_range_csv(fake_emt, tmp_path):
+    fake_emt.add(1, 23, trips_csv(rows=50, month=1))
+    fake_emt.add(2, 23, trips_csv(rows=70, month=2, seed=1))
+    salida = tmp_path / "usos.csv"
+    assert cli.main(["total_usage_day", "1", "23", "--until", "2", "23", "--format", "csv",
+                     "--cache-dir", str(tmp_path), "--output", str(salida)]) == 0
+
+    lineas = salida.read_text().splitlines()
+    assert lineas[0] == "fecha,total_usos"
+    assert sum(int(l.split(",")[1]) for l in lineas[1:]) == 120
+
+
+def test_range_from_aggregate_store(fake_emt, tmp_path, capsys):
+    for month in (1, 2, 3):
+        fake_emt.add(month, 23, trips_csv(rows=50, seed=month, month=month))
+    args = ["total_usage_day", "1", "23", "--until", "2", "23", "--aggregates", str(tmp_path / "agg")]
+
+    assert cli.main(args + ["--cache-dir", str(tmp_path / "zips")]) == 0
+    first = json.loads(capsys.readouterr().out)
+    assert sum(r["total_usos"] for r in first) == 100
+    assert AggregateStore(tmp_path / "agg").months() == [(1, 23), (2, 23)]
+    assert fake_emt.downloads == 2
+
+    downloads = fake_emt.downloads
+    assert cli.main(args + ["--offline", "--cache-dir", str(tmp_path / "empty")]) == 0
+    assert json.loads(capsys.readouterr().out) == first
+    assert fake_emt.downloads == downloads
+
+
+def test_offline_uses_cache_only(fake_emt, tmp_path, monkeypatch, capsys):
+    catalogo = tmp_path / "catalog.json"
+    monkeypatch.setenv("BICIMAD_CATALOG", str(catalogo))
+    monkeypatch.setattr(UrlEMT, "_shared_catalog", MonthCatalog(lambda: set(fake_emt.files), path=catalogo))
+    fake_emt.add(1, 23, trips_csv(rows=40))
+    assert cli.main(["peak_hour", "1", "23", "--cache-dir", str(tmp_path)]) == 0
+    online = capsys.readouterr().out
+
+    def sin_red(url, **kwargs):
+        raise AssertionError("no debería acceder a la red")
+
+    monkeypatch.setattr(transport, "_default", transport.Transport(session=FakeSession(sin_red), retries=0))
+    assert cli.main(["peak_hour", "1", "23", "--offline", "--cache-dir", str(tmp_path)]) == 0
+    assert capsys.readouterr().out == online
+
+
+def test_offline_without_cache_fails(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("BICIMAD_CATALOG", str(tmp_path / "no-existe.json"))
+    monkeypatch.setattr(UrlEMT, "_shared_catalog", None)
+    assert cli.main(["resume", "1", "23", "--offline", "--cache-dir", str(tmp_path)]) == 1
+    assert "offline" in capsys.readouterr().err.lower()
+
+
+def test_unknown_query_is_rejected():
+    with pytest.raises(SystemExit):
+        cli.main(["plot", "1", "23"])
+
+
+def test_approximate_popularity_from_aggregate_store(fake_emt, tmp_path, capsys):
+    for month in (1, 2):
+        fake_emt.add(month, 23, trips_csv(rows=50, seed=month, month=month))
+    args = ["most_popular_stations", "1", "23", "--until", "2", "23", "--aggregates", str(tmp_path / "agg"),
+            "--cache-dir", str(tmp_path / "zips")]
+
+    assert cli.main(args) == 0
+    exacto = json.loads(capsys.readouterr().out)
+    assert cli.main(args + ["--approximate", "--offline"]) == 0
+    assert json.loads(capsys.readouterr().out) == exacto
+    assert cli.main(["day_time", "1", "23", "--until", "2", "23", "--aggregates", str(tmp_path / "agg"),
+                     "--approximate", "--offline"]) == 1
@@ -0,0 +1,43 @@
+import io
+
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.cube import UsageCube
+from tests.helpers import trips_csv
+
+
+@pytest.fixture
+def raw():
+    return BiciMad.read_csv(io.StringIO(trips_csv(rows=400)))
+
+
+@pytest.fixture
+def bici(raw):
+    bici = BiciMad.from_data(raw.copy(), 1, 23)
+    bici.clean()
+    return bici
+
+
+@pytest.mark.parametrize("query", ["day_time", "weekday_time", "total_usage_day", "total_usage_by_station_day"])
+def test_cube_answers_existing_queries(bici, query):
+    expected = getattr(bici, query)()
+    result = getattr(bici.cube(), query)()
+    pd.testing.assert_series_equal(result, expected)
+
+
+def test_hourly_queries(bici, raw):
+    horas = raw.index.hour.value_counts().reindex(range(24), fill_value=0)
+
+    assert list(bici.hourly_usage()) == list(horas)
+    assert bici.peak_hour() == horas.idxmax()
+    assert bici.cube().hourly_usage().sum() == len(raw)
+
+    por_dia = bici.cube().peak_hour_by_day()
+    assert (por_dia["total_usos"] <= bici.total_usage_day()).all()
+
+
+def test_cube_from_raw_frame_matches_cleaned(bici, raw):
+    cube = UsageCube.from_frame(raw)
+    assert (cube.counts.sum(axis=(0, 2)) == bici.cube().counts.sum(axis=(0, 2))).all()
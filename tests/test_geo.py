@@ -0,0 +1,64 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.geo import StationGrid, haversine, parse_geolocation, trips_within
+from tests.helpers import STATIONS, trips_csv
+
+
+@pytest.fixture
+def bici():
+    bici = BiciMad.from_data(BiciMad.read_csv(io.StringIO(trips_csv(rows=300))), 1, 23)
+    bici.clean()
+    return bici
+
+
+def test_parse_geolocation():
+    geo = pd.Series(["{'type': 'Point', 'coordinates': [-3.7018, 40.4172]}", None,
+                     "{'type': 'Point', 'coordinates': [-3.7018, 40.4172]}"])
+    coords = parse_geolocation(geo)
+    assert coords.loc[0, "lat"] == 40.4172 and coords.loc[0, "lon"] == -3.7018
+    assert coords.loc[1].isna().all()
+
+
+def test_grid_queries_match_brute_force(bici):
+    grid = bici.station_grid(cell_size=200)
+    assert len(grid.stations) == len(STATIONS)
+
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(40.40, 40.44, 500)
+    lon = rng.uniform(-3.72, -3.69, 500)
+    stations, dist = grid.nearest(lat, lon)
+    brute = haversine(lat[:, None], lon[:, None], grid.lat[None, :], grid.lon[None, :])
+    assert (stations == np.asarray(grid.stations)[brute.argmin(axis=1)]).all()
+    np.testing.assert_allclose(dist, brute.min(axis=1))
+
+    near = grid.within(40.4172, -3.7018, 500)
+    assert list(near.index) == ["1.0", "2.0"]
+    assert set(grid.bbox(40.428, -3.71, 40.431, -3.70)) == {"3.0", "4.0", "5.0"}
+
+
+def test_bbox_matches_brute_force():
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(40.38, 40.48, 2000), rng.uniform(-3.75, -3.65, 2000)
+    grid = StationGrid(pd.Index(np.arange(2000)), lat, lon, cell_size=300)
+
+    for _ in range(50):
+        min_lat, max_lat = np.sort(rng.uniform(40.35, 40.50, 2))
+        min_lon, max_lon = np.sort(rng.uniform(-3.78, -3.62, 2))
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        assert list(grid.bbox(min_lat, min_lon, max_lat, max_lon)) == list(np.flatnonzero(inside))
+    assert len(grid.bbox(41.0, -3.7, 41.1, -3.6)) == 0
+
+
+def test_cell_usage_and_radius_mask(bici):
+    grid = bici.station_grid()
+    usage = grid.cell_usage(bici.data)
+    assert usage["total_usos"].sum() == len(bici.data)
+    assert usage["trip_minutes"].sum() == pytest.approx(bici.data["trip_minutes"].sum())
+
+    mask = trips_within(bici.data, 40.4172, -3.7018, 50)
+    assert mask.sum() == (bici.data["address_unlock"] == STATIONS[0][2]).sum()
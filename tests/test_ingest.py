@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from bicimad.bicimad_range import BiciMadRange, month_span
+from bicimad.ingest import AggregateStore
+from tests.helpers import trips_csv
+
+pytest.importorskip("pyarrow")
+
+QUERIES = [
+    "day_time", "weekday_time", "total_usage_day", "total_usage_by_station_day",
+    "usage_from_most_popular_station",
+]
+
+
+def _add(fake_emt, start, end):
+    for month, year in month_span(start, end):
+        fake_emt.add(month, year, trips_csv(rows=80, seed=month, year=2000 + year, month=month))
+
+
+def test_ingest_processes_only_new_months(fake_emt, tmp_path):
+    _add(fake_emt, (11, 22), (12, 22))
+    store = AggregateStore(tmp_path)
+
+    assert store.ingest(urls=set(fake_emt.files), chunksize=30) == [(11, 22), (12, 22)]
+    assert fake_emt.downloads == 2
+    assert store.ingest(urls=set(fake_emt.files)) == []
+    assert fake_emt.downloads == 2
+
+    _add(fake_emt, (1, 23), (1, 23))
+    assert store.pending(fake_emt.files) == {(1, 23): fake_emt.BASE + "trips_23_01_Month-csv.zip"}
+    assert store.ingest(urls=set(fake_emt.files)) == [(1, 23)]
+    assert fake_emt.downloads == 3
+    assert AggregateStore(tmp_path).months() == [(11, 22), (12, 22), (1, 23)]
+    assert (1, 23) in store and (23, 1) not in store
+
+
+def test_combined_matches_range_over_raw_data(fake_emt, tmp_path):
+    _add(fake_emt, (11, 22), (1, 23))
+    store = AggregateStore(tmp_path)
+    store.ingest(urls=set(fake_emt.files))
+
+    rango = BiciMadRange((11, 22), (1, 23), parse_workers=0)
+    combinado = store.combined((11, 22), (1, 23))
+    for query in QUERIES:
+        pd.testing.assert_series_equal(getattr(combinado, query)(), getattr(rango, query)())
+    assert combinado.most_popular_stations() == rango.most_popular_stations()
+    assert combinado.total_uses == rango.resume()["total_uses"]
+
+    enero = store.load(1, 23)
+    pd.testing.assert_series_equal(enero.resume(), rango[(1, 23)].resume())
+
+    with pytest.raises(ValueError):
+        store.combined((10, 22), (1, 23))
+
+
+def test_append_never_overwrites(fake_emt, tmp_path):
+    _add(fake_emt, (1, 23), (1, 23))
+    store = AggregateStore(tmp_path)
+    store.ingest(urls=set(fake_emt.files))
+
+    with pytest.raises(ValueError):
+        store.append(store.load(1, 23), "otra")
+    assert store.source(1, 23) == fake_emt.BASE + "trips_23_01_Month-csv.zip"
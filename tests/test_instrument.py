@@ -0,0 +1,63 @@
+import pytest
+
+from bicimad import instrument
+from bicimad.bicimad import BiciMad
+from tests.helpers import trips_csv
+
+
+@pytest.fixture
+def recorded():
+    stages = []
+    with instrument.observe(stages.append):
+        yield stages
+
+
+def test_disabled_records_nothing(fake_emt):
+    fake_emt.add(1, 23, trips_csv(50))
+    assert not instrument.is_enabled()
+    assert instrument.stage("x") is instrument.stage("y")
+
+    bici = BiciMad(1, 23)
+    bici.clean()
+    bici.resume()
+
+    assert len(bici.metrics) == 0
+
+
+def test_pipeline_stages_are_observed(fake_emt, recorded):
+    fake_emt.add(1, 23, trips_csv(120))
+    bici = BiciMad(1, 23)
+    bici.clean()
+    bici.resume()
+    bici.day_time()
+
+    names = [m.stage for m in recorded]
+    assert names == ["get_csv", "read_csv", "clean", "resume", "day_time"]
+    by_name = {m.stage: m for m in recorded}
+    assert by_name["get_csv"].bytes == len(fake_emt.files[next(iter(fake_emt.files))])
+    assert by_name["read_csv"].rows == 120
+    assert by_name["clean"].rows == 120
+    assert all(m.seconds >= 0 and m.peak_memory is None for m in recorded)
+
+    assert [m.stage for m in bici.metrics] == names
+    frame = bici.metrics.to_frame()
+    assert list(frame["stage"]) == names
+    assert bici.metrics.total_seconds("resume") == by_name["resume"].seconds
+
+
+def test_nested_stages_and_memory():
+    instrument.enable(memory=True)
+    try:
+        with instrument.collect() as summary:
+            with instrument.stage("outer"):
+                with instrument.stage("inner"):
+                    big = bytearray(4 * 2 ** 20)
+                del big
+    finally:
+        instrument.disable()
+
+    inner, outer = summary.stages
+    assert (inner.stage, outer.stage) == ("inner", "outer")
+    assert inner.peak_memory >= 4 * 2 ** 20
+    assert outer.peak_memory >= inner.peak_memory
+    assert not instrument.is_enabled()
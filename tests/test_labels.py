@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from bicimad.labels import as_labels, station_codes
+
+
+def test_station_codes_match_labels_across_columns():
+    unlock = pd.Series(["1.0", "2.0", "nan", "10.0"])
+    lock = pd.Series(["2", "1", "3", "10"])
+    code_unlock, code_lock, names = station_codes(unlock, lock)
+
+    assert list(names[code_unlock[code_unlock >= 0]]) == ["1.0", "2.0", "10.0"]
+    assert code_unlock[2] == -1
+    assert list(names[code_lock]) == ["2.0", "1.0", "3", "10.0"]
+
+
+def test_as_labels_matches_astype_str():
+    column = pd.Series([12, None, 3], dtype="Int16")
+    expected = pd.Series([12.0, np.nan, 3.0]).astype(str)
+    assert as_labels(column).astype(str).tolist() == expected.tolist()
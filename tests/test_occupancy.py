@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.occupancy import StationOccupancy
+from tests.helpers import trips_csv
+
+
+@pytest.fixture
+def occupancy():
+    unlock = pd.to_datetime(["2023-01-01 08:05", "2023-01-01 08:20", "2023-01-01 08:40", "2023-01-01 09:10"])
+    data = pd.DataFrame({
+        "station_unlock": ["1.0", "1.0", "2.0", "1.0"],
+        "station_lock": ["2", "2", "1", "3"],
+        "lock_date": unlock + pd.Timedelta("10min"),
+    }, index=unlock)
+    return StationOccupancy.from_frame(data, "30min")
+
+
+def test_net_flow_and_inventory(occupancy):
+    assert list(occupancy.bins) == list(pd.date_range("2023-01-01 08:00", "2023-01-01 09:00", freq="30min"))
+    # Estación 1: salen bicicletas a las 08:05, 08:20 y 09:10 y vuelve una a las 08:50.
+    assert occupancy.net_flow("1.0").tolist() == [-2, 1, -1]
+    assert occupancy.net_flow("2.0").tolist() == [1, 0, 0]
+    assert occupancy.inventory("1.0").tolist() == [-2, -1, -2]
+    assert occupancy.net.sum() == 0
+    assert occupancy.inventory_at("1.0", "2023-01-01 08:49") == -2
+    assert occupancy.inventory_at("1.0", "2023-01-01 08:50") == -1
+    assert occupancy.inventory_at("1.0", "2023-01-01 07:00") == 0
+    assert occupancy.swing().to_dict() == {"1.0": 2, "2.0": 1, "3": 1}
+
+
+def test_flags(occupancy):
+    flags = occupancy.flags(empty=-2, full=pd.Series({"2.0": 1}), initial=0)
+    assert flags.loc["1.0", "empties"] and flags.loc["1.0", "empty_bins"] == 2
+    assert flags.loc["1.0", "first_empty"] == pd.Timestamp("2023-01-01 08:00")
+    assert flags.loc["2.0", "fills"] and not flags.loc["2.0", "empties"]
+    assert not flags.loc["3", "fills"]  # sin umbral de llenado para la estación 3
+
+
+def test_bicimad_occupancy_matches_event_counts(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=300))
+    bici = BiciMad(1, 23)
+    bici.clean(keep_time=True)
+    data = bici.data
+
+    occ = bici.occupancy("1h")
+    salidas = data["station_unlock"].replace("nan", np.nan).dropna().map(float).value_counts()
+    llegadas = data["station_lock"].map(float).value_counts()
+    esperado = llegadas.sub(salidas, fill_value=0)
+    final = occ.inventory().iloc[-1]
+    assert {float(k): v for k, v in final.items()} == esperado.to_dict()
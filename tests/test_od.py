@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+from bicimad.bicimad import BiciMad
+from tests.helpers import trips_csv
+
+
+@pytest.fixture
+def bici():
+    bici = BiciMad.from_data(BiciMad.read_csv(io.StringIO(trips_csv(rows=400))), 1, 23)
+    bici.clean()
+    return bici
+
+
+def pair_counts(data):
+    destino = data["station_lock"].astype(float)
+    return data.groupby([data["station_unlock"].astype(float), destino]).size()
+
+
+def test_matrix_matches_groupby(bici):
+    od = bici.od_matrix()
+    expected = pair_counts(bici.data)
+
+    frame = od.to_frame().set_index(["origin", "destination"])["total_usos"]
+    assert frame.sort_index().tolist() == expected.sort_index().tolist()
+    assert od.to_scipy().sum() == expected.sum()
+
+    top = od.top_k(3)
+    assert top["total_usos"].tolist() == sorted(expected, reverse=True)[:3]
+
+
+def test_degrees_and_imbalance(bici):
+    od = bici.od_matrix()
+    data = bici.data.dropna(subset=["station_unlock", "station_lock"])
+
+    assert od.out_degree().sum() == od.in_degree().sum() == len(data)
+    assert od.out_degree()["1.0"] == (data["station_unlock"] == "1.0").sum()
+    # station_lock etiqueta la misma estación como '1': es el mismo nodo.
+    assert od.in_degree()["1.0"] == (data["station_lock"] == "1").sum()
+    assert "1" not in od.stations
+    assert od.imbalance().sum() == 0
+
+
+def test_day_and_hour_slices(bici):
+    day = bici.data.index[0]
+    by_day = bici.od_matrix(day=day)
+    assert by_day.counts.sum() == len(bici.data.loc[day].dropna(subset=["station_unlock", "station_lock"]))
+
+    hourly = sum(bici.od_matrix(hour=h).counts.sum() for h in range(24))
+    assert hourly == bici.od_matrix().counts.sum()
@@ -0,0 +1,63 @@
+import io
+
+import pandas as pd
+import pytest
+
+from bicimad import parallel
+from bicimad.bicimad import BiciMad
+from tests.helpers import trips_csv
+
+OPTIONS = dict(sep=";", usecols=BiciMad.COLUMNS, index_col="unlock_date", parse_dates=["unlock_date", "lock_date"])
+
+
+def test_split_ranges_are_row_aligned():
+    data = b"h\n" + b"".join(b"%d;x\n" % i for i in range(100)) + b"last"
+    ranges = parallel.split_ranges(data, 7, start=2)
+
+    assert ranges[0][0] == 2 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges[:-1])
+    assert b"".join(data[s:e] for s, e in ranges) == data[2:]
+
+
+def test_split_ranges_seeks_in_open_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "ALIGN_BYTES", 3)
+    data = b"cabecera\n" + b"".join(b"%d;%s\n" % (i, b"x" * (i % 9)) for i in range(200))
+    path = tmp_path / "trips.csv"
+    path.write_bytes(data)
+
+    with open(path, "rb") as f:
+        ranges = parallel.split_ranges(f, 5, start=9)
+    assert ranges == parallel.split_ranges(data, 5, start=9)
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+    assert b"".join(data[s:e] for s, e in ranges) == data[9:]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_parallel_matches_single_read(compact):
+    data = trips_csv(rows=600).encode("utf-8")
+    options = dict(OPTIONS, dtype=BiciMad.COMPACT_DTYPES if compact else None)
+
+    expected = pd.read_csv(io.BytesIO(data), **options)
+    result = parallel.read_csv(io.BytesIO(data), workers=3, part_bytes=1000, **options)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_other_date_format_falls_back_to_single_read():
+    text = trips_csv(rows=300)
+    lines = text.splitlines()
+    fields = lines[-1].split(";")
+    fields[11] = "15/01/2023 10:00"
+    data = ("\n".join(lines[:-1] + [";".join(fields)]) + "\n").encode("utf-8")
+
+    expected = pd.read_csv(io.BytesIO(data), **OPTIONS)
+    pd.testing.assert_frame_equal(parallel.read_csv(io.BytesIO(data), workers=2, part_bytes=1000, **OPTIONS), expected)
+
+
+def test_bicimad_parse_workers(fake_emt, monkeypatch):
+    fake_emt.add(1, 23, trips_csv(rows=400))
+    monkeypatch.setattr(parallel, "PART_BYTES", 2000)
+
+    serial = BiciMad(1, 23)
+    paralelo = BiciMad(1, 23, parse_workers=2)
+    pd.testing.assert_frame_equal(paralelo.data, serial.data)
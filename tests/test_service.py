@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.service import MonthPool, QueryService
+from tests.helpers import trips_csv
+
+
+def _frame(rows):
+    index = pd.date_range("2023-01-01", periods=rows, freq="min")
+    return pd.DataFrame({"trip_minutes": [1.0] * rows, "address_unlock": ["Sol"] * rows}, index=index)
+
+
+def test_concurrent_loads_are_coalesced():
+    calls = []
+
+    def loader(month, year):
+        calls.append((month, year))
+        time.sleep(0.05)
+        return BiciMad.from_data(_frame(10), month, year)
+
+    pool = MonthPool(loader=loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get(1, 23))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [(1, 23)]
+    assert len({id(r) for r in results}) == 1
+
+
+def test_lru_eviction_under_budget():
+    size = int(_frame(1000).memory_usage(deep=True).sum())
+    pool = MonthPool(budget=2 * size, loader=lambda m, y: BiciMad.from_data(_frame(1000), m, y))
+
+    pool.get(1, 23)
+    pool.get(2, 23)
+    pool.get(1, 23)  # el mes 2 pasa a ser el menos reciente
+    pool.get(3, 23)
+
+    assert pool.months() == [(1, 23), (3, 23)]
+    assert pool.stats()["evictions"] == 1
+    assert pool.size <= pool.budget
+
+
+def test_failed_load_is_not_cached():
+    def loader(month, year):
+        raise ValueError("mes no publicado")
+
+    pool = MonthPool(loader=loader)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            pool.get(5, 23)
+    assert pool.stats()["misses"] == 2
+
+
+def test_http_endpoints(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=150))
+    with QueryService(MonthPool(), port=0) as service:
+        def get(path):
+            with urllib.request.urlopen(service.url + path) as response:
+                return json.loads(response.read())
+
+        resumen = get("months/1/23/resume")
+        assert resumen["total_uses"] == 150
+        assert len(get("months/1/23/total_usage_day")) > 0
+        assert len(get("months/1/23/most_popular_stations")) <= 3
+        assert get("months/1/23/resume") == resumen
+        assert fake_emt.downloads == 1
+        assert get("stats")["hits"] == 3
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get("months/1/23/drop_table")
+        assert error.value.code == 400
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get("months/2/23/resume")
+        assert error.value.code == 404
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.shared import SharedMonth, attach, detach
+from tests.helpers import trips_csv
+
+QUERIES = [
+    "resume", "most_popular_stations", "usage_from_most_popular_station", "day_time",
+    "weekday_time", "total_usage_day", "total_usage_by_station_day", "hourly_usage",
+]
+
+
+@pytest.fixture
+def bici(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=300))
+    bici = BiciMad(1, 23)
+    bici.clean(keep_time=True)
+    return bici
+
+
+def _same(a, b):
+    if isinstance(a, (pd.Series, pd.DataFrame)):
+        return a.equals(b)
+    return a == b
+
+
+def test_attached_month_answers_queries_without_copying(bici):
+    with SharedMonth.publish(bici) as compartido:
+        vista = compartido.attach()
+        bloque = np.frombuffer(compartido._mapping.buf, dtype=np.uint8)
+        assert np.shares_memory(vista.data["trip_minutes"].to_numpy(), bloque)
+        assert np.shares_memory(vista.data["address_unlock"].array.codes, bloque)
+        assert np.shares_memory(vista.data.index.to_numpy(), bloque)
+        assert not vista.data["trip_minutes"].to_numpy().flags.writeable
+
+        for query in QUERIES:
+            assert _same(getattr(vista, query)(), getattr(bici, query)()), query
+        pd.testing.assert_frame_equal(vista.peak_windows("30min"), bici.peak_windows("30min"))
+        del vista, bloque
+
+
+def test_pool_workers_attach_to_the_same_block(bici):
+    with SharedMonth.publish(bici) as compartido:
+        resultados = compartido.map(["resume", ("day_time", ()), ("rolling_usage", ("30min",))], workers=2)
+    assert _same(resultados[0], bici.resume())
+    pd.testing.assert_series_equal(resultados[1], bici.day_time())
+    pd.testing.assert_frame_equal(resultados[2], bici.rolling_usage("30min"))
+
+
+def test_file_backend_and_cleanup(bici, tmp_path):
+    compartido = SharedMonth.publish(bici, directory=tmp_path)
+    assert os.listdir(tmp_path) == [os.path.basename(compartido.handle.name)]
+    vista = attach(compartido.handle)
+    assert vista.most_popular_stations() == bici.most_popular_stations()
+    proyeccion = vista._shared
+    del vista
+    detach(compartido.handle)
+    assert proyeccion._mmap.closed
+
+    compartido.close()
+    assert compartido.closed and os.listdir(tmp_path) == []
+    compartido.close()
+
+
+def test_compact_dtypes_round_trip(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=120))
+    bici = BiciMad(1, 23, compact=True)
+    with SharedMonth.publish(bici) as compartido:
+        vista = compartido.attach()
+        pd.testing.assert_frame_equal(vista.data, bici.data)
+        del vista
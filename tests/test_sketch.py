@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.ingest import AggregateStore
+from bicimad.sketch import CountMinSketch, HyperLogLog, MonthSketch, SpaceSaving
+from tests.helpers import trips_csv
+
+
+def _zipf(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.zipf(1.3, n) % 5000).astype(str)
+
+
+def test_space_saving_bounds_hold_after_chunks_and_merges():
+    stream = _zipf(40_000, 0)
+    exact = stream.value_counts()
+
+    a, b = SpaceSaving(64), SpaceSaving(64)
+    for chunk in np.array_split(stream.to_numpy()[:25_000], 7):
+        a.update(chunk)
+    b.update(stream.to_numpy()[25_000:])
+    merged = SpaceSaving.from_bytes(a.merge(b).to_bytes())
+
+    assert merged.total == len(stream)
+    assert merged.error_bound <= len(stream) / 64
+    top = merged.top(10)
+    real = exact.reindex(top.index, fill_value=0)
+    assert (top["lower"] <= real).all() and (real <= top["count"]).all()
+    assert set(top.index[top["guaranteed"]]) <= set(exact.head(10).index)
+    assert top.index[0] == exact.index[0]
+
+
+def test_space_saving_is_exact_below_capacity():
+    sketch = SpaceSaving(10)
+    sketch.update(["a", "b", "a", None, "c", "a"])
+    sketch.update(["b"])
+    top = sketch.top(2)
+    assert top["count"].to_dict() == {"a": 3, "b": 2}
+    assert top["error"].sum() == 0 and top["guaranteed"].all()
+
+
+def test_count_min_never_underestimates():
+    stream = _zipf(20_000, 1)
+    sketch = CountMinSketch.from_error(0.01, 0.01)
+    for chunk in np.array_split(stream.to_numpy(), 4):
+        sketch.update(chunk)
+    sketch = CountMinSketch.from_bytes(sketch.to_bytes())
+
+    exact = stream.value_counts()
+    estimate = sketch.estimate(exact.index)
+    assert (estimate >= exact.to_numpy()).all()
+    assert np.mean(estimate - exact.to_numpy() <= sketch.error_bound) > 0.99
+
+
+def test_hyperloglog_counts_distinct_and_merges():
+    a, b = HyperLogLog(12), HyperLogLog(12)
+    a.update(np.arange(0, 60_000).astype(str))
+    b.update(np.arange(30_000, 90_000).astype(str))
+    assert abs(a.count() - 60_000) / 60_000 < 4 * a.relative_error
+    union = HyperLogLog.from_bytes(a.merge(b).to_bytes())
+    assert abs(union.count() - 90_000) / 90_000 < 4 * union.relative_error
+
+    small = HyperLogLog()
+    small.update(["1", "2", "2", "3", None])
+    assert round(small.count()) == 3
+    with pytest.raises(ValueError):
+        small.merge(HyperLogLog(10))
+
+
+def test_aggregate_feeds_month_sketch(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=300))
+    sketch = MonthSketch(1, 23)
+    BiciMad.aggregate(1, 23, chunksize=70, sketch=sketch)
+
+    bici = BiciMad(1, 23)
+    bici.clean()
+    data = bici.data
+    assert sketch.most_popular_stations() == bici.most_popular_stations()
+    pd.testing.assert_series_equal(sketch.usage_from_most_popular_station(),
+                                   bici.usage_from_most_popular_station(), check_dtype=False)
+    assert sketch.resume().drop("total_time").equals(bici.resume().drop("total_time"))
+    assert sketch.distinct_bikes() == data["idBike"].nunique()
+
+    con_estacion = data[data["station_unlock"].notna() & (data["station_unlock"] != "nan")]
+    rutas = con_estacion.groupby([con_estacion["station_unlock"].str.split(".").str[0], "station_lock"]).size()
+    top = sketch.top_routes(3)
+    assert top["count"].tolist() == rutas.sort_values(ascending=False).head(3).tolist()
+    assert sketch.route_count(*top.index[0])[0] >= top["count"].iloc[0]
+
+
+def test_store_merges_month_sketches(fake_emt, tmp_path):
+    pytest.importorskip("pyarrow")
+    for month in (11, 12):
+        fake_emt.add(month, 22, trips_csv(rows=120, seed=month, year=2022, month=month))
+    store = AggregateStore(tmp_path)
+    store.ingest(urls=set(fake_emt.files))
+
+    combinado = store.sketch((11, 22), (12, 22))
+    assert combinado.total_uses == 240
+    assert combinado.most_popular_stations() == store.combined().most_popular_stations()
+    assert combinado.error_bounds()["station_error"] == 0
+    with pytest.raises(ValueError):
+        store.sketch((10, 22), (12, 22))
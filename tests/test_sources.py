@@ -0,0 +1,89 @@
+import mmap
+
+import pandas as pd
+import pytest
+
+from bicimad.Etapa1 import BiciEMT
+from bicimad.bicimad import BiciMad
+from bicimad.sources import BufferSource, DataSource, FileSource, MirrorSource, as_source
+from tests.helpers import make_zip, trips_csv
+
+
+@pytest.fixture
+def csv_text():
+    return trips_csv(rows=80)
+
+
+def test_file_source_maps_csv_and_opens_zip(tmp_path, csv_text):
+    csv_path = tmp_path / "trips.csv"
+    csv_path.write_text(csv_text, encoding="utf-8")
+    zip_path = tmp_path / "trips.zip"
+    zip_path.write_bytes(make_zip(csv_text))
+
+    mapped = FileSource(csv_path).open()
+    assert isinstance(mapped, mmap.mmap)
+    assert mapped[:] == csv_text.encode("utf-8")
+    assert FileSource(zip_path).open().read() == csv_text.encode("utf-8")
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview])
+def test_buffer_source_reads_csv_and_zip(csv_text, wrap):
+    data = csv_text.encode("utf-8")
+    assert BufferSource(wrap(data)).open().read() == data
+    assert BufferSource(wrap(make_zip(csv_text))).open().read() == data
+    assert BufferSource(wrap(data)).identity() == BufferSource(data).identity()
+
+
+def test_sources_must_define_identity():
+    class SinIdentidad(DataSource):
+        def open(self, month=None, year=None):
+            return BufferSource(b"").open()
+
+    with pytest.raises(TypeError):
+        SinIdentidad()
+
+
+def test_mirror_source_prefers_csv_and_rejects_missing_months(tmp_path, csv_text):
+    (tmp_path / "trips_23_01_January-csv.zip").write_bytes(make_zip(csv_text))
+    (tmp_path / "2023").mkdir()
+    (tmp_path / "2023" / "trips_23_01_January.csv").write_text(csv_text, encoding="utf-8")
+    (tmp_path / "trips_23_02_February-csv.zip").write_bytes(make_zip(csv_text))
+
+    mirror = as_source(tmp_path)
+    assert isinstance(mirror, MirrorSource)
+    assert mirror.months() == [(23, 1), (23, 2)]
+    assert mirror.path(1, 23).suffix == ".csv"
+    assert mirror.path(2, 23).suffix == ".zip"
+    with pytest.raises(ValueError):
+        mirror.open(3, 23)
+
+
+def test_bicimad_from_local_sources_matches_remote(fake_emt, tmp_path, csv_text):
+    fake_emt.add(1, 23, csv_text)
+    (tmp_path / "trips_23_01_January.csv").write_text(csv_text, encoding="utf-8")
+
+    remote = BiciMad(1, 23)
+    remote.clean()
+    downloads = fake_emt.downloads
+    for source in (tmp_path, csv_text.encode("utf-8")):
+        local = BiciMad(1, 23, source=source)
+        local.clean()
+        pd.testing.assert_frame_equal(local.data, remote.data)
+
+        lazy = BiciMad(1, 23, source=source, lazy=True)
+        lazy.clean()
+        pd.testing.assert_series_equal(lazy.day_time(), remote.day_time())
+    assert fake_emt.downloads == downloads
+
+    with pytest.raises(ValueError):
+        BiciMad(2, 23, source=tmp_path, lazy=True)
+
+
+def test_biciemt_reads_local_zip(tmp_path, csv_text):
+    zip_path = tmp_path / "trips.zip"
+    zip_path.write_bytes(make_zip(csv_text))
+
+    bici = BiciEMT(zip_path)
+    assert len(bici.df) == 80
+    assert bici.df.index.name == "fecha"
+    assert bici.day_time().sum() == pytest.approx(bici.df["trip_minutes"].sum() / 60)
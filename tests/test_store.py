@@ -0,0 +1,87 @@
+import io
+
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.store import ColumnarStore
+from tests.helpers import trips_csv
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def clean_month():
+    df = pd.read_csv(io.StringIO(trips_csv()), sep=";", usecols=BiciMad.COLUMNS,
+                     index_col="unlock_date", parse_dates=["unlock_date", "lock_date"])
+    df.index = df.index.normalize()
+    df.index.name = "fecha"
+    return df
+
+
+@pytest.mark.parametrize("fmt", ColumnarStore.FORMATS)
+def test_round_trip_preserves_dtypes_and_index(tmp_path, clean_month, fmt):
+    store = ColumnarStore(tmp_path, format=fmt)
+    store.save(clean_month, 1, 23, source="v1")
+
+    loaded = store.load(1, 23, source="v1")
+    pd.testing.assert_frame_equal(loaded, clean_month)
+
+    projected = store.load(1, 23, columns=["trip_minutes"])
+    assert list(projected.columns) == ["trip_minutes"]
+    assert projected.index.name == "fecha"
+
+
+def test_source_mismatch_invalidates(tmp_path, clean_month):
+    store = ColumnarStore(tmp_path)
+    store.save(clean_month, 1, 23, source="v1")
+
+    assert store.load(1, 23, source="v2") is None
+    assert store.load(2, 23) is None
+
+
+def test_get_data_fast_path(tmp_path, fake_emt):
+    fake_emt.add(1, 23, trips_csv())
+    store = ColumnarStore(tmp_path)
+
+    bici = BiciMad(1, 23, store=store)
+    bici.clean()
+    bici.save()
+    downloads = fake_emt.downloads
+
+    reloaded = BiciMad(1, 23, store=store)
+    pd.testing.assert_frame_equal(reloaded.data, bici.data)
+    assert fake_emt.downloads == downloads
+    assert list(BiciMad.get_data(1, 23, store=store, columns=["address_unlock"]).columns) == ["address_unlock"]
+
+
+def test_unlock_hours_survive_clean_twice_and_store(tmp_path, fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=200))
+    store = ColumnarStore(tmp_path)
+
+    bici = BiciMad(1, 23, store=store)
+    columnas = list(bici.data.columns)
+    bici.clean(keep_time=True)
+    assert list(bici.data.columns) == columnas
+    horas, pico = bici.hourly_usage(), bici.peak_hour()
+    ventana = bici.window_usage("2023-01-01", "2023-01-15")
+    bici.clean()
+    pd.testing.assert_series_equal(bici.hourly_usage(), horas)
+    assert bici.peak_hour() == pico
+    pd.testing.assert_series_equal(bici.window_usage("2023-01-01", "2023-01-15"), ventana)
+    bici.save()
+
+    for reloaded in (BiciMad(1, 23, store=store), BiciMad(1, 23, store=store, lazy=True),
+                     BiciMad.from_data(bici.data, 1, 23, hours=bici._hours, times=bici._times)):
+        reloaded.clean()
+        assert list(reloaded.data.columns) == columnas
+        pd.testing.assert_series_equal(reloaded.hourly_usage(), horas)
+        pd.testing.assert_series_equal(reloaded.window_usage("2023-01-01", "2023-01-15"), ventana)
+
+
+def test_keep_time_after_discarding_it_fails(fake_emt):
+    fake_emt.add(1, 23, trips_csv())
+    bici = BiciMad(1, 23)
+    bici.clean()
+    with pytest.raises(ValueError):
+        bici.clean(keep_time=True)
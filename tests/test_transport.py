@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from bicimad.transport import Transport
+from tests.helpers import FakeResponse, FakeSession
+
+
+class BrokenResponse(FakeResponse):
+    """Respuesta cuya conexión se corta tras entregar `cut` bytes."""
+
+    def __init__(self, content: bytes, cut: int, status_code: int = 200):
+        super().__init__(content, status_code=status_code)
+        self.cut = cut
+
+    def iter_content(self, chunk_size=1):
+        yield self.content[:self.cut]
+        raise requests.ConnectionError("conexión cortada")
+
+
+def test_get_retries_server_errors():
+    responses = [FakeResponse(b"", status_code=503), FakeResponse(b"ok")]
+    transport = Transport(session=FakeSession(lambda url, **kw: responses.pop(0)), backoff=0)
+
+    assert transport.get("http://emt/a").content == b"ok"
+    assert not responses
+
+
+def test_get_gives_up_after_retries():
+    transport = Transport(session=FakeSession(lambda url, **kw: FakeResponse(b"", status_code=503)),
+                          retries=2, backoff=0)
+    with pytest.raises(requests.HTTPError):
+        transport.get("http://emt/a")
+
+
+def test_download_has_a_single_retry_layer(tmp_path):
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(url)
+        return FakeResponse(b"", status_code=503)
+
+    transport = Transport(session=FakeSession(fake_get), retries=2, backoff=0)
+    with open(tmp_path / "a.zip", "w+b") as f, pytest.raises(requests.HTTPError):
+        transport.download("http://emt/a.zip", f)
+    assert len(calls) == 3
+
+
+def test_download_resumes_with_range(tmp_path):
+    content = bytes(range(256)) * 40
+    requests_seen = []
+
+    def fake_get(url, headers=None, **kwargs):
+        requests_seen.append(dict(headers or {}))
+        if "Range" in headers:
+            start = int(headers["Range"][len("bytes="):-1])
+            return FakeResponse(content[start:], status_code=206)
+        return BrokenResponse(content, cut=1000)
+
+    progress = []
+    transport = Transport(session=FakeSession(fake_get), backoff=0)
+    with open(tmp_path / "a.zip", "w+b") as f:
+        transport.download("http://emt/a.zip", f, progress=lambda done, total: progress.append((done, total)))
+
+    assert (tmp_path / "a.zip").read_bytes() == content
+    assert requests_seen[1]["Range"] == "bytes=1000-"
+    assert requests_seen[1]["If-Range"] == '"v1"'
+    assert progress[-1] == (len(content), len(content))
+
+
+def test_download_restarts_without_range_support(tmp_path):
+    content = b"x" * 5000
+    responses = [BrokenResponse(content, cut=1000), FakeResponse(content)]
+    transport = Transport(session=FakeSession(lambda url, **kw: responses.pop(0)), backoff=0)
+    with open(tmp_path / "a.zip", "w+b") as f:
+        transport.download("http://emt/a.zip", f)
+
+    assert (tmp_path / "a.zip").read_bytes() == content
+
+
+def test_download_restarts_when_the_file_changes(tmp_path):
+    old, new = b"a" * 5000, b"b" * 6000
+
+    def fake_get(url, headers=None, **kwargs):
+        if headers.get("If-Range") == '"v1"':
+            return FakeResponse(new, etag='"v2"')  # If-Range no coincide: fichero completo
+        return BrokenResponse(old, cut=1000)
+
+    transport = Transport(session=FakeSession(fake_get), backoff=0)
+    with open(tmp_path / "a.zip", "w+b") as f:
+        response = transport.download("http://emt/a.zip", f)
+
+    assert (tmp_path / "a.zip").read_bytes() == new
+    assert response.headers["ETag"] == '"v2"'
+
+
+def test_download_closes_discarded_responses(tmp_path):
+    responses = [FakeResponse(b"", status_code=503), BrokenResponse(b"x" * 100, cut=10), FakeResponse(b"x" * 100)]
+    seen = list(responses)
+    transport = Transport(session=FakeSession(lambda url, **kw: responses.pop(0)), backoff=0)
+    with open(tmp_path / "a.zip", "w+b") as f:
+        transport.download("http://emt/a.zip", f)
+    assert seen[0].closed and seen[1].closed and not seen[2].closed
+
+
+def test_download_limits_concurrency(tmp_path):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_get(url, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return FakeResponse(b"zip")
+
+    transport = Transport(session=FakeSession(fake_get), max_concurrent=2)
+    files = [open(tmp_path / f"{i}.zip", "wb") for i in range(6)]
+    threads = [threading.Thread(target=transport.download, args=("http://emt/a.zip", f)) for f in files]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for f in files:
+        f.close()
+
+    assert peak[0] == 2
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from bicimad.bicimad import BiciMad
+from bicimad.windows import TripTimeline
+from tests.helpers import trips_csv
+
+
+@pytest.fixture
+def month(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=400))
+    bici = BiciMad(1, 23)
+    raw = bici.data.copy()
+    bici.clean(keep_time=True)
+    return bici, raw.dropna(how="all")
+
+
+def test_window_matches_mask(month):
+    bici, raw = month
+    estacion = bici.data["station_unlock"].iloc[0]
+    for start, end, station in [("2023-01-03 08:00", "2023-01-03 17:30", None),
+                                ("2023-01-01", "2023-02-01", None),
+                                ("2023-01-10 00:00", "2023-01-20 12:00", estacion)]:
+        mask = (raw.index >= start) & (raw.index < end)
+        if station is not None:
+            mask &= bici.data["station_unlock"].to_numpy() == station
+        usage = bici.window_usage(start, end, station)
+        assert usage["trips"] == mask.sum() and isinstance(usage["trips"], int)
+        assert usage["hours"] == pytest.approx(raw.loc[mask, "trip_minutes"].sum() / 60)
+
+
+def test_rolling_matches_mask(month):
+    bici, raw = month
+    rolling = bici.rolling_usage("90min", "30min")
+    times = raw.index
+    for t in rolling.index[::7]:
+        mask = (times >= t - pd.Timedelta("90min")) & (times < t)
+        assert rolling.loc[t, "trips"] == mask.sum()
+        assert rolling.loc[t, "minutes"] == pytest.approx(raw.loc[mask, "trip_minutes"].sum())
+
+
+def test_peak_windows_are_maximal():
+    times = pd.to_datetime(["2023-01-01 08:00", "2023-01-01 08:10", "2023-01-01 08:50", "2023-01-01 09:05",
+                            "2023-01-01 23:50", "2023-01-02 00:05", "2023-01-02 00:10"])
+    data = pd.DataFrame({"trip_minutes": 1.0, "station_unlock": ["a", "a", "b", "a", "b", "b", "b"]}, index=times)
+    timeline = TripTimeline.from_frame(data)
+
+    by_day = timeline.peak_windows("60min", by="day")
+    assert by_day["trips"].tolist() == [3, 2]
+    assert by_day["start"].iloc[0] == pd.Timestamp("2023-01-01 08:00")
+    assert by_day["end"].iloc[0] == pd.Timestamp("2023-01-01 09:00")
+
+    by_station = timeline.peak_windows("30min", by="station")
+    assert by_station.loc["b", "trips"] == 3
+    assert by_station.loc["b", "start"] == pd.Timestamp("2023-01-01 23:50")
+    assert timeline.peak_windows("30min", by=None)["trips"].iloc[0] == 3
+
+
+def test_timeline_requires_kept_time(fake_emt):
+    fake_emt.add(1, 23, trips_csv(rows=50))
+    bici = BiciMad(1, 23)
+    bici.clean()
+    with pytest.raises(ValueError):
+        bici.timeline()
+    assert bici.total_usage_day().sum() == 50